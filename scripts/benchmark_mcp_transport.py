@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark MCP Transport
+
+Drives MCPManager.call_tool against local stand-in MCP servers
+(swarmdev.mcp_tools.standin_server) at several concurrency levels and
+payload sizes, and reports calls/sec, latency percentiles and client CPU
+time per call. Needs no docker and no network, so it can run in CI.
+
+Usage:
+    python scripts/benchmark_mcp_transport.py
+    python scripts/benchmark_mcp_transport.py --scenarios echo payload --concurrency 1 8 32
+    python scripts/benchmark_mcp_transport.py --calls 500 --json results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Add SwarmDev source to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from swarmdev.mcp_tools.standin_server import standin_server_config
+from swarmdev.utils.mcp_manager import MCPManager
+
+# scenario -> (stand-in server options, tool name, tool arguments)
+SCENARIOS = {
+    "echo": ({}, "echo", {"message": "ping"}),
+    "payload": ({}, "payload", None),  # Arguments come from --payload-sizes
+    "latency": ({"latency_ms": 5}, "echo", {"message": "ping"}),
+    "out-of-order": ({"out_of_order": True}, "echo", {"message": "ping"}),
+    "stderr-flood": ({"stderr_bytes": 256 * 1024}, "echo", {"message": "ping"}),
+    "crash": ({"crash_after": 50}, "echo", {"message": "ping"}),
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def run_case(project_dir: str, scenario: str, concurrency: int, servers: int,
+             calls: int, payload_bytes: int) -> Dict:
+    """Run one benchmark case on a fresh manager and return its measurements."""
+    server_options, tool_name, arguments = SCENARIOS[scenario]
+    if arguments is None:
+        arguments = {"bytes": payload_bytes}
+
+    server_ids = [f"standin-{i}" for i in range(servers)]
+    config = {
+        "enabled": True,
+        "mcpServers": {sid: standin_server_config(**server_options) for sid in server_ids},
+        "mcpSettings": {
+            # Measure the transport itself: no broker, cache or breaker in the way
+            "broker": {"enabled": False},
+            "responseCache": {"enabled": False},
+            "circuitBreaker": {"enabled": False},
+            "idleTimeout": 0,
+        },
+    }
+    manager = MCPManager(config, project_dir)
+    # Only the stand-in servers take part; built-in defaults are never started
+    for server_id in list(manager.servers):
+        if server_id not in server_ids:
+            manager.servers.pop(server_id)
+
+    try:
+        # Warm up: spawn and handshake every server outside the measurement
+        for server_id in server_ids:
+            manager.call_tool(server_id, "tools/call", {"name": "echo", "arguments": {}})
+
+        latencies: List[float] = []
+        errors = 0
+
+        def one_call(index: int):
+            server_id = server_ids[index % len(server_ids)]
+            started = time.perf_counter()
+            response = manager.call_tool(server_id, "tools/call", {"name": tool_name, "arguments": arguments})
+            return time.perf_counter() - started, bool(response.get("error"))
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for latency, failed in pool.map(one_call, range(calls)):
+                latencies.append(latency)
+                errors += failed
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+    finally:
+        manager.shutdown()
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "servers": servers,
+        "payload_bytes": payload_bytes if tool_name == "payload" else None,
+        "calls": calls,
+        "errors": errors,
+        "calls_per_sec": calls / wall if wall > 0 else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "cpu_us_per_call": cpu / calls * 1e6 if calls else 0.0,
+    }
+
+
+def print_result(result: Dict):
+    size = f"{result['payload_bytes']:>9,}" if result["payload_bytes"] is not None else f"{'-':>9}"
+    print(
+        f"{result['scenario']:<13} {result['concurrency']:>4} {result['servers']:>4} {size} "
+        f"{result['calls_per_sec']:>10.1f} {result['p50_ms']:>8.2f} {result['p90_ms']:>8.2f} "
+        f"{result['p99_ms']:>8.2f} {result['max_ms']:>8.2f} {result['cpu_us_per_call']:>9.1f} {result['errors']:>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MCP transport against local stand-in servers")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=["echo", "payload", "latency", "out-of-order", "stderr-flood", "crash"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--payload-sizes", nargs="+", type=int, default=[1024, 64 * 1024, 1024 * 1024])
+    parser.add_argument("--servers", type=int, default=1, help="Stand-in server processes to spread calls over")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per case")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show MCP manager logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Error scenarios log on every failed call; keep the table readable
+        logging.disable(logging.CRITICAL)
+
+    print(f"{'scenario':<13} {'conc':>4} {'srv':>4} {'payload':>9} {'calls/s':>10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'cpu us':>9} {'errors':>6}")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="swarmdev-mcp-bench-") as project_dir:
+        for scenario in args.scenarios:
+            sizes = args.payload_sizes if scenario == "payload" else [0]
+            for payload_bytes in sizes:
+                for concurrency in args.concurrency:
+                    result = run_case(project_dir, scenario, concurrency, args.servers, args.calls, payload_bytes)
+                    print_result(result)
+                    results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
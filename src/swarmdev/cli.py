@@ -26,6 +26,8 @@ import json
 import time
 import argparse
 import logging
+import signal
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
@@ -154,6 +156,43 @@ def setup_parser():
     mcp_analysis_parser = subparsers.add_parser('mcp-analysis', help='Analyze MCP system performance and health')
     mcp_analysis_parser.add_argument('--project-dir', '-d', default='.', help='Project directory')
 
+    # MCP broker daemon command
+    mcp_daemon_parser = subparsers.add_parser('mcp-daemon', help='Run a local MCP broker that keeps MCP servers warm across builds')
+    mcp_daemon_parser.add_argument('--socket', default=None, help='Unix socket path (default: ~/.swarmdev/mcp-broker.sock)')
+    mcp_daemon_parser.add_argument('--status', action='store_true', help='Show the status of a running broker and exit')
+    mcp_daemon_parser.add_argument('--stop', action='store_true', help='Stop a running broker and exit')
+    mcp_daemon_parser.epilog = """
+While the broker runs, every swarmdev command on this host routes MCP calls
+through it and reuses its warm servers. Set mcpSettings.broker.enabled to
+false in mcp_config.json to opt a project out.
+
+Examples:
+  swarmdev mcp-daemon                     # Run the broker in the foreground
+  swarmdev mcp-daemon --status            # Show servers owned by the broker
+  swarmdev mcp-daemon --stop              # Stop the broker and its servers
+"""
+
+    # Memory snapshot command
+    memory_parser = subparsers.add_parser('memory', help='Export or import a project\'s memory graph snapshot')
+    memory_subparsers = memory_parser.add_subparsers(dest='memory_action', help='Memory snapshot actions')
+    
+    export_mem = memory_subparsers.add_parser('export', help='Write the latest build\'s memory subgraph to a snapshot file')
+    export_mem.add_argument('--project-dir', '-d', default='.', help='Project directory')
+    export_mem.add_argument('--output', '-o', help='Snapshot file; .zst is zstd, .gz is gzip (default: .swarmdev/memory_snapshot.jsonl.zst)')
+    export_mem.add_argument('--project-id', help='Project ID to export (default: the latest build)')
+    
+    import_mem = memory_subparsers.add_parser('import', help='Load a snapshot file so the next build warm-starts from it')
+    import_mem.add_argument('snapshot', help='Snapshot file written by swarmdev memory export')
+    import_mem.add_argument('--project-dir', '-d', default='.', help='Project directory')
+    memory_parser.epilog = """
+Every build gets a new project ID; builds warm-start from the snapshot in
+the project's .swarmdev directory, which is written when a build stops.
+
+Examples:
+  swarmdev memory export -o memory.jsonl.zst      # Save the project's memory graph
+  swarmdev memory import memory.jsonl.zst         # Warm-start the next build from it
+"""
+
     # Pull MCP Images command
     pull_images_parser = subparsers.add_parser('pull-images', help='Download and set up MCP Docker images from GHCR')
     pull_images_parser.epilog = """
@@ -1344,6 +1383,7 @@ def cmd_mcp_analysis(args):
             print()
         
         # Enhanced health report
+        health_report = {}
         try:
             health_report = manager.get_health_report()
             if "error" not in health_report:
@@ -1377,9 +1417,41 @@ def cmd_mcp_analysis(args):
                         if health.get('last_failure_time'):
                             print(f"    Last Failure: {health.get('last_failure_time', 'N/A')}")
                     print()
+
+                breakers = health_report.get("circuit_breakers", {})
+                tripped = {sid: b for sid, b in breakers.items() if b.get("times_opened")}
+                if tripped:
+                    print("CIRCUIT BREAKERS:")
+                    for server_id, breaker in tripped.items():
+                        print(f"  {server_id}: {breaker['state']} (opened {breaker['times_opened']}x, "
+                              f"{breaker['rejected_calls']} calls rejected, last reason: {breaker['last_reason']})")
+                    print()
         except Exception as e:
             print(f"Enhanced analysis unavailable: {e}")
-        
+
+        # Latency histograms live in the process that made the calls; when a
+        # broker daemon is running it has the long-lived view
+        latency = health_report.get("latency", {})
+        latency_source = "this process"
+        if manager._broker is not None:
+            try:
+                broker_status = manager._broker.request("broker/status", {}, 10).get("result", {})
+                latency = broker_status.get("health", {}).get("latency", {}) or latency
+                latency_source = f"MCP broker (PID: {broker_status.get('pid')})"
+            except (ConnectionError, ValueError) as e:
+                print(f"Broker latency unavailable: {e}")
+        if latency:
+            print(f"LATENCY PERCENTILES ({latency_source}):")
+            print(f"  {'server/tool':<40} {'calls':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'bytes':>12}")
+            for key, summary in latency.items():
+                print(
+                    f"  {key:<40} {summary['count']:>7} "
+                    f"{summary['p50'] * 1000:>7.1f}ms {summary['p90'] * 1000:>7.1f}ms "
+                    f"{summary['p99'] * 1000:>7.1f}ms {summary['max'] * 1000:>7.1f}ms "
+                    f"{summary['total_bytes']:>12,}"
+                )
+            print()
+
         # Performance report
         try:
             performance_report = manager.generate_performance_report()
@@ -1451,6 +1523,141 @@ def cmd_mcp_analysis(args):
             traceback.print_exc()
 
 
+def cmd_mcp_daemon(args):
+    """Handles the 'mcp-daemon' command to run or control the local MCP broker."""
+    from swarmdev.utils.mcp_broker import MCPBroker, get_broker_socket_path
+    from swarmdev.utils.mcp_transport import MCPBrokerClient
+    
+    socket_path = get_broker_socket_path({"socketPath": args.socket} if args.socket else None)
+    
+    if args.status or args.stop:
+        client = MCPBrokerClient(socket_path)
+        try:
+            if args.stop:
+                response = client.request("broker/shutdown", {}, timeout=5)
+                print(f"MCP broker on {socket_path} is stopping" if "result" in response else f"Failed to stop broker: {response.get('error')}")
+                return
+            
+            status = client.request("broker/status", {}, timeout=10).get("result", {})
+            print("=== MCP BROKER STATUS ===")
+            print(f"Socket: {status.get('socket')}")
+            print(f"PID: {status.get('pid')}")
+            print(f"Uptime: {status.get('uptime_seconds', 0):.0f}s")
+            metrics = status.get("metrics", {})
+            print(f"Calls: {metrics.get('total_calls', 0)} total, {metrics.get('successful_calls', 0)} successful, {metrics.get('failed_calls', 0)} failed")
+            print(f"Servers: {len(status.get('servers', {}))}")
+            for key, info in sorted(status.get("servers", {}).items()):
+                print(f"  {key}: {info.get('status')} (PID: {info.get('pid') or '-'}, calls: {info.get('usage_count', 0)}, last used: {info.get('last_used') or 'never'})")
+        except ConnectionError:
+            print(f"No MCP broker is running on {socket_path}")
+            sys.exit(1)
+        finally:
+            client.close()
+        return
+    
+    broker = MCPBroker(socket_path)
+    
+    def _handle_signal(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so it cannot run on the serving thread
+        threading.Thread(target=broker.stop, daemon=True).start()
+    signal.signal(signal.SIGTERM, _handle_signal)
+    
+    print(f"MCP broker listening on {socket_path} (PID: {os.getpid()}). Press Ctrl+C to stop.")
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    print("MCP broker stopped")
+
+
+def cmd_memory(args):
+    """Handles the 'memory' command to export and import memory graph snapshots."""
+    import shutil
+    from swarmdev.utils.memory_backend import create_memory_backend
+    from swarmdev.utils.memory_snapshot import (
+        compression_suffix, default_snapshot_path, export_snapshot, read_snapshot, write_snapshot
+    )
+    
+    if not args.memory_action:
+        print("Usage: swarmdev memory {export,import} [--project-dir DIR]")
+        return
+    
+    swarmdev_dir = os.path.join(args.project_dir, '.swarmdev')
+    file_config = {}
+    config_file = os.path.join(swarmdev_dir, 'swarmdev_config.json')
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, 'r') as f:
+                file_config = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load config file {config_file}: {e}")
+    memory_config = file_config.get('memory', {})
+    
+    if args.memory_action == 'import':
+        try:
+            header, entities, relations = read_snapshot(args.snapshot)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Cannot read snapshot: {e}")
+            sys.exit(1)
+        
+        # Builds load the project's snapshot at startup; keep the file's compression
+        target = memory_config.get('snapshot_path')
+        if not target:
+            base = os.path.join(swarmdev_dir, 'memory_snapshot.jsonl')
+            target = base + compression_suffix(args.snapshot)
+            for other in (base + '.zst', base + '.gz', base):
+                if other != target and os.path.exists(other):
+                    os.remove(other)
+        if os.path.abspath(target) != os.path.abspath(args.snapshot):
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            if compression_suffix(target) == compression_suffix(args.snapshot):
+                shutil.copyfile(args.snapshot, target)
+            else:
+                # A configured snapshot_path may use another compression than the file
+                try:
+                    write_snapshot(target, entities, relations, header.get('project_id'), header.get('project_dir'))
+                except (OSError, ImportError) as e:
+                    print(f"Cannot write snapshot {target}: {e}")
+                    sys.exit(1)
+        print(f"Installed snapshot of {header.get('project_id')} ({len(entities)} entities, {len(relations)} relations) at {target}")
+        print(f"The next build in {args.project_dir} warm-starts from it")
+        return
+    
+    project_id = args.project_id
+    if not project_id:
+        metadata_file = os.path.join(swarmdev_dir, 'project_metadata.json')
+        try:
+            with open(metadata_file, 'r') as f:
+                project_id = json.load(f).get('project_id')
+        except (OSError, ValueError):
+            pass
+    if not project_id:
+        print(f"No build found in {args.project_dir}; pass --project-id")
+        sys.exit(1)
+    
+    mcp_manager = None
+    if memory_config.get('backend', 'auto') != 'sqlite':
+        from swarmdev.utils.mcp_manager import MCPManager
+        mcp_manager = MCPManager(file_config.get('mcp', {'enabled': True, 'docker_enabled': True}), args.project_dir)
+        if mcp_manager.is_enabled():
+            mcp_manager.initialize_tools()
+    backend = create_memory_backend(memory_config, mcp_manager, args.project_dir, logger)
+    try:
+        output = args.output or memory_config.get('snapshot_path') or default_snapshot_path(args.project_dir)
+        header = export_snapshot(backend, project_id, output, args.project_dir, logger=logger)
+        if "error" in header:
+            print(header["error"])
+            sys.exit(1)
+        print(f"Exported {header['entities']} entities and {header['relations']} relations of {project_id} to {output}")
+    finally:
+        backend.close()
+        if mcp_manager:
+            mcp_manager.shutdown()
+
+
 def cmd_pull_images(args):
     """Handles the 'pull-images' command to download MCP Docker images."""
     logger.info("Starting MCP Docker image download process...")
@@ -1565,6 +1772,10 @@ def main():
         cmd_blueprint(args)
     elif args.command == "mcp-analysis":
         cmd_mcp_analysis(args)
+    elif args.command == "mcp-daemon":
+        cmd_mcp_daemon(args)
+    elif args.command == "memory":
+        cmd_memory(args)
     elif args.command == "pull-images":
         cmd_pull_images(args)
     elif args.command == "fix-docker-group":
@@ -15,6 +15,13 @@ from swarmdev.swarm_builder.orchestration import Orchestrator
 from swarmdev.swarm_builder.agents import ResearchAgent, PlanningAgent, DevelopmentAgent, DocumentationAgent, AnalysisAgent
 from swarmdev.swarm_builder.workflows import get_workflow_by_id
 from ..utils.memory_context_manager import MemoryContextManager
+from ..utils.memory_backend import create_memory_backend
+from ..utils.memory_vector_index import create_vector_index
+from ..utils.memory_snapshot import default_snapshot_path
+from ..utils.llm_cache import create_caching_provider
+from ..utils.llm_rate_limit import create_rate_limited_provider
+from ..utils.llm_singleflight import create_coalescing_provider
+from ..utils.llm_routing import create_hedged_provider
 
 if TYPE_CHECKING:
     from ..utils.mcp_manager import MCPManager
@@ -113,15 +120,27 @@ class SwarmBuilder:
             # Create MemoryContextManager instance
             # Ensure self.mcp_manager is initialized by _setup_mcp_manager()
             memory_manager_instance: Optional[MemoryContextManager] = None
-            if self.mcp_manager and self.mcp_manager.is_enabled():
+            memory_config = self.config.get("memory", {})
+            if memory_config.get("enabled", True):
+                if memory_config.get("snapshot", True):
+                    # Snapshots are keyed by project directory, so reruns warm-start from the last build
+                    memory_config = dict(memory_config, snapshot_path=memory_config.get("snapshot_path") or default_snapshot_path(self.project_dir))
                 memory_manager_instance = MemoryContextManager(
                     mcp_manager=self.mcp_manager, 
                     project_id=project_id, 
-                    logger=self.logger
+                    logger=self.logger,
+                    config=memory_config,
+                    backend=create_memory_backend(memory_config, self.mcp_manager, self.project_dir, self.logger),
+                    vector_index=create_vector_index(memory_config, self.llm_provider, self.project_dir, self.logger)
                 )
-                self.logger.info(f"MemoryContextManager created for project {project_id}")
+                self.logger.info(f"MemoryContextManager created for project {project_id} ({memory_manager_instance.backend.name} backend)")
+                snapshot_path = memory_manager_instance.snapshot_path
+                if snapshot_path and os.path.exists(snapshot_path):
+                    imported = memory_manager_instance.import_snapshot(snapshot_path)
+                    if "error" not in imported:
+                        self.logger.info(f"Warm-started memory from {snapshot_path}: {imported['entities']} entities from {imported['source_project_id']}")
             else:
-                self.logger.info("MCP Manager not available or disabled, MemoryContextManager not created.")
+                self.logger.info("Memory disabled in configuration, MemoryContextManager not created.")
 
             # Initialize orchestrator, passing the memory_manager_instance
             self.orchestrator = Orchestrator(
@@ -173,7 +192,7 @@ class SwarmBuilder:
             if provider_name == 'auto':
                 # Use provider registry to auto-detect available providers
                 registry = ProviderRegistry()
-                registry.discover_providers()
+                registry.discover_providers(**self._provider_options())
                 self.llm_provider = registry.get_provider()
                 
                 # If a specific model is configured, update the provider's model
@@ -182,29 +201,29 @@ class SwarmBuilder:
                     self.logger.info(f"Updated auto-detected provider model to: {model_name}")
             else:
                 # Create provider directly with configured model
-                from ..utils.llm_provider import OpenAIProvider, AnthropicProvider, GoogleProvider
-                import os
-                
-                if provider_name == 'openai':
-                    api_key = os.environ.get('OPENAI_API_KEY')
-                    if not api_key:
-                        raise ValueError("OPENAI_API_KEY environment variable not set")
-                    self.llm_provider = OpenAIProvider(api_key=api_key, model=model_name or 'o4-mini-2025-04-16')
-                
-                elif provider_name == 'anthropic':
-                    api_key = os.environ.get('ANTHROPIC_API_KEY')
-                    if not api_key:
-                        raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-                    self.llm_provider = AnthropicProvider(api_key=api_key, model=model_name or 'claude-3-opus-20240229')
-                
-                elif provider_name == 'google':
-                    api_key = os.environ.get('GOOGLE_API_KEY')
-                    if not api_key:
-                        raise ValueError("GOOGLE_API_KEY environment variable not set")
-                    self.llm_provider = GoogleProvider(api_key=api_key, model=model_name or 'gemini-2.0-flash-001')
-                
-                else:
-                    raise ValueError(f"Unknown provider: {provider_name}")
+                self.llm_provider = self._create_llm_provider(provider_name, model_name)
+            
+            # Route across the configured backup providers (hedging and failover), each
+            # paced within its rate limits with transient errors retried
+            llm_config = self.config.get('llm', {})
+            self.llm_provider = create_hedged_provider(
+                self.llm_provider,
+                llm_config.get('hedging'),
+                self._create_llm_provider,
+                lambda provider: create_rate_limited_provider(provider, llm_config.get('rate_limit'), self.logger),
+                self.logger
+            )
+            
+            # Share one upstream call among concurrent identical requests
+            self.llm_provider = create_coalescing_provider(
+                self.llm_provider, self.config.get('llm', {}).get('coalesce'), self.logger
+            )
+            
+            # Serve repeated low-temperature prompts from the on-disk response cache
+            # (outermost, so cache hits never wait for the rate limiter)
+            self.llm_provider = create_caching_provider(
+                self.llm_provider, self.config.get('llm', {}).get('cache'), self.project_dir, self.logger
+            )
             
             if self.llm_provider:
                 actual_model = getattr(self.llm_provider, 'model', 'unknown')
@@ -216,6 +235,43 @@ class SwarmBuilder:
             self.logger.error(f"Failed to initialize LLM provider: {e}")
             self.llm_provider = None
     
+    def _provider_options(self) -> Dict:
+        """Constructor options shared by every LLM provider this build creates."""
+        llm_config = self.config.get('llm', {})
+        options = {'http': llm_config.get('http')}  # Connection pool settings for the async clients
+        if (llm_config.get('rate_limit') or {}).get('enabled', True):
+            # The rate limiter retries transient errors itself; SDK retries would multiply its attempts
+            options['sdk_max_retries'] = 0
+        return options
+    
+    def _create_llm_provider(self, provider_name: str, model_name: Optional[str] = None) -> LLMProviderInterface:
+        """Create a provider by name, with its API key from the environment."""
+        from ..utils.llm_provider import OpenAIProvider, AnthropicProvider, GoogleProvider
+        import os
+        
+        options = self._provider_options()
+        
+        if provider_name == 'openai':
+            api_key = os.environ.get('OPENAI_API_KEY')
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY environment variable not set")
+            return OpenAIProvider(api_key=api_key, model=model_name or 'o4-mini-2025-04-16', **options)
+        
+        elif provider_name == 'anthropic':
+            api_key = os.environ.get('ANTHROPIC_API_KEY')
+            if not api_key:
+                raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+            return AnthropicProvider(api_key=api_key, model=model_name or 'claude-3-opus-20240229', **options)
+        
+        elif provider_name == 'google':
+            api_key = os.environ.get('GOOGLE_API_KEY')
+            if not api_key:
+                raise ValueError("GOOGLE_API_KEY environment variable not set")
+            return GoogleProvider(api_key=api_key, model=model_name or 'gemini-2.0-flash-001', **options)
+        
+        else:
+            raise ValueError(f"Unknown provider: {provider_name}")
+    
     def _setup_mcp_manager(self):
         """Set up the MCP manager for the build process."""
         try:
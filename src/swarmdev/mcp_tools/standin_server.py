@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Stand-in MCP Server for Testing and Benchmarks
+
+A dependency-free stdio MCP server whose behaviour is set on the command
+line, so MCP Manager transport changes can be measured and exercised
+without pulling docker images from ghcr.io.
+
+Tools:
+    echo     Return the call arguments as JSON text
+    payload  Return a text result of `bytes` bytes (default --payload-bytes)
+    sleep    Wait `ms` milliseconds, then respond
+
+Behaviour flags (combinable):
+    --latency-ms N     Delay every tools/call response by N ms
+    --payload-bytes N  Default size for the payload tool
+    --out-of-order     Answer requests on worker threads with random jitter,
+                       emitting a notification and a stale response first
+    --crash-after N    Exit with status 1 after N successful tools/call requests
+    --stderr-bytes N   Write N bytes of noise to stderr for every tools/call
+
+Usage:
+    python -m swarmdev.mcp_tools.standin_server --latency-ms 5
+
+Example MCP Configuration:
+    "standin": {
+        "command": ["python", "/path/to/standin_server.py", "--payload-bytes", "65536"],
+        "timeout": 30,
+        "description": "Stand-in MCP server for transport benchmarks"
+    }
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+PROTOCOL_VERSION = "2024-11-05"
+
+TOOLS = [
+    {
+        "name": "echo",
+        "description": "Return the call arguments as JSON text",
+        "inputSchema": {"type": "object", "additionalProperties": True},
+    },
+    {
+        "name": "payload",
+        "description": "Return a text result of the requested size",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"bytes": {"type": "integer", "description": "Size of the result text"}},
+        },
+    },
+    {
+        "name": "sleep",
+        "description": "Wait before responding",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"ms": {"type": "number", "description": "Milliseconds to wait"}},
+        },
+    },
+]
+
+
+class StandinServer:
+    """JSON-RPC loop over binary stdin/stdout with configurable misbehaviour."""
+
+    def __init__(self, latency_ms: float = 0.0, payload_bytes: int = 1024,
+                 out_of_order: bool = False, crash_after: int = 0, stderr_bytes: int = 0):
+        self.latency = latency_ms / 1000.0
+        self.payload_bytes = payload_bytes
+        self.out_of_order = out_of_order
+        self.crash_after = crash_after
+        self.stderr_bytes = stderr_bytes
+
+        self.calls = 0
+        self._stdout = sys.stdout.buffer
+        self._write_lock = threading.Lock()
+        self._calls_lock = threading.Lock()
+
+    def _send(self, messages: List[Dict]):
+        data = b"".join(json.dumps(message).encode("utf-8") + b"\n" for message in messages)
+        with self._write_lock:
+            self._stdout.write(data)
+            self._stdout.flush()
+
+    def _result(self, request_id, result: Dict) -> Dict:
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def _error(self, request_id, code: int, message: str) -> Dict:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+    def handle(self, request: Dict) -> Optional[Dict]:
+        """Build the response for one request (None for notifications)."""
+        method = request.get("method")
+        request_id = request.get("id")
+        if request_id is None:
+            return None
+
+        if method == "initialize":
+            return self._result(request_id, {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "swarmdev-standin", "version": "1.0.0"},
+            })
+        if method == "tools/list":
+            return self._result(request_id, {"tools": TOOLS})
+        if method == "ping":
+            return self._result(request_id, {})
+        if method != "tools/call":
+            return self._error(request_id, -32601, f"Method not found: {method}")
+
+        with self._calls_lock:
+            self.calls += 1
+            call_number = self.calls
+        if self.crash_after and call_number > self.crash_after:
+            sys.stderr.write(f"standin: crashing on call {call_number} as configured\n")
+            sys.stderr.flush()
+            os._exit(1)
+        if self.stderr_bytes:
+            sys.stderr.write(("stderr noise " * (self.stderr_bytes // 13 + 1))[:self.stderr_bytes] + "\n")
+            sys.stderr.flush()
+
+        params = request.get("params") or {}
+        arguments = params.get("arguments") or {}
+        name = params.get("name")
+        delay = self.latency
+        if name == "echo":
+            text = json.dumps(arguments)
+        elif name == "payload":
+            text = "x" * int(arguments.get("bytes", self.payload_bytes))
+        elif name == "sleep":
+            delay += float(arguments.get("ms", 0)) / 1000.0
+            text = "slept"
+        else:
+            return self._error(request_id, -32602, f"Unknown tool: {name}")
+
+        if self.out_of_order:
+            delay += random.uniform(0, 0.005)
+        if delay > 0:
+            time.sleep(delay)
+        return self._result(request_id, {"content": [{"type": "text", "text": text}]})
+
+    def _respond(self, request: Dict):
+        response = self.handle(request)
+        if response is None:
+            return
+        if self.out_of_order and request.get("method") == "tools/call":
+            self._send([
+                {"jsonrpc": "2.0", "method": "notifications/message",
+                 "params": {"level": "info", "data": "standin progress"}},
+                self._result(f"stale-{request.get('id')}", {"content": []}),
+                response,
+            ])
+        else:
+            self._send([response])
+
+    def serve(self):
+        for line in sys.stdin.buffer:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self._send([self._error(None, -32700, f"Parse error: {e}")])
+                continue
+            if self.out_of_order and request.get("method") == "tools/call":
+                threading.Thread(target=self._respond, args=(request,), daemon=True).start()
+            else:
+                self._respond(request)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Stand-in stdio MCP server for tests and benchmarks")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay for every tools/call response")
+    parser.add_argument("--payload-bytes", type=int, default=1024, help="Default size for the payload tool")
+    parser.add_argument("--out-of-order", action="store_true", help="Answer concurrently with jitter, interleaving notifications and stale responses")
+    parser.add_argument("--crash-after", type=int, default=0, help="Exit after N successful tools/call requests (0 = never)")
+    parser.add_argument("--stderr-bytes", type=int, default=0, help="Bytes of stderr noise written per tools/call")
+    args = parser.parse_args(argv)
+
+    StandinServer(
+        latency_ms=args.latency_ms,
+        payload_bytes=args.payload_bytes,
+        out_of_order=args.out_of_order,
+        crash_after=args.crash_after,
+        stderr_bytes=args.stderr_bytes,
+    ).serve()
+
+
+def standin_server_config(timeout: int = 30, **options) -> Dict:
+    """
+    MCP server config entry that launches this stand-in server.
+
+    Keyword options map to the command-line flags, e.g.
+    standin_server_config(latency_ms=5, out_of_order=True).
+    """
+    command = [sys.executable, os.path.abspath(__file__)]
+    for key, value in options.items():
+        flag = "--" + key.replace("_", "-")
+        if value is True:
+            command.append(flag)
+        elif value not in (None, False):
+            command.extend([flag, str(value)])
+    return {
+        "command": command,
+        "timeout": timeout,
+        "init_delay": 0,
+        "description": "Stand-in MCP server",
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,11 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any, Callable, TYPE_CHECKING
 from datetime import datetime
 import os
+import sys
 import time
 
 from ...utils.agent_logger import AgentLogger
+from ...utils.prompt_builder import PromptBuilder, split_context_sections
 
 if TYPE_CHECKING:
     from ...utils.llm_provider import LLMProviderInterface
@@ -68,6 +70,9 @@ class BaseAgent(ABC):
         self.logger = AgentLogger.get_logger(agent_type, agent_id)
         self.logger.info(f"Initializing {agent_type} agent: {agent_id}")
         
+        # Token budgets for the context interpolated into prompts
+        self.prompt_builder = PromptBuilder(llm_provider, self.config.get("llm", {}).get("prompt"), self.logger)
+        
         # Natural MCP Integration - Just expose tools, no hardcoded patterns
         if self.mcp_manager:
             self.logger.info("=== NATURAL MCP INTEGRATION ===")
@@ -135,11 +140,23 @@ class BaseAgent(ABC):
         
         return catalog
     
-    def get_mcp_tool_catalog(self) -> str:
-        """Get a formatted catalog of all available MCP tools for LLM usage."""
+    def get_mcp_tool_catalog(self, compact: bool = False) -> str:
+        """
+        Get a formatted catalog of all available MCP tools for LLM usage.
+        
+        compact lists only the method names of each tool, for prompts that are over budget.
+        """
         if not self.mcp_tool_catalog:
             return "No MCP tools available."
         
+        if compact:
+            catalog_text = "Available MCP Tools:\n\n"
+            for tool_id, tool_info in self.mcp_tool_catalog.items():
+                names = [tool.get('name', 'unknown') for tool in tool_info.get('tools', [])]
+                catalog_text += f"- {tool_id}: {', '.join(names) if names else 'no methods discovered'}\n"
+            catalog_text += "\nTo use any tool, call: call_mcp_tool(tool_id, method_name, parameters)\n"
+            return catalog_text
+        
         catalog_text = "Available MCP Tools:\n\n"
         
         for tool_id, tool_info in self.mcp_tool_catalog.items():
@@ -276,13 +293,14 @@ class BaseAgent(ABC):
     def _execute_with_natural_tool_access(self, task_description: str, context: Dict, fallback_method=None) -> Dict:
         """Execute task with natural MCP tool access - no hardcoded patterns."""
         
-        tool_catalog = self.get_mcp_tool_catalog()
-        
-        enhanced_prompt = f"""
-        You are a {self.agent_type} agent with access to MCP tools. 
+        sections = split_context_sections(context)
+        enhanced_prompt = self.prompt_builder.build("""
+        You are a {agent_type} agent with access to MCP tools. 
         
         TASK: {task_description}
-        CONTEXT: {context}
+        GOAL: {goal}
+        PLAN: {plan}
+        CONTEXT: {prior_results}
         
         {tool_catalog}
         
@@ -293,7 +311,13 @@ class BaseAgent(ABC):
         
         If you use tools, explain what you're doing and why.
         If you don't use tools, that's fine too - just complete the task with your knowledge.
-        """
+        """,
+            dict(sections, tool_catalog=self.get_mcp_tool_catalog()),
+            call_site=self._prompt_call_site("_execute_with_natural_tool_access"),
+            fallbacks={"tool_catalog": [self.get_mcp_tool_catalog(compact=True)]},
+            agent_type=self.agent_type,
+            task_description=task_description
+        )
         
         try:
             # Let LLM work with natural tool access
@@ -312,19 +336,33 @@ class BaseAgent(ABC):
                 return fallback_method(task_description, context)
             return self._llm_only_approach(task_description, context)
     
+    def _prompt_call_site(self, method: str) -> str:
+        """Name the agent method that led to a prompt, e.g. research._plan_research_approach->_llm_only_approach."""
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_code.co_filename == __file__:
+            frame = frame.f_back
+        caller = frame.f_code.co_name if frame is not None else "unknown"
+        return f"{self.agent_type}.{caller}->{method}"
+    
     def _llm_only_approach(self, task_description: str, context: Dict) -> Dict:
         """Fallback to pure LLM approach when no tools are used."""
         if not self.llm_provider:
             return {"error": "No LLM provider available"}
         
-        llm_prompt = f"""
+        llm_prompt = self.prompt_builder.build("""
         Complete this task using your knowledge:
         
         Task: {task_description}
-        Context: {context}
+        Goal: {goal}
+        Plan: {plan}
+        Context: {prior_results}
         
         Provide a comprehensive response based on your training knowledge.
-        """
+        """,
+            split_context_sections(context),
+            call_site=self._prompt_call_site("_llm_only_approach"),
+            task_description=task_description
+        )
         
         try:
             result = self.llm_provider.generate_text(llm_prompt, temperature=0.3)
@@ -5,6 +5,7 @@ Clean, focused implementations using BaseAgent infrastructure.
 
 import json
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from pathlib import Path
@@ -895,6 +896,61 @@ class PlanningAgent(BaseAgent):
             return {"completion_criteria": "Standard sequential completion", "total_tasks": len(task_breakdown)}
 
 
+class FileResponseParser:
+    """
+    Incremental parser for FILE_PATH / ACTION / CONTENT responses.
+    
+    Feed it chunks as they stream in: file_path and action are known as soon
+    as the CONTENT: line arrives, and the body accumulates until close().
+    """
+    
+    def __init__(self):
+        self.file_path: Optional[str] = None
+        self.action = "create"
+        self.header_complete = False
+        self._started = False
+        self._pending = ""
+        self._body: List[str] = []
+    
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; returns True if it completed the header."""
+        if self.header_complete:
+            self._body.append(chunk)
+            return False
+        if not self._started:
+            # Like parsing response.strip(): leading whitespace is not part of the first line
+            chunk = chunk.lstrip()
+            self._started = bool(chunk)
+        self._pending += chunk
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            if self._header_line(line):
+                self.header_complete = True
+                self._body.append(self._pending)
+                self._pending = ""
+                return True
+        return False
+    
+    def _header_line(self, line: str) -> bool:
+        """Record a header line; returns True for the CONTENT: line."""
+        if line.startswith("FILE_PATH:"):
+            self.file_path = line.replace("FILE_PATH:", "").strip()
+        elif line.startswith("ACTION:"):
+            self.action = line.replace("ACTION:", "").strip()
+        elif line.startswith("CONTENT:"):
+            return True
+        return False
+    
+    def close(self) -> Optional[Dict]:
+        """The parsed {"file_path", "action", "content"}, or None if the response had no complete header."""
+        if not self.header_complete and self._pending:
+            self.header_complete = self._header_line(self._pending)
+            self._pending = ""
+        if not self.file_path or not self.header_complete:
+            return None
+        return {"file_path": self.file_path, "action": self.action, "content": "".join(self._body).strip()}
+
+
 class DevelopmentAgent(BaseAgent):
     """
     Development agent for implementing code and creating files.
@@ -1161,7 +1217,13 @@ class DevelopmentAgent(BaseAgent):
         return "Unknown MCP error"
     
     def _determine_file_for_task(self, task: Dict, project_dir: str, goal: str, iteration_count: int) -> Optional[Dict]:
-        """Determine what file to create/modify for a given task, handling potential conflicts using memory."""
+        """
+        Determine what file to create/modify for a given task, handling potential conflicts using memory.
+        
+        The response is streamed: once its header names the file, the read-only
+        memory conflict lookup runs while the content is still arriving.
+        Nothing is written until the conflict handling below settles the path.
+        """
         if not self.llm_provider:
             self.logger.warning("LLM provider not available, cannot determine file for task.")
             return None
@@ -1206,6 +1268,10 @@ class DevelopmentAgent(BaseAgent):
                 self.logger.warning(f"Error retrieving context from memory for DevAgent: {e_mem_ctx}", exc_info=True)
                 context_summary_for_llm = "Error retrieving context from memory."
         
+        related_memory = self._related_memory_summary(task_name)
+        if related_memory:
+            context_summary_for_llm = f"{context_summary_for_llm}\n\n{related_memory}"
+        
         initial_file_prompt = f"""
         Determine the file to create or modify for this development task:
         
@@ -1238,11 +1304,20 @@ class DevelopmentAgent(BaseAgent):
         """
         
         try:
-            raw_llm_response = self.llm_provider.generate_text(initial_file_prompt, temperature=0.2)
-            parsed_info = self._parse_file_response(raw_llm_response, project_dir)
+            parser = FileResponseParser()
+            conflict_lookup: Optional[Future] = None
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="dev-prefetch") as prefetch:
+                stream = self.llm_provider.generate_text_stream(initial_file_prompt, temperature=0.2)
+                for chunk in stream:
+                    if parser.feed(chunk) and parser.file_path and self.memory_manager:
+                        conflict_lookup = prefetch.submit(
+                            self.memory_manager.get_file_conflict_context,
+                            self._memory_lookup_path(self._resolve_file_path(parser.file_path, project_dir), project_dir)
+                        )
+            parsed_info = self._file_info_from_parsed(parser.close(), project_dir)
 
             if not parsed_info:
-                self.logger.warning(f"Could not parse initial LLM response for task '{task_name}'. Response: {raw_llm_response[:200]}...")
+                self.logger.warning(f"Could not parse initial LLM response for task '{task_name}'. Response: {stream.text[:200]}...")
                 return None
 
             prospective_file_path_abs_or_rel = parsed_info["path"] 
@@ -1250,24 +1325,12 @@ class DevelopmentAgent(BaseAgent):
             prospective_content = parsed_info["content"]
 
             if self.memory_manager:
-                path_for_memory_lookup: str
-                abs_project_dir = os.path.abspath(project_dir)
-                
-                if os.path.isabs(prospective_file_path_abs_or_rel):
-                    if prospective_file_path_abs_or_rel.startswith(abs_project_dir):
-                        path_for_memory_lookup = os.path.relpath(prospective_file_path_abs_or_rel, abs_project_dir)
-                    else:
-                        self.logger.warning(f"Prospective path {prospective_file_path_abs_or_rel} is absolute but not in project dir {abs_project_dir}. Using basename for memory lookup.")
-                        path_for_memory_lookup = os.path.basename(prospective_file_path_abs_or_rel)
-                else:
-                    path_for_memory_lookup = prospective_file_path_abs_or_rel
-                
-                path_for_memory_lookup = path_for_memory_lookup.replace(os.sep, '/')
-                if path_for_memory_lookup.startswith("./"):
-                    path_for_memory_lookup = path_for_memory_lookup[2:]
-
+                path_for_memory_lookup = self._memory_lookup_path(prospective_file_path_abs_or_rel, project_dir)
                 self.logger.debug(f"Checking memory for file: '{path_for_memory_lookup}' (derived from: '{prospective_file_path_abs_or_rel}', project_dir: '{project_dir}')")
-                file_history = self.memory_manager.get_file_conflict_context(path_for_memory_lookup)
+                if conflict_lookup is not None:
+                    file_history = conflict_lookup.result()
+                else:
+                    file_history = self.memory_manager.get_file_conflict_context(path_for_memory_lookup)
 
                 if file_history.get("exists"):
                     if prospective_action == "create":
@@ -1364,48 +1427,76 @@ class DevelopmentAgent(BaseAgent):
             self.logger.error(f"Failed to determine file for task '{task_name}': {e}", exc_info=True)
             return None
     
-    def _parse_file_response(self, response: str, project_dir: str) -> Optional[Dict]:
-        """Parse the LLM response to extract file information."""
-        lines = response.strip().split('\n')
-        
-        file_path = None
-        action = "create"
-        content_start = -1
-        
-        for i, line in enumerate(lines):
-            if line.startswith("FILE_PATH:"):
-                file_path = line.replace("FILE_PATH:", "").strip()
-            elif line.startswith("ACTION:"):
-                action = line.replace("ACTION:", "").strip()
-            elif line.startswith("CONTENT:"):
-                content_start = i + 1
-                break
-        
-        if not file_path or content_start == -1:
-            return None
+    def _related_memory_summary(self, task_name: str, limit: int = 5) -> str:
+        """
+        Project memory most similar to the task, from the memory vector index.
         
-        # Extract content
-        content_lines = lines[content_start:]
-        content = '\n'.join(content_lines).strip()
+        Returns an empty string without a vector index: substring search on a
+        whole task description rarely matches anything.
+        """
+        if not self.memory_manager or getattr(self.memory_manager, "vector_index", None) is None or not task_name:
+            return ""
+        try:
+            results = self.memory_manager.search_relevant_context(task_name, limit=limit * 2)
+        except Exception as e:
+            self.logger.warning(f"Related memory search failed for task '{task_name}': {e}")
+            return ""
         
-        # Clean up any markdown formatting that might have slipped through
-        content = self._clean_file_content(content)
+        lines = []
+        for item in results:
+            # The index spans every project sharing the memory store
+            if self.memory_manager.project_id not in item.get("entity_name", ""):
+                continue
+            observations = "; ".join(obs[:200] for obs in item.get("observations", [])[:2])
+            lines.append(f"- {item.get('entity_type', '')} {item.get('entity_name', '')}: {observations}")
+            if len(lines) >= limit:
+                break
+        if not lines:
+            return ""
+        return "Related project memory (most relevant first):\n" + "\n".join(lines)
+    
+    def _memory_lookup_path(self, file_path: str, project_dir: str) -> str:
+        """The project-relative, forward-slash path memory records file operations under."""
+        abs_project_dir = os.path.abspath(project_dir)
         
-        # Make path absolute if relative
-        if not os.path.isabs(file_path):
-            if project_dir == "." or project_dir.startswith("./"):
-                full_path = file_path
+        if os.path.isabs(file_path):
+            if file_path.startswith(abs_project_dir):
+                lookup_path = os.path.relpath(file_path, abs_project_dir)
             else:
-                full_path = os.path.join(project_dir, file_path)
+                self.logger.warning(f"Prospective path {file_path} is absolute but not in project dir {abs_project_dir}. Using basename for memory lookup.")
+                lookup_path = os.path.basename(file_path)
         else:
-            full_path = file_path
+            lookup_path = file_path
+        
+        lookup_path = lookup_path.replace(os.sep, '/')
+        if lookup_path.startswith("./"):
+            lookup_path = lookup_path[2:]
+        return lookup_path
+    
+    def _parse_file_response(self, response: str, project_dir: str) -> Optional[Dict]:
+        """Parse the LLM response to extract file information."""
+        parser = FileResponseParser()
+        parser.feed(response)
+        return self._file_info_from_parsed(parser.close(), project_dir)
+    
+    def _file_info_from_parsed(self, parsed: Optional[Dict], project_dir: str) -> Optional[Dict]:
+        """Turn FileResponseParser output into file information with a resolved path and cleaned content."""
+        if not parsed:
+            return None
         
         return {
-            "path": full_path,
-            "content": content,
-            "action": action
+            "path": self._resolve_file_path(parsed["file_path"], project_dir),
+            # Clean up any markdown formatting that might have slipped through
+            "content": self._clean_file_content(parsed["content"]),
+            "action": parsed["action"]
         }
     
+    def _resolve_file_path(self, file_path: str, project_dir: str) -> str:
+        """Join a relative FILE_PATH onto the project directory."""
+        if os.path.isabs(file_path) or project_dir == "." or project_dir.startswith("./"):
+            return file_path
+        return os.path.join(project_dir, file_path)
+    
     def _clean_file_content(self, content: str) -> str:
         """Clean file content by removing markdown formatting and other artifacts."""
         lines = content.split('\n')
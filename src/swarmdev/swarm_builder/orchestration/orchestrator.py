@@ -130,6 +130,9 @@ class Orchestrator:
         if self.thread:
             self.thread.join(timeout=30)
         
+        if self.memory_manager:
+            self.memory_manager.close()
+        
         self.logger.info("Orchestrator stopped")
         return True
     
@@ -892,12 +895,20 @@ class Orchestrator:
                         # Update iteration count in context
                         context["iteration_count"] = next_iteration
                         
+                        # Iteration boundary: make this iteration's memory writes visible,
+                        # then roll up operations from iterations that are now old
+                        if self.memory_manager:
+                            self.memory_manager.flush()
+                            self.memory_manager.compact_memory(next_iteration)
+                        
                         # Create new workflow execution cycle
                         self._create_iteration_cycle(workflow_id, base_execution, context, next_iteration)
                         
                         self.logger.info(f"Started iteration cycle {next_iteration} for execution {base_execution}")
                     else:
                         self.logger.info(f"Analysis determined workflow is complete: {continuation_decision.get('reason', 'No reason provided')}")
+                        if self.memory_manager:
+                            self.memory_manager.flush()
                 
                 return
             
@@ -0,0 +1,262 @@
+"""
+Disk-backed cache of LLM responses.
+
+CachingLLMProvider wraps any LLMProviderInterface and answers generate_text
+and generate_chat calls it has seen before from a local SQLite file, so
+rerun builds, retries after crashes and repeated analysis prompts skip the
+network round trip. Entries are keyed on the provider class, model, the
+normalized generation parameters and a hash of the prompt or messages, and
+evicted least-recently-used once the cache outgrows its entry or byte limit.
+
+Only deterministic-enough calls are cached: temperature at or below
+max_temperature, or any call made with cache=True. cache=False skips the
+cache for one call (e.g. a retry that wants a fresh answer).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .llm_provider import LLMProviderInterface, LLMProviderWrapper, TextStream
+
+# Temperature the providers use when a call does not pass one
+DEFAULT_TEMPERATURE = 0.7
+
+
+class CachingLLMProvider(LLMProviderWrapper):
+    """LLM provider wrapper that serves repeated generations from a SQLite LRU cache."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            input_tokens INTEGER NOT NULL,
+            output_tokens INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used);
+    """
+
+    def __init__(self, provider: LLMProviderInterface, db_path: str, max_entries: int = 10000,
+                 max_bytes: int = 256 * 1024 * 1024, max_temperature: float = 0.3,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            provider: Provider to cache responses of
+            db_path: SQLite file holding the cache
+            max_entries: Entries kept before the least recently used are evicted
+            max_bytes: Total response size kept before the least recently used are evicted
+            max_temperature: Calls at or below this temperature are cached
+            logger: Logger instance
+        """
+        super().__init__(provider)
+        self.db_path = db_path
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.max_temperature = float(max_temperature)
+        self.logger = logger or logging.getLogger(__name__)
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+
+        self.cache_stats = {
+            "hits": 0,
+            "misses": 0,
+            "uncacheable": 0,
+            "evictions": 0,
+            "saved_input_tokens": 0,
+            "saved_output_tokens": 0,
+        }
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        return self._cached("text", prompt, kwargs, lambda: self.wrapped.generate_text(prompt, **kwargs))
+
+    def generate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return self._cached("chat", messages, kwargs, lambda: self.wrapped.generate_chat(messages, **kwargs))
+
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        # Shares entries with generate_text: a hit is replayed as one chunk, a miss is stored once streamed
+        key, hit = self._lookup("text", prompt, kwargs)
+        if hit is not None:
+            return TextStream(lambda stream: iter([hit]))
+        upstream = self.wrapped.generate_text_stream(prompt, **kwargs)
+        if key is None:
+            return upstream
+        usage_before = self._usage_snapshot()
+
+        def produce(stream: TextStream) -> Iterator[str]:
+            yield from upstream
+            stream.usage = upstream.usage
+            self._store(key, prompt, upstream.text, usage_before)
+
+        return TextStream(produce)
+
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        return await self._acached("text", prompt, kwargs, lambda: self.wrapped.agenerate_text(prompt, **kwargs))
+
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return await self._acached("chat", messages, kwargs, lambda: self.wrapped.agenerate_chat(messages, **kwargs))
+
+    def get_usage_metrics(self) -> Dict:
+        metrics = self.wrapped.get_usage_metrics()
+        with self._lock:
+            metrics["cache"] = dict(self.cache_stats, entries=self._entries, bytes=self._bytes)
+        return metrics
+
+    def _cached(self, kind: str, payload, kwargs: Dict, generate: Callable[[], str]) -> str:
+        """Serve from the cache or call generate() and store its response. Pops the cache kwarg."""
+        key, hit = self._lookup(kind, payload, kwargs)
+        if hit is not None:
+            return hit
+        usage_before = self._usage_snapshot()
+        response = generate()
+        if key is not None:
+            self._store(key, payload, response, usage_before)
+        return response
+
+    async def _acached(self, kind: str, payload, kwargs: Dict, generate: Callable[[], Awaitable[str]]) -> str:
+        """Async _cached: generate() returns the awaitable generation."""
+        key, hit = self._lookup(kind, payload, kwargs)
+        if hit is not None:
+            return hit
+        usage_before = self._usage_snapshot()
+        response = await generate()
+        if key is not None:
+            self._store(key, payload, response, usage_before)
+        return response
+
+    def _lookup(self, kind: str, payload, kwargs: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """(key, cached response); key is None when the call is not cacheable. Pops the cache kwarg."""
+        force = kwargs.pop("cache", None)
+        temperature = kwargs.get("temperature", DEFAULT_TEMPERATURE)
+        if force is False or (force is None and (temperature is None or temperature > self.max_temperature)):
+            with self._lock:
+                self.cache_stats["uncacheable"] += 1
+            return None, None
+        key = self.request_key(kind, payload, kwargs)
+        return key, self._get(key)
+
+    def _store(self, key: str, payload, response: str, usage_before: Tuple[int, Tuple[int, int]]):
+        if not isinstance(response, str):
+            return
+        calls_before, tokens_before = usage_before
+        calls_after, tokens_after = self._usage_snapshot()
+        if calls_after == calls_before + 1:
+            # Exactly this call was recorded, so the provider's token counts are its own
+            input_tokens, output_tokens = tokens_after[0] - tokens_before[0], tokens_after[1] - tokens_before[1]
+        else:
+            input_tokens = len(json.dumps(payload)) // 4
+            output_tokens = len(response) // 4
+        self._put(key, response, input_tokens, output_tokens)
+
+    def _usage_snapshot(self) -> Tuple[int, Tuple[int, int]]:
+        metrics = self.wrapped.get_usage_metrics()
+        return metrics.get("total_calls", 0), (metrics.get("total_input_tokens", 0), metrics.get("total_output_tokens", 0))
+
+    def _get(self, key: str) -> Optional[str]:
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT response, input_tokens, output_tokens FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.cache_stats["misses"] += 1
+                    return None
+                self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.cache_stats["hits"] += 1
+                self.cache_stats["saved_input_tokens"] += row[1]
+                self.cache_stats["saved_output_tokens"] += row[2]
+                return row[0]
+        except sqlite3.Error as e:
+            self.logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def _put(self, key: str, response: str, input_tokens: int, output_tokens: int):
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                previous = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, input_tokens, output_tokens, size, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, response, input_tokens, output_tokens, size, now, now)
+                )
+                if previous:
+                    self._bytes -= previous[0]
+                else:
+                    self._entries += 1
+                self._bytes += size
+                self._evict()
+        except sqlite3.Error as e:
+            self.logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self):
+        """Drop least recently used entries until both limits hold. Caller holds the lock and transaction."""
+        while self._entries > self.max_entries or self._bytes > self.max_bytes:
+            # Fetch candidates in chunks rather than one query per evicted entry
+            rows = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                break
+            dropped = []
+            for key, size in rows:
+                if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+                    break
+                dropped.append((key,))
+                self._entries -= 1
+                self._bytes -= size
+            self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", dropped)
+            self.cache_stats["evictions"] += len(dropped)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._entries, self._bytes = 0, 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_caching_provider(llm_provider: Optional[LLMProviderInterface], config: Optional[Dict],
+                            project_dir: str = ".", logger: Optional[logging.Logger] = None):
+    """
+    Wrap llm_provider in a CachingLLMProvider as configured by the llm config's
+    "cache" section, or return it unchanged when caching is disabled.
+    """
+    config = config or {}
+    logger = logger or logging.getLogger(__name__)
+    if llm_provider is None or not config.get("enabled", True):
+        return llm_provider
+
+    db_path = config.get("path") or os.path.join(project_dir, ".swarmdev", "llm_cache.db")
+    try:
+        provider = CachingLLMProvider(
+            llm_provider,
+            db_path,
+            max_entries=config.get("max_entries", 10000),
+            max_bytes=config.get("max_bytes", 256 * 1024 * 1024),
+            max_temperature=config.get("max_temperature", 0.3),
+            logger=logger
+        )
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"LLM response cache disabled: {e}")
+        return llm_provider
+    logger.info(f"LLM response cache at {db_path} ({provider._entries} entries)")
+    return provider
@@ -3,8 +3,92 @@ Utility module for LLM providers in the SwarmDev platform.
 This module provides the interface and implementations for LLM providers.
 """
 
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import json
+import threading
+import weakref
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+# Rough characters per token, for batching without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def _create_http_client(config: Optional[Dict] = None, async_client: bool = False):
+    """
+    httpx client with a tuned connection pool for the provider SDKs.
+    
+    Connections are kept alive between calls, and HTTP/2 is used when the
+    h2 package is installed. config holds the llm "http" settings.
+    """
+    import httpx  # Installed with the openai and anthropic SDKs
+    
+    config = config or {}
+    limits = httpx.Limits(
+        max_connections=config.get("max_connections", 100),
+        max_keepalive_connections=config.get("max_keepalive_connections", 20),
+        keepalive_expiry=config.get("keepalive_expiry", 30.0)
+    )
+    http2 = config.get("http2", True) and importlib.util.find_spec("h2") is not None
+    client_class = httpx.AsyncClient if async_client else httpx.Client
+    return client_class(limits=limits, http2=http2, timeout=config.get("timeout", 600.0))
+
+
+class _AsyncClientPool:
+    """
+    One async SDK client per event loop.
+    
+    Async HTTP connections belong to the loop that opened them, so a client
+    is created the first time each loop calls get() and reused from then on.
+    """
+    
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    def get(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = self._clients[loop] = self.factory()
+            return client
+
+
+class TextStream:
+    """
+    Iterator over the text chunks of a streamed generation.
+    
+    Once the stream is exhausted, usage holds the call's input_tokens and
+    output_tokens (None if the provider did not report them). text is
+    everything received so far.
+    """
+    
+    def __init__(self, produce: Callable[["TextStream"], Iterator[str]]):
+        """
+        Initialize the stream.
+        
+        Args:
+            produce: Generator function yielding text chunks; it may set usage on the stream it is given
+        """
+        self._produce = produce
+        self._parts: List[str] = []
+        self.usage: Optional[Dict[str, int]] = None
+    
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._produce(self):
+            if chunk:
+                self._parts.append(chunk)
+                yield chunk
+    
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
 
 
 class LLMProviderInterface(ABC):
@@ -52,6 +136,56 @@ class LLMProviderInterface(ABC):
         """
         pass
     
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        """
+        Generate text based on a prompt, yielding it in chunks as it arrives.
+        
+        The default implementation yields the whole generate_text result as
+        one chunk; providers with streaming APIs override it.
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            TextStream: Iterator of text chunks; usage is set at the end
+        """
+        def produce(stream: TextStream) -> Iterator[str]:
+            yield self.generate_text(prompt, **kwargs)
+        return TextStream(produce)
+    
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        """
+        Generate text based on a prompt without blocking the event loop.
+        
+        The default implementation runs generate_text on a worker thread;
+        providers with async SDK clients override it.
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            str: Generated text
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.generate_text, prompt, **kwargs))
+    
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Generate a response based on a conversation history without blocking the event loop.
+        
+        The default implementation runs generate_chat on a worker thread;
+        providers with async SDK clients override it.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            **kwargs: Additional provider-specific parameters
+            
+        Returns:
+            str: Generated response
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.generate_chat, messages, **kwargs))
+    
     @abstractmethod
     def generate_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
         """
@@ -59,10 +193,11 @@ class LLMProviderInterface(ABC):
         
         Args:
             texts: List of input texts
-            **kwargs: Additional provider-specific parameters
+            **kwargs: Additional provider-specific parameters; as_numpy=True
+                returns one contiguous float32 NumPy array instead of lists
             
         Returns:
-            List[List[float]]: List of embedding vectors
+            List[List[float]]: List of embedding vectors, in input order
         """
         pass
     
@@ -85,6 +220,62 @@ class LLMProviderInterface(ABC):
         """
         return self.usage_metrics.copy()
     
+    def _embed_in_batches(self, texts: List[str], embed_batch: Callable[[List[str]], Sequence],
+                          batch_size: int, max_batch_tokens: Optional[int] = None,
+                          concurrency: int = 1, as_numpy: bool = False):
+        """
+        Embed texts in batches and return the vectors in input order.
+        
+        Batches hold at most batch_size texts and, when max_batch_tokens is
+        set, at most that many (estimated) tokens. Up to concurrency batches
+        are sent at once.
+        
+        Args:
+            texts: Input texts
+            embed_batch: Embeds one batch, returning one vector per text
+            batch_size: Maximum texts per batch
+            max_batch_tokens: Maximum estimated tokens per batch
+            concurrency: Maximum batches in flight
+            as_numpy: Return a contiguous float32 NumPy array instead of lists
+            
+        Returns:
+            List[List[float]] or numpy.ndarray: One embedding vector per text
+        """
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = len(text) // CHARS_PER_TOKEN + 1
+            if current and (len(current) >= batch_size or (max_batch_tokens and current_tokens + tokens > max_batch_tokens)):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        
+        if concurrency > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as pool:
+                results = list(pool.map(embed_batch, batches))  # map keeps batch order
+        else:
+            results = [embed_batch(batch) for batch in batches]
+        
+        if as_numpy:
+            try:
+                import numpy as np
+            except ImportError:
+                raise ImportError("NumPy package not installed. Install with 'pip install numpy'.")
+            if not results:
+                return np.zeros((0, 0), dtype=np.float32)
+            blocks = [np.asarray(vectors, dtype=np.float32) for vectors in results]
+            embeddings = np.empty((len(texts), blocks[0].shape[1]), dtype=np.float32)
+            row = 0
+            for block in blocks:
+                embeddings[row:row + len(block)] = block
+                row += len(block)
+            return embeddings
+        return [vector.tolist() if hasattr(vector, "tolist") else list(vector) for vectors in results for vector in vectors]
+    
     def _update_usage_metrics(self, input_tokens: int, output_tokens: int, cost: float = 0.0):
         """
         Update usage metrics after an API call.
@@ -100,6 +291,83 @@ class LLMProviderInterface(ABC):
         self.usage_metrics["total_cost"] += cost
 
 
+class LLMProviderWrapper(LLMProviderInterface):
+    """
+    Base class for providers that wrap another provider.
+    
+    Every call is delegated to the wrapped provider; subclasses override the
+    methods they add behavior to (caching, rate limiting, ...). Attributes
+    such as model and client are read from and written to the wrapped provider.
+    """
+    
+    def __init__(self, provider: LLMProviderInterface):
+        """
+        Initialize the wrapper.
+        
+        Args:
+            provider: Provider to delegate to
+        """
+        super().__init__()
+        self.wrapped = provider
+    
+    @property
+    def model(self) -> str:
+        return self.wrapped.model
+    
+    @model.setter
+    def model(self, value: str):
+        self.wrapped.model = value
+    
+    def __getattr__(self, name):
+        # Only called for attributes not found on the wrapper itself
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+    
+    def unwrap(self) -> LLMProviderInterface:
+        """The innermost (concrete) provider."""
+        provider = self.wrapped
+        while isinstance(provider, LLMProviderWrapper):
+            provider = provider.wrapped
+        return provider
+    
+    def request_key(self, kind: str, payload, kwargs: Dict) -> str:
+        """Hash identifying a call by provider, model, kind, generation parameters and prompt or messages."""
+        params = {k: v for k, v in sorted(kwargs.items()) if v is not None and k != "model"}
+        material = json.dumps({
+            "provider": type(self.unwrap()).__name__,
+            "model": kwargs.get("model") or self.model,
+            "kind": kind,
+            "params": params,
+            "payload": hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest(),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        return self.wrapped.generate_text(prompt, **kwargs)
+    
+    def generate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return self.wrapped.generate_chat(messages, **kwargs)
+    
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        return self.wrapped.generate_text_stream(prompt, **kwargs)
+    
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        return await self.wrapped.agenerate_text(prompt, **kwargs)
+    
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return await self.wrapped.agenerate_chat(messages, **kwargs)
+    
+    def generate_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return self.wrapped.generate_embeddings(texts, **kwargs)
+    
+    def get_capabilities(self) -> Dict[str, bool]:
+        return self.wrapped.get_capabilities()
+    
+    def get_usage_metrics(self) -> Dict:
+        return self.wrapped.get_usage_metrics()
+
+
 class OpenAIProvider(LLMProviderInterface):
     """
     OpenAI LLM provider implementation with model-aware parameter handling.
@@ -125,8 +393,16 @@ class OpenAIProvider(LLMProviderInterface):
             raise ImportError("OpenAI package not installed. Install with 'pip install openai'.")
         
         self.model = model
-        self.client = openai.OpenAI(api_key=api_key)
         self.config = kwargs
+        # sdk_max_retries=0 leaves retrying to a wrapping RateLimitedLLMProvider
+        client_options = {}
+        if kwargs.get("sdk_max_retries") is not None:
+            client_options["max_retries"] = kwargs["sdk_max_retries"]
+        self.client = openai.OpenAI(api_key=api_key, **client_options)
+        self._async_clients = _AsyncClientPool(lambda: openai.AsyncOpenAI(
+            api_key=api_key, http_client=_create_http_client(self.config.get("http"), async_client=True),
+            **client_options
+        ))
 
     def _get_model_params(self, model: str, **kwargs) -> Dict:
         """
@@ -268,17 +544,8 @@ class OpenAIProvider(LLMProviderInterface):
         # Get model-appropriate parameters
         params = self._get_model_params(model, **kwargs)
         
-        # Convert messages to OpenAI format if needed
-        openai_messages = []
-        for msg in messages:
-            role = msg["role"]
-            # Map roles to OpenAI's expected format
-            if role == "agent":
-                role = "assistant"
-            openai_messages.append({"role": role, "content": msg["content"]})
-        
         response = self.client.chat.completions.create(
-            messages=openai_messages,
+            messages=self._to_openai_messages(messages),
             **params
         )
         
@@ -291,29 +558,120 @@ class OpenAIProvider(LLMProviderInterface):
         
         return response.choices[0].message.content
     
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        """
+        Stream text from OpenAI's chat completions API (see generate_text).
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            TextStream: Iterator of text chunks; usage is set at the end
+        """
+        model = kwargs.get("model", self.model)
+        params = self._get_model_params(model, **kwargs)
+        
+        def produce(stream: TextStream) -> Iterator[str]:
+            response = self.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+                stream_options={"include_usage": True},
+                **params
+            )
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, "usage", None):
+                    # Sent in a final chunk without choices
+                    stream.usage = {"input_tokens": chunk.usage.prompt_tokens, "output_tokens": chunk.usage.completion_tokens}
+            if stream.usage:
+                self._update_usage_metrics(**stream.usage)
+        
+        return TextStream(produce)
+    
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        """
+        Generate text with the async OpenAI client (see generate_text).
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            str: Generated text
+        """
+        return await self.agenerate_chat([{"role": "user", "content": prompt}], **kwargs)
+    
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Generate a chat response with the async OpenAI client (see generate_chat).
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            str: Generated response
+        """
+        model = kwargs.get("model", self.model)
+        params = self._get_model_params(model, **kwargs)
+        
+        response = await self._async_clients.get().chat.completions.create(
+            messages=self._to_openai_messages(messages),
+            **params
+        )
+        
+        if hasattr(response, 'usage'):
+            self._update_usage_metrics(
+                input_tokens=response.usage.prompt_tokens,
+                output_tokens=response.usage.completion_tokens
+            )
+        
+        return response.choices[0].message.content
+    
+    @staticmethod
+    def _to_openai_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Convert messages to OpenAI format, mapping the 'agent' role to 'assistant'."""
+        openai_messages = []
+        for msg in messages:
+            role = msg["role"]
+            if role == "agent":
+                role = "assistant"
+            openai_messages.append({"role": role, "content": msg["content"]})
+        return openai_messages
+    
     def generate_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
         """
         Generate embeddings for a list of texts using OpenAI's embedding API.
         
+        Texts are sent as lists, in batches of up to embedding_batch_size texts
+        and embedding_max_batch_tokens estimated tokens, with up to
+        embedding_concurrency requests in flight.
+        
         Args:
             texts: List of input texts
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters (embedding_model, embedding_batch_size,
+                embedding_max_batch_tokens, embedding_concurrency, as_numpy)
             
         Returns:
             List[List[float]]: List of embedding vectors
         """
         model = kwargs.get("embedding_model", "text-embedding-3-small")
         
-        # Process in batches if needed
-        embeddings = []
-        for text in texts:
-            response = self.client.embeddings.create(
-                input=text,
-                model=model
-            )
-            embeddings.append(response.data[0].embedding)
-        
-        return embeddings
+        def embed_batch(batch: List[str]) -> List[List[float]]:
+            response = self.client.embeddings.create(input=batch, model=model)
+            # The API reports each embedding's input index; don't rely on response order
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        
+        return self._embed_in_batches(
+            texts,
+            embed_batch,
+            batch_size=kwargs.get("embedding_batch_size", self.config.get("embedding_batch_size", 512)),
+            max_batch_tokens=kwargs.get("embedding_max_batch_tokens", self.config.get("embedding_max_batch_tokens", 250000)),
+            concurrency=kwargs.get("embedding_concurrency", self.config.get("embedding_concurrency", 4)),
+            as_numpy=kwargs.get("as_numpy", False)
+        )
     
     def get_capabilities(self) -> Dict[str, bool]:
         """
@@ -368,8 +726,16 @@ class AnthropicProvider(LLMProviderInterface):
             raise ImportError("Anthropic package not installed. Install with 'pip install anthropic'.")
         
         self.model = model
-        self.client = anthropic.Anthropic(api_key=api_key)
         self.config = kwargs
+        # sdk_max_retries=0 leaves retrying to a wrapping RateLimitedLLMProvider
+        client_options = {}
+        if kwargs.get("sdk_max_retries") is not None:
+            client_options["max_retries"] = kwargs["sdk_max_retries"]
+        self.client = anthropic.Anthropic(api_key=api_key, **client_options)
+        self._async_clients = _AsyncClientPool(lambda: anthropic.AsyncAnthropic(
+            api_key=api_key, http_client=_create_http_client(self.config.get("http"), async_client=True),
+            **client_options
+        ))
 
     def _get_model_params(self, model: str, **kwargs) -> Dict:
         """
@@ -533,21 +899,80 @@ class AnthropicProvider(LLMProviderInterface):
         # Get model-appropriate parameters
         params = self._get_model_params(model, **kwargs)
         
-        # Convert messages to Anthropic format
+        response = self.client.messages.create(
+            messages=self._to_anthropic_messages(messages),
+            **params
+        )
+        
+        return response.content[0].text
+    
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        """
+        Stream text from Anthropic's messages API (see generate_text).
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            TextStream: Iterator of text chunks; usage is set at the end
+        """
+        model = kwargs.get("model", self.model)
+        params = self._get_model_params(model, **kwargs)
+        
+        def produce(stream: TextStream) -> Iterator[str]:
+            with self.client.messages.stream(messages=[{"role": "user", "content": prompt}], **params) as response:
+                yield from response.text_stream
+                usage = response.get_final_message().usage
+            stream.usage = {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens}
+            self._update_usage_metrics(**stream.usage)
+        
+        return TextStream(produce)
+    
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        """
+        Generate text with the async Anthropic client (see generate_text).
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            str: Generated text
+        """
+        return await self.agenerate_chat([{"role": "user", "content": prompt}], **kwargs)
+    
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Generate a chat response with the async Anthropic client (see generate_chat).
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            str: Generated response
+        """
+        model = kwargs.get("model", self.model)
+        params = self._get_model_params(model, **kwargs)
+        
+        response = await self._async_clients.get().messages.create(
+            messages=self._to_anthropic_messages(messages),
+            **params
+        )
+        
+        return response.content[0].text
+    
+    @staticmethod
+    def _to_anthropic_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Convert messages to Anthropic format, mapping the 'agent' role to 'assistant'."""
         anthropic_messages = []
         for msg in messages:
             role = msg["role"]
-            # Map roles to Anthropic's expected format
             if role == "agent":
                 role = "assistant"
             anthropic_messages.append({"role": role, "content": msg["content"]})
-        
-        response = self.client.messages.create(
-            messages=anthropic_messages,
-            **params
-        )
-        
-        return response.content[0].text
+        return anthropic_messages
     
     def generate_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
         """
@@ -558,21 +983,21 @@ class AnthropicProvider(LLMProviderInterface):
         
         Args:
             texts: List of input texts
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters (embedding_model, embedding_batch_size, as_numpy)
             
         Returns:
             List[List[float]]: List of embedding vectors
         """
-        try:
-            from sentence_transformers import SentenceTransformer
-        except ImportError:
-            raise ImportError("SentenceTransformer package not installed. Install with 'pip install sentence-transformers'.")
+        model = _load_sentence_transformer(kwargs.get("embedding_model", "all-MiniLM-L6-v2"))
+        batch_size = kwargs.get("embedding_batch_size", self.config.get("embedding_batch_size", 64))
         
-        model_name = kwargs.get("embedding_model", "all-MiniLM-L6-v2")
-        model = SentenceTransformer(model_name)
-        
-        embeddings = model.encode(texts).tolist()
-        return embeddings
+        # The model runs locally and batches internally, so one pass over all texts
+        return self._embed_in_batches(
+            texts,
+            lambda batch: model.encode(batch, batch_size=batch_size, convert_to_numpy=True),
+            batch_size=max(len(texts), 1),
+            as_numpy=kwargs.get("as_numpy", False)
+        )
     
     def get_capabilities(self) -> Dict[str, bool]:
         """
@@ -639,6 +1064,18 @@ class GoogleProvider(LLMProviderInterface):
         genai.configure(api_key=api_key)
         self.client = genai.GenerativeModel(model)
         self.config = kwargs
+        # Model clients by name, shared by threads and event loops instead of replacing self.client
+        self._clients = {model: self.client}
+        self._clients_lock = threading.Lock()
+    
+    def _get_client(self, model_name: str):
+        """The GenerativeModel for model_name, created once."""
+        with self._clients_lock:
+            client = self._clients.get(model_name)
+            if client is None:
+                import google.generativeai as genai
+                client = self._clients[model_name] = genai.GenerativeModel(model_name)
+            return client
 
     def _get_model_params(self, model: str, **kwargs) -> Dict:
         """
@@ -745,41 +1182,20 @@ class GoogleProvider(LLMProviderInterface):
         """
         # Use the configured model unless overridden
         model_name = kwargs.get("model", self.model)
-        
-        # If model changed, create new client
-        if model_name != self.model:
-            import google.generativeai as genai
-            self.client = genai.GenerativeModel(model_name)
+        client = self._get_client(model_name)
         
         # Get model-appropriate parameters
         params = self._get_model_params(model_name, **kwargs)
         
         try:
-            # Create generation config from parameters
-            import google.generativeai as genai
-            generation_config = genai.types.GenerationConfig(**params)
-            
-            response = self.client.generate_content(
-                prompt,
-                generation_config=generation_config
-            )
-            
-            return response.text
+            response = client.generate_content(prompt, generation_config=self._generation_config(params))
         except Exception as e:
             # Handle the specific attribute error for max_output_tokens
-            if "max_output_tokens" in str(e):
-                # Fallback: try without max_output_tokens
-                fallback_params = {k: v for k, v in params.items() if k != "max_output_tokens"}
-                import google.generativeai as genai
-                generation_config = genai.types.GenerationConfig(**fallback_params)
-                
-                response = self.client.generate_content(
-                    prompt,
-                    generation_config=generation_config
-                )
-                return response.text
-            else:
-                raise e
+            if "max_output_tokens" not in str(e):
+                raise
+            # Fallback: try without max_output_tokens
+            response = client.generate_content(prompt, generation_config=self._generation_config(params, fallback=True))
+        return response.text
     
     def generate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """
@@ -794,105 +1210,182 @@ class GoogleProvider(LLMProviderInterface):
         """
         # Use the configured model unless overridden
         model_name = kwargs.get("model", self.model)
-        
-        # If model changed, create new client
-        if model_name != self.model:
-            import google.generativeai as genai
-            self.client = genai.GenerativeModel(model_name)
+        client = self._get_client(model_name)
         
         # Get model-appropriate parameters
         params = self._get_model_params(model_name, **kwargs)
+        google_messages = self._to_google_messages(messages)
         
-        # Convert messages to Google format
+        def send(generation_config):
+            if len(google_messages) > 1:
+                # Use chat session for multi-turn conversation
+                chat = client.start_chat(history=google_messages[:-1])
+                return chat.send_message(google_messages[-1]["parts"][0], generation_config=generation_config)
+            # Single message, use direct generation
+            return client.generate_content(google_messages[0]["parts"][0], generation_config=generation_config)
+        
+        try:
+            response = send(self._generation_config(params))
+        except Exception as e:
+            # Handle the specific attribute error for max_output_tokens
+            if "max_output_tokens" not in str(e):
+                raise
+            response = send(self._generation_config(params, fallback=True))
+        return response.text
+    
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        """
+        Stream text from Google's Gemini API (see generate_text).
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            TextStream: Iterator of text chunks; usage is set at the end
+        """
+        model_name = kwargs.get("model", self.model)
+        params = self._get_model_params(model_name, **kwargs)
+        
+        def produce(stream: TextStream) -> Iterator[str]:
+            client = self._get_client(model_name)
+            try:
+                response = client.generate_content(prompt, generation_config=self._generation_config(params), stream=True)
+            except Exception as e:
+                if "max_output_tokens" not in str(e):
+                    raise
+                response = client.generate_content(prompt, generation_config=self._generation_config(params, fallback=True), stream=True)
+            for chunk in response:
+                try:
+                    yield chunk.text
+                except ValueError:
+                    continue  # Chunks without text parts (e.g. safety metadata)
+            metadata = getattr(response, "usage_metadata", None)
+            if metadata:
+                stream.usage = {"input_tokens": metadata.prompt_token_count, "output_tokens": metadata.candidates_token_count}
+                self._update_usage_metrics(**stream.usage)
+        
+        return TextStream(produce)
+    
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        """
+        Generate text with Gemini's async API (see generate_text).
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            str: Generated text
+        """
+        model_name = kwargs.get("model", self.model)
+        client = self._get_client(model_name)
+        params = self._get_model_params(model_name, **kwargs)
+        
+        try:
+            response = await client.generate_content_async(prompt, generation_config=self._generation_config(params))
+        except Exception as e:
+            if "max_output_tokens" not in str(e):
+                raise
+            response = await client.generate_content_async(prompt, generation_config=self._generation_config(params, fallback=True))
+        return response.text
+    
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Generate a chat response with Gemini's async API (see generate_chat).
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            
+        Returns:
+            str: Generated response
+        """
+        model_name = kwargs.get("model", self.model)
+        client = self._get_client(model_name)
+        params = self._get_model_params(model_name, **kwargs)
+        google_messages = self._to_google_messages(messages)
+        
+        async def send(generation_config):
+            if len(google_messages) > 1:
+                chat = client.start_chat(history=google_messages[:-1])
+                return await chat.send_message_async(google_messages[-1]["parts"][0], generation_config=generation_config)
+            return await client.generate_content_async(google_messages[0]["parts"][0], generation_config=generation_config)
+        
+        try:
+            response = await send(self._generation_config(params))
+        except Exception as e:
+            if "max_output_tokens" not in str(e):
+                raise
+            response = await send(self._generation_config(params, fallback=True))
+        return response.text
+    
+    @staticmethod
+    def _generation_config(params: Dict, fallback: bool = False):
+        """GenerationConfig from model parameters; fallback drops max_output_tokens for SDKs that reject it."""
+        import google.generativeai as genai
+        if fallback:
+            params = {k: v for k, v in params.items() if k != "max_output_tokens"}
+        return genai.types.GenerationConfig(**params)
+    
+    @staticmethod
+    def _to_google_messages(messages: List[Dict[str, str]]) -> List[Dict]:
+        """Convert messages to Google format, mapping the 'agent' role to 'model'."""
         google_messages = []
         for msg in messages:
             role = msg["role"]
-            # Map roles to Google's expected format
             if role == "agent":
                 role = "model"
-            elif role == "user":
-                role = "user"
-            
             google_messages.append({
                 "role": role,
                 "parts": [msg["content"]]
             })
-        
-        try:
-            # Create generation config from parameters
-            import google.generativeai as genai
-            generation_config = genai.types.GenerationConfig(**params)
-            
-            # Start a chat session for multi-turn conversation
-            if len(google_messages) > 1:
-                # Use chat session for multi-turn conversation
-                chat = self.client.start_chat(history=google_messages[:-1])
-                response = chat.send_message(
-                    google_messages[-1]["parts"][0],
-                    generation_config=generation_config
-                )
-            else:
-                # Single message, use direct generation
-                response = self.client.generate_content(
-                    google_messages[0]["parts"][0],
-                    generation_config=generation_config
-                )
-            
-            return response.text
-        except Exception as e:
-            # Handle the specific attribute error for max_output_tokens
-            if "max_output_tokens" in str(e):
-                # Fallback: try without max_output_tokens
-                fallback_params = {k: v for k, v in params.items() if k != "max_output_tokens"}
-                import google.generativeai as genai
-                generation_config = genai.types.GenerationConfig(**fallback_params)
-                
-                if len(google_messages) > 1:
-                    chat = self.client.start_chat(history=google_messages[:-1])
-                    response = chat.send_message(
-                        google_messages[-1]["parts"][0],
-                        generation_config=generation_config
-                    )
-                else:
-                    response = self.client.generate_content(
-                        google_messages[0]["parts"][0],
-                        generation_config=generation_config
-                    )
-                return response.text
-            else:
-                raise e
+        return google_messages
     
     def generate_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
         """
         Generate embeddings for a list of texts using Google's embedding API.
         
+        Texts are sent as lists, in batches of up to embedding_batch_size texts
+        (the API accepts at most 100 per request), with up to
+        embedding_concurrency requests in flight.
+        
         Args:
             texts: List of input texts
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters (embedding_batch_size, embedding_concurrency, as_numpy)
             
         Returns:
             List[List[float]]: List of embedding vectors
         """
+        as_numpy = kwargs.get("as_numpy", False)
         try:
             import google.generativeai as genai
             
-            embeddings = []
-            for text in texts:
+            def embed_batch(batch: List[str]) -> List[List[float]]:
                 result = genai.embed_content(
                     model="models/text-embedding-004",  # Google's latest embedding model
-                    content=text
+                    content=batch
                 )
-                embeddings.append(result['embedding'])
+                return result['embedding']
             
-            return embeddings
+            return self._embed_in_batches(
+                texts,
+                embed_batch,
+                batch_size=min(kwargs.get("embedding_batch_size", self.config.get("embedding_batch_size", 100)), 100),
+                max_batch_tokens=kwargs.get("embedding_max_batch_tokens", self.config.get("embedding_max_batch_tokens")),
+                concurrency=kwargs.get("embedding_concurrency", self.config.get("embedding_concurrency", 4)),
+                as_numpy=as_numpy
+            )
         except Exception as e:
             # Fallback to sentence transformers if native embeddings fail
             try:
-                from sentence_transformers import SentenceTransformer
-                model_name = kwargs.get("embedding_model", "all-MiniLM-L6-v2")
-                model = SentenceTransformer(model_name)
-                embeddings = model.encode(texts).tolist()
-                return embeddings
+                model = _load_sentence_transformer(kwargs.get("embedding_model", "all-MiniLM-L6-v2"))
+                return self._embed_in_batches(
+                    texts,
+                    lambda batch: model.encode(batch, convert_to_numpy=True),
+                    batch_size=max(len(texts), 1),
+                    as_numpy=as_numpy
+                )
             except ImportError:
                 raise ImportError("Neither Google embeddings nor SentenceTransformer available. Install with 'pip install sentence-transformers'.")
     
@@ -925,6 +1418,21 @@ class GoogleProvider(LLMProviderInterface):
             }
 
 
+_sentence_transformers: Dict[str, object] = {}
+
+
+def _load_sentence_transformer(model_name: str):
+    """Load a SentenceTransformer model once per process; loading takes seconds."""
+    model = _sentence_transformers.get(model_name)
+    if model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("SentenceTransformer package not installed. Install with 'pip install sentence-transformers'.")
+        model = _sentence_transformers[model_name] = SentenceTransformer(model_name)
+    return model
+
+
 class ProviderRegistry:
     """
     Registry for LLM providers.
@@ -988,12 +1496,13 @@ class ProviderRegistry:
         
         return None
     
-    def discover_providers(self, plugins_dir: Optional[str] = None):
+    def discover_providers(self, plugins_dir: Optional[str] = None, **provider_kwargs):
         """
         Discover and register providers from plugins directory.
         
         Args:
             plugins_dir: Directory containing provider plugins
+            **provider_kwargs: Configuration passed to every provider created
         """
         # This is a placeholder implementation
         # In a real implementation, this would scan the plugins directory
@@ -1006,16 +1515,16 @@ class ProviderRegistry:
             # Register OpenAI provider if API key is available
             openai_api_key = os.environ.get("OPENAI_API_KEY")
             if openai_api_key:
-                self.register_provider("openai", OpenAIProvider(api_key=openai_api_key), is_default=True)
+                self.register_provider("openai", OpenAIProvider(api_key=openai_api_key, **provider_kwargs), is_default=True)
             
             # Register Anthropic provider if API key is available
             anthropic_api_key = os.environ.get("ANTHROPIC_API_KEY")
             if anthropic_api_key:
-                self.register_provider("anthropic", AnthropicProvider(api_key=anthropic_api_key))
+                self.register_provider("anthropic", AnthropicProvider(api_key=anthropic_api_key, **provider_kwargs))
             
             # Register Google provider if API key is available
             google_api_key = os.environ.get("GOOGLE_API_KEY")
             if google_api_key:
-                self.register_provider("google", GoogleProvider(api_key=google_api_key))
+                self.register_provider("google", GoogleProvider(api_key=google_api_key, **provider_kwargs))
         except Exception as e:
             print(f"Error discovering providers: {e}")
@@ -0,0 +1,404 @@
+"""
+Client-side rate limiting and retries for LLM providers.
+
+Every (provider, model) pair gets one RateLimitScheduler per process,
+shared by all agents and builds using it. The scheduler holds two token
+buckets, one for requests per minute and one for tokens per minute (token
+counts are estimated from prompt length), and admits waiting callers round
+robin, one queue per calling thread, so a busy agent cannot starve the others.
+
+RateLimitedLLMProvider sends each call through its scheduler and retries
+rate-limit (429), overload and 5xx errors and dropped connections. It
+honors the server's Retry-After, during which the whole (provider, model)
+pauses, and otherwise backs off exponentially with full jitter.
+"""
+
+import asyncio
+import email.utils
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .llm_provider import CHARS_PER_TOKEN, LLMProviderInterface, LLMProviderWrapper, TextStream
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Exception class names of the provider SDKs for dropped connections and timeouts
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "RemoteProtocolError",
+    "ServiceUnavailable", "DeadlineExceeded", "ResourceExhausted", "InternalServerError",
+}
+
+
+class TokenBucket:
+    """Continuously refilling bucket of per_minute units; 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount units are available."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        # A request larger than the bucket waits for a full bucket rather than forever
+        missing = min(amount, self.capacity) - self._level
+        return max(0.0, missing * 60.0 / self.capacity)
+
+    def take(self, amount: float, now: float):
+        """Consume amount units (the level may go negative); negative amounts give units back."""
+        if self.capacity <= 0:
+            return
+        self._refill(now)
+        self._level = min(self.capacity, self._level - amount)
+
+
+class RateLimitScheduler:
+    """Admits calls to one (provider, model) within its request and token rates."""
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.name = name
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        # caller -> tickets waiting; served round robin in insertion order
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._paused_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "queue_wait_seconds": 0.0,
+            "max_queue_wait_seconds": 0.0,
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "connection_errors": 0,
+            "failures": 0,
+        }
+
+    def acquire(self, tokens: int, caller: Optional[str] = None) -> float:
+        """Block until this caller's turn and the rates admit the call. Returns the seconds waited."""
+        caller = caller or threading.current_thread().name
+        ticket = object()
+        start = time.monotonic()
+        throttled = False
+        with self._cond:
+            self._queues.setdefault(caller, deque()).append(ticket)
+            admitted = False
+            try:
+                while True:
+                    if self._head() is ticket:
+                        now = time.monotonic()
+                        wait = max(self._paused_until - now, self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+                        if wait <= 0:
+                            self._requests.take(1, now)
+                            self._tokens.take(tokens, now)
+                            admitted = True
+                            self._release(caller, ticket)
+                            break
+                        throttled = True
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                # Interrupted while waiting (e.g. KeyboardInterrupt): a ticket left
+                # in its queue would block everyone behind it
+                if not admitted:
+                    self._release(caller, ticket)
+            waited = time.monotonic() - start
+            self.stats["requests"] += 1
+            self.stats["throttled"] += int(throttled)
+            self.stats["queue_wait_seconds"] += waited
+            self.stats["max_queue_wait_seconds"] = max(self.stats["max_queue_wait_seconds"], waited)
+        return waited
+
+    def _head(self):
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _release(self, caller: str, ticket: object):
+        """Drop one of the caller's tickets and move the caller to the back of the rotation."""
+        queue = self._queues.pop(caller, None)
+        if queue is None:
+            return
+        if ticket in queue:
+            queue.remove(ticket)
+        if queue:
+            self._queues[caller] = queue
+        self._cond.notify_all()
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once a call's real size is known."""
+        with self._cond:
+            self._tokens.take(actual_tokens - estimated_tokens, time.monotonic())
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. for a Retry-After the server sent."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def record(self, key: str, count: int = 1):
+        with self._cond:
+            self.stats[key] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats["waiting"] = sum(len(q) for q in self._queues.values())
+        stats["queue_wait_seconds"] = round(stats["queue_wait_seconds"], 3)
+        stats["max_queue_wait_seconds"] = round(stats["max_queue_wait_seconds"], 3)
+        return stats
+
+
+_schedulers: Dict[Tuple[str, str], RateLimitScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider_name: str, model: str, requests_per_minute: float = 0,
+                  tokens_per_minute: float = 0) -> RateLimitScheduler:
+    """The process-wide scheduler for (provider_name, model), created with the given rates on first use."""
+    key = (provider_name, model)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = RateLimitScheduler(f"{provider_name}/{model}", requests_per_minute, tokens_per_minute)
+        return scheduler
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for attribute in ("status_code", "code", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the error response's retry-after-ms or Retry-After header."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """The stats key for a retryable error (rate_limited, server_errors, connection_errors), or None."""
+    status = _status_code(error)
+    if status == 429 or type(error).__name__ == "ResourceExhausted":
+        return "rate_limited"
+    if status in RETRYABLE_STATUS_CODES:
+        return "server_errors"
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return "connection_errors"
+    return None
+
+
+class RateLimitedLLMProvider(LLMProviderWrapper):
+    """LLM provider wrapper that paces calls through a shared scheduler and retries transient errors."""
+
+    def __init__(self, provider: LLMProviderInterface, requests_per_minute: float = 500,
+                 tokens_per_minute: float = 200000, max_retries: int = 5, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, model_limits: Optional[Dict[str, Dict]] = None,
+                 embedding_requests_per_minute: float = 3000, embedding_tokens_per_minute: float = 1000000,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            provider: Provider to pace
+            requests_per_minute: Default request rate per model (0 for unlimited)
+            tokens_per_minute: Default token rate per model (0 for unlimited)
+            max_retries: Retries of a failed call before its error is raised
+            backoff_base: First backoff delay in seconds, doubled per retry
+            backoff_max: Longest backoff delay in seconds
+            model_limits: Per-model requests_per_minute/tokens_per_minute overrides
+            embedding_requests_per_minute: Default request rate per embedding model (0 for unlimited)
+            embedding_tokens_per_minute: Default token rate per embedding model (0 for unlimited)
+            logger: Logger instance
+        """
+        super().__init__(provider)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.model_limits = model_limits or {}
+        self.embedding_requests_per_minute = embedding_requests_per_minute
+        self.embedding_tokens_per_minute = embedding_tokens_per_minute
+        self.logger = logger or logging.getLogger(__name__)
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        return self._call(prompt, kwargs, lambda: self.wrapped.generate_text(prompt, **kwargs))
+
+    def generate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return self._call(messages, kwargs, lambda: self.wrapped.generate_chat(messages, **kwargs))
+
+    def generate_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return self._call(texts, kwargs, lambda: self.wrapped.generate_embeddings(texts, **kwargs), embeddings=True)
+
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        scheduler = self._scheduler(kwargs)
+        estimate = self._estimate_tokens(prompt, kwargs)
+
+        def produce(stream: TextStream) -> Iterator[str]:
+            for attempt in range(self.max_retries + 1):
+                scheduler.acquire(estimate)
+                upstream = self.wrapped.generate_text_stream(prompt, **kwargs)
+                started = False
+                try:
+                    for chunk in upstream:
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    # Once text has been handed out the call cannot be replayed
+                    delay = None if started else self._retry_delay(scheduler, e, attempt)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    continue
+                stream.usage = upstream.usage
+                scheduler.settle(estimate, self._estimate_tokens(prompt, kwargs, upstream.text))
+                return
+
+        return TextStream(produce)
+
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        return await self._acall(prompt, kwargs, lambda: self.wrapped.agenerate_text(prompt, **kwargs))
+
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return await self._acall(messages, kwargs, lambda: self.wrapped.agenerate_chat(messages, **kwargs))
+
+    def get_usage_metrics(self) -> Dict:
+        metrics = self.wrapped.get_usage_metrics()
+        with _schedulers_lock:
+            provider_name = type(self.unwrap()).__name__
+            schedulers = [s for (name, _), s in _schedulers.items() if name == provider_name]
+        metrics["rate_limit"] = {s.name: s.snapshot() for s in schedulers}
+        return metrics
+
+    def _scheduler(self, kwargs: Dict, embeddings: bool = False) -> RateLimitScheduler:
+        if embeddings:
+            # Embedding models have limits of their own; without embedding_model the provider uses its default
+            model = kwargs.get("embedding_model") or "default-embedding"
+            requests_per_minute, tokens_per_minute = self.embedding_requests_per_minute, self.embedding_tokens_per_minute
+        else:
+            model = kwargs.get("model") or self.model
+            requests_per_minute, tokens_per_minute = self.requests_per_minute, self.tokens_per_minute
+        limits = self.model_limits.get(model, {})
+        return get_scheduler(
+            type(self.unwrap()).__name__,
+            model,
+            limits.get("requests_per_minute", requests_per_minute),
+            limits.get("tokens_per_minute", tokens_per_minute),
+        )
+
+    @staticmethod
+    def _estimate_tokens(payload, kwargs: Dict, response: Any = None) -> int:
+        """Tokens a call counts against the rate limit: prompt plus response (or max_tokens until it is known)."""
+        text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        tokens = len(text) // CHARS_PER_TOKEN + 1
+        if isinstance(response, str):
+            tokens += len(response) // CHARS_PER_TOKEN
+        elif response is None:
+            tokens += int(kwargs.get("max_tokens") or 0)
+        return tokens
+
+    def _retry_delay(self, scheduler: RateLimitScheduler, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after error, or None if it should be raised."""
+        kind = classify_error(error)
+        if kind is None:
+            return None
+        scheduler.record(kind)
+        if attempt >= self.max_retries:
+            scheduler.record("failures")
+            return None
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.backoff_base)
+            scheduler.pause(retry_after)
+        else:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        scheduler.record("retries")
+        self.logger.warning(f"LLM call to {scheduler.name} failed ({kind}: {error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def _call(self, payload, kwargs: Dict, generate: Callable[[], Any], embeddings: bool = False):
+        scheduler = self._scheduler(kwargs, embeddings)
+        estimate = self._estimate_tokens(payload, kwargs)
+        for attempt in range(self.max_retries + 1):
+            scheduler.acquire(estimate)
+            try:
+                response = generate()
+            except Exception as e:
+                delay = self._retry_delay(scheduler, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            scheduler.settle(estimate, self._estimate_tokens(payload, kwargs, "" if embeddings else response))
+            return response
+
+    async def _acall(self, payload, kwargs: Dict, generate: Callable[[], Awaitable[Any]]):
+        """Async _call: waits for the scheduler on a worker thread so the event loop keeps running."""
+        scheduler = self._scheduler(kwargs)
+        estimate = self._estimate_tokens(payload, kwargs)
+        caller = threading.current_thread().name
+        for attempt in range(self.max_retries + 1):
+            await asyncio.get_running_loop().run_in_executor(None, scheduler.acquire, estimate, caller)
+            try:
+                response = await generate()
+            except Exception as e:
+                delay = self._retry_delay(scheduler, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            scheduler.settle(estimate, self._estimate_tokens(payload, kwargs, response))
+            return response
+
+
+def create_rate_limited_provider(llm_provider: Optional[LLMProviderInterface], config: Optional[Dict],
+                                 logger: Optional[logging.Logger] = None):
+    """
+    Wrap llm_provider in a RateLimitedLLMProvider as configured by the llm
+    config's "rate_limit" section, or return it unchanged when disabled.
+    """
+    config = config or {}
+    if llm_provider is None or not config.get("enabled", True):
+        return llm_provider
+    return RateLimitedLLMProvider(
+        llm_provider,
+        requests_per_minute=config.get("requests_per_minute", 500),
+        tokens_per_minute=config.get("tokens_per_minute", 200000),
+        max_retries=config.get("max_retries", 5),
+        backoff_base=config.get("backoff_base", 1.0),
+        backoff_max=config.get("backoff_max", 60.0),
+        model_limits=config.get("models"),
+        embedding_requests_per_minute=config.get("embedding_requests_per_minute", 3000),
+        embedding_tokens_per_minute=config.get("embedding_tokens_per_minute", 1000000),
+        logger=logger
+    )
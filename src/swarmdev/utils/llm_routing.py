@@ -0,0 +1,400 @@
+"""
+Latency-aware routing, hedged requests and failover across LLM providers.
+
+HedgedLLMProvider holds several routes (a provider, optionally pinned to a
+model) and sends each generation to the healthy route with the best recent
+latency and error rate. If that route has not answered after its own p95
+latency, a hedged duplicate goes to the next route: the first answer wins
+and the other request is cancelled (async) or left to finish unread (sync,
+where a running SDK call cannot be interrupted). A failed call fails over
+to the next route if the error is transient (rate limit, overload, 5xx or
+a dropped connection); other errors are raised at once, since another
+route would reject the same request. A route that keeps failing is taken
+out of rotation for a cooldown period.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .llm_provider import LLMProviderInterface, LLMProviderWrapper, TextStream
+from .llm_rate_limit import classify_error
+
+# Provider class of each "provider" name a route can give
+PROVIDER_CLASS_NAMES = {"openai": "OpenAIProvider", "anthropic": "AnthropicProvider", "google": "GoogleProvider"}
+
+
+class LLMRoute:
+    """One provider (and optional model) to route to, with its live latency and error statistics."""
+
+    def __init__(self, name: str, provider: LLMProviderInterface, model: Optional[str] = None,
+                 window: int = 50, failure_threshold: int = 3, cooldown: float = 30.0):
+        """
+        Initialize the route.
+
+        Args:
+            name: Route name in metrics and logs
+            provider: Provider to call
+            model: Model to request instead of the provider's own
+            window: Recent calls latency and error rate are computed over
+            failure_threshold: Consecutive failures that take the route out of rotation
+            cooldown: Seconds a failing route stays out of rotation
+        """
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "wins": 0, "failures": 0, "cancelled": 0}
+
+    def call_kwargs(self, kwargs: Dict, primary: bool) -> Dict:
+        kwargs = dict(kwargs)
+        if self.model:
+            kwargs["model"] = self.model
+        elif not primary:
+            # A model named by the caller belongs to the primary provider
+            kwargs.pop("model", None)
+        return kwargs
+
+    def record_call(self):
+        with self._lock:
+            self.stats["calls"] += 1
+
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def healthy(self) -> bool:
+        with self._lock:
+            return time.monotonic() >= self._down_until
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+            self.stats["wins"] += 1
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            self.stats["failures"] += 1
+            if self._consecutive_failures >= self.failure_threshold:
+                self._down_until = time.monotonic() + self.cooldown
+
+    def record_cancelled(self, elapsed: float):
+        """A hedge race was lost: it took at least elapsed seconds."""
+        with self._lock:
+            self._latencies.append(elapsed)
+            self.stats["cancelled"] += 1
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100.0))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return (self._outcomes.count(False) / len(self._outcomes)) if self._outcomes else 0.0
+
+    def score(self, error_penalty: float) -> float:
+        """Lower is better: median latency inflated by the error rate; unmeasured routes rank last."""
+        median = self.percentile(50)
+        if median is None:
+            return float("inf")
+        return median * (1.0 + error_penalty * self.error_rate())
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        with self._lock:
+            stats = dict(self.stats, healthy=time.monotonic() >= self._down_until)
+        stats.update(
+            p50_seconds=round(p50, 3) if p50 is not None else None,
+            p95_seconds=round(p95, 3) if p95 is not None else None,
+            error_rate=round(self.error_rate(), 3),
+        )
+        return stats
+
+
+class HedgedLLMProvider(LLMProviderWrapper):
+    """
+    Composite provider routing generations across LLMRoutes with hedging and failover.
+
+    The first route is the primary: attributes, embeddings and capabilities
+    come from it, since embeddings from different models are not comparable.
+    """
+
+    def __init__(self, routes: List[LLMRoute], hedge_percentile: float = 95, initial_hedge_delay: float = 30.0,
+                 min_hedge_delay: float = 1.0, max_hedge_delay: float = 120.0, min_samples: int = 5,
+                 error_penalty: float = 4.0, max_concurrency: int = 32, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the composite provider.
+
+        Args:
+            routes: Routes in order of preference until latencies are measured; the first is the primary
+            hedge_percentile: Latency percentile of the chosen route after which a hedge is sent
+            initial_hedge_delay: Hedge delay while a route has fewer than min_samples latencies
+            min_hedge_delay: Shortest hedge delay in seconds
+            max_hedge_delay: Longest hedge delay in seconds
+            min_samples: Latencies needed before a route's percentile is trusted
+            error_penalty: How strongly the error rate worsens a route's score
+            max_concurrency: Blocking calls (including hedges) running at once
+            logger: Logger instance
+        """
+        if not routes:
+            raise ValueError("HedgedLLMProvider needs at least one route")
+        super().__init__(routes[0].provider)
+        self.routes = routes
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.error_penalty = error_penalty
+        self.logger = logger or logging.getLogger(__name__)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self.routing_stats = {"hedges": 0, "hedge_wins": 0, "failovers": 0}
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        return self._route(lambda route, kw: route.provider.generate_text(prompt, **kw), kwargs)
+
+    def generate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return self._route(lambda route, kw: route.provider.generate_chat(messages, **kw), kwargs)
+
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        return await self._aroute(lambda route, kw: route.provider.agenerate_text(prompt, **kw), kwargs)
+
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return await self._aroute(lambda route, kw: route.provider.agenerate_chat(messages, **kw), kwargs)
+
+    def generate_text_stream(self, prompt: str, **kwargs) -> TextStream:
+        # Streams are not hedged (both would have to be read); they fail over until the first chunk
+        def produce(stream: TextStream):
+            error: Optional[Exception] = None
+            for route in self._ranked_routes():
+                start = time.monotonic()
+                upstream = route.provider.generate_text_stream(prompt, **route.call_kwargs(kwargs, route is self.routes[0]))
+                started = False
+                route.record_call()
+                try:
+                    for chunk in upstream:
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    transient = classify_error(e) is not None
+                    if transient:
+                        route.record_failure(time.monotonic() - start)
+                    if started or not transient:
+                        raise
+                    error = e
+                    self._count("failovers")
+                    continue
+                route.record_success(time.monotonic() - start)
+                stream.usage = upstream.usage
+                return
+            raise error
+
+        return TextStream(produce)
+
+    def get_usage_metrics(self) -> Dict:
+        metrics: Dict[str, Any] = {}
+        seen = set()
+        for route in self.routes:
+            if id(route.provider) in seen:
+                continue
+            seen.add(id(route.provider))
+            for key, value in route.provider.get_usage_metrics().items():
+                if isinstance(value, dict):
+                    metrics.setdefault(key, {}).update(value)
+                elif isinstance(value, (int, float)):
+                    metrics[key] = metrics.get(key, 0) + value
+        with self._lock:
+            metrics["routing"] = dict(self.routing_stats, routes={route.name: route.snapshot() for route in self.routes})
+        return metrics
+
+    def _count(self, key: str):
+        with self._lock:
+            self.routing_stats[key] += 1
+
+    def _ranked_routes(self) -> List[LLMRoute]:
+        """Healthy routes best first (ties keep configured order), then the unhealthy ones as a last resort."""
+        ranked = sorted(self.routes, key=lambda route: route.score(self.error_penalty))
+        return [r for r in ranked if r.healthy()] + [r for r in ranked if not r.healthy()]
+
+    @staticmethod
+    def _abandon(running: Dict[Future, tuple]):
+        """Cancel the other requests of a race that is decided; running ones finish unread."""
+        for future, (route, start) in running.items():
+            future.cancel()
+            route.record_cancelled(time.monotonic() - start)
+
+    def _hedge_delay(self, route: LLMRoute) -> float:
+        if route.samples() < self.min_samples:
+            return self.initial_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, route.percentile(self.hedge_percentile)))
+
+    def _route(self, call: Callable[[LLMRoute, Dict], Any], kwargs: Dict):
+        pending = self._ranked_routes()
+        running: Dict[Future, tuple] = {}
+        hedged = False
+        error: Optional[Exception] = None
+
+        def launch():
+            route = pending.pop(0)
+            route.record_call()
+            future = self._pool.submit(call, route, route.call_kwargs(kwargs, route is self.routes[0]))
+            running[future] = (route, time.monotonic())
+
+        launch()
+        while running:
+            first_route = next(iter(running.values()))[0]
+            timeout = self._hedge_delay(first_route) if not hedged and pending and len(running) == 1 else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The route is slower than usual: race a duplicate on the next one
+                hedged = True
+                self._count("hedges")
+                self.logger.debug(f"Hedging LLM request on {pending[0].name} after {timeout:.1f}s on {first_route.name}")
+                launch()
+                continue
+            for future in done:
+                route, start = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if classify_error(e) is None:
+                        self._abandon(running)
+                        raise
+                    route.record_failure(time.monotonic() - start)
+                    error = e
+                    continue
+                route.record_success(time.monotonic() - start)
+                self._abandon(running)
+                if hedged and route is not first_route:
+                    self._count("hedge_wins")
+                return result
+            if not running and pending:
+                self._count("failovers")
+                self.logger.warning(f"LLM request failed on {route.name} ({error}); failing over to {pending[0].name}")
+                launch()
+        raise error
+
+    async def _aroute(self, call: Callable[[LLMRoute, Dict], Awaitable[Any]], kwargs: Dict):
+        """Async _route: the losing request of a hedge is cancelled."""
+        pending = self._ranked_routes()
+        running: Dict[asyncio.Task, tuple] = {}
+        hedged = False
+        error: Optional[Exception] = None
+
+        def launch():
+            route = pending.pop(0)
+            route.record_call()
+            task = asyncio.ensure_future(call(route, route.call_kwargs(kwargs, route is self.routes[0])))
+            running[task] = (route, time.monotonic())
+
+        launch()
+        try:
+            while running:
+                first_route = next(iter(running.values()))[0]
+                timeout = self._hedge_delay(first_route) if not hedged and pending and len(running) == 1 else None
+                done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    self._count("hedges")
+                    self.logger.debug(f"Hedging LLM request on {pending[0].name} after {timeout:.1f}s on {first_route.name}")
+                    launch()
+                    continue
+                for task in done:
+                    route, start = running.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        if classify_error(error) is None:
+                            raise error
+                        route.record_failure(time.monotonic() - start)
+                        continue
+                    route.record_success(time.monotonic() - start)
+                    if hedged and route is not first_route:
+                        self._count("hedge_wins")
+                    return task.result()
+                if not running and pending:
+                    self._count("failovers")
+                    self.logger.warning(f"LLM request failed on {route.name} ({error}); failing over to {pending[0].name}")
+                    launch()
+            raise error
+        finally:
+            for task, (route, start) in running.items():
+                task.cancel()
+                route.record_cancelled(time.monotonic() - start)
+
+
+def create_hedged_provider(llm_provider: Optional[LLMProviderInterface], config: Optional[Dict],
+                           provider_factory: Callable[[str, Optional[str]], LLMProviderInterface],
+                           wrap_route: Optional[Callable[[LLMProviderInterface], LLMProviderInterface]] = None,
+                           logger: Optional[logging.Logger] = None):
+    """
+    Build a HedgedLLMProvider from the llm config's "hedging" section, with
+    llm_provider as the primary route, or return llm_provider (passed through
+    wrap_route) when hedging is disabled or no extra route can be created.
+
+    Each entry of config["routes"] names a "provider" and optionally a
+    "model"; provider_factory(provider, model) creates providers other than
+    the primary's, and wrap_route wraps each provider (e.g. in a rate limiter).
+    """
+    config = config or {}
+    logger = logger or logging.getLogger(__name__)
+    wrap_route = wrap_route or (lambda provider: provider)
+    if llm_provider is None or not config.get("enabled", False):
+        return wrap_route(llm_provider) if llm_provider is not None else None
+
+    options = {
+        "window": config.get("window", 50),
+        "failure_threshold": config.get("failure_threshold", 3),
+        "cooldown": config.get("cooldown", 30.0),
+    }
+    primary_name = type(llm_provider).__name__
+    providers = {primary_name: wrap_route(llm_provider)}
+    routes = [LLMRoute(f"{primary_name}/{llm_provider.model}", providers[primary_name], **options)]
+    for entry in config.get("routes", []):
+        name, model = entry.get("provider"), entry.get("model")
+        # Routes to a provider class that is already set up share its instance
+        key = PROVIDER_CLASS_NAMES.get(name)
+        if key not in providers:
+            try:
+                provider = provider_factory(name, model)
+            except (ValueError, ImportError) as e:
+                logger.warning(f"Skipping LLM route {name}/{model or 'default'}: {e}")
+                continue
+            key = type(provider).__name__
+            if key not in providers:
+                providers[key] = wrap_route(provider)
+        routes.append(LLMRoute(f"{key}/{model or providers[key].model}", providers[key], model=model, **options))
+
+    if len(routes) == 1:
+        logger.warning("LLM hedging enabled but no extra routes are available; using the primary provider only")
+        return routes[0].provider
+    logger.info(f"LLM routing across {', '.join(route.name for route in routes)}")
+    return HedgedLLMProvider(
+        routes,
+        hedge_percentile=config.get("hedge_percentile", 95),
+        initial_hedge_delay=config.get("initial_hedge_delay", 30.0),
+        min_hedge_delay=config.get("min_hedge_delay", 1.0),
+        max_hedge_delay=config.get("max_hedge_delay", 120.0),
+        min_samples=config.get("min_samples", 5),
+        error_penalty=config.get("error_penalty", 4.0),
+        max_concurrency=config.get("max_concurrency", 32),
+        logger=logger
+    )
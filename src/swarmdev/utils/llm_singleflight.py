@@ -0,0 +1,138 @@
+"""
+Coalescing of identical in-flight LLM requests.
+
+When agents or concurrent builds send the same prompt with the same model
+and parameters while an identical call is still running, the later callers
+wait for that call and share its response (or its error) instead of making
+another upstream request.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .llm_provider import LLMProviderInterface, LLMProviderWrapper
+
+
+class _InFlightCall:
+    """A running upstream call and the outcome its waiters will share."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class CoalescingLLMProvider(LLMProviderWrapper):
+    """LLM provider wrapper that shares one upstream call among concurrent identical requests."""
+
+    def __init__(self, provider: LLMProviderInterface, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the wrapper.
+
+        Args:
+            provider: Provider to coalesce requests to
+            logger: Logger instance
+        """
+        super().__init__(provider)
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, _InFlightCall] = {}
+        # Async calls are coalesced per event loop, since their futures belong to one loop
+        self._async_in_flight: Dict[tuple, asyncio.Future] = {}
+        self.coalescing_stats = {"upstream": 0, "coalesced": 0}
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        return self._coalesced("text", prompt, kwargs, lambda: self.wrapped.generate_text(prompt, **kwargs))
+
+    def generate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return self._coalesced("chat", messages, kwargs, lambda: self.wrapped.generate_chat(messages, **kwargs))
+
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        return await self._acoalesced("text", prompt, kwargs, lambda: self.wrapped.agenerate_text(prompt, **kwargs))
+
+    async def agenerate_chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return await self._acoalesced("chat", messages, kwargs, lambda: self.wrapped.agenerate_chat(messages, **kwargs))
+
+    def get_usage_metrics(self) -> Dict:
+        metrics = self.wrapped.get_usage_metrics()
+        with self._lock:
+            metrics["coalescing"] = dict(self.coalescing_stats, in_flight=len(self._in_flight) + len(self._async_in_flight))
+        return metrics
+
+    def _coalesced(self, kind: str, payload, kwargs: Dict, generate: Callable[[], str]) -> str:
+        key = self.request_key(kind, payload, kwargs)
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _InFlightCall()
+                self.coalescing_stats["upstream"] += 1
+            else:
+                self.coalescing_stats["coalesced"] += 1
+
+        if not leader:
+            self.logger.debug(f"Coalesced LLM {kind} request with an identical one in flight")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = generate()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    async def _acoalesced(self, kind: str, payload, kwargs: Dict, generate: Callable[[], Awaitable[str]]) -> str:
+        loop = asyncio.get_running_loop()
+        key = (id(loop), self.request_key(kind, payload, kwargs))
+        while True:
+            with self._lock:
+                future = self._async_in_flight.get(key)
+                if future is None:
+                    future = self._async_in_flight[key] = loop.create_future()
+                    self.coalescing_stats["upstream"] += 1
+                    break
+                self.coalescing_stats["coalesced"] += 1
+            try:
+                # Shielded, so a waiter's own cancellation does not cancel the shared call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leading caller was cancelled; take over the request
+
+        try:
+            result = await generate()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved: the leader raises it itself even without waiters
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._async_in_flight[key]
+
+
+def create_coalescing_provider(llm_provider: Optional[LLMProviderInterface], config: Optional[Dict],
+                               logger: Optional[logging.Logger] = None):
+    """
+    Wrap llm_provider in a CoalescingLLMProvider unless the llm config's
+    "coalesce" section disables it.
+    """
+    config = config or {}
+    if llm_provider is None or not config.get("enabled", True):
+        return llm_provider
+    return CoalescingLLMProvider(llm_provider, logger=logger)
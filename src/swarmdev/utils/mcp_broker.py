@@ -0,0 +1,215 @@
+"""
+Local MCP broker daemon for the SwarmDev platform.
+
+The broker owns MCP server processes and exposes them over a Unix socket
+with the same JSON-RPC surface, so successive and concurrent swarmdev
+invocations on the same host reuse warm servers instead of spawning and
+tearing down their own containers. Started with ``swarmdev mcp-daemon``.
+"""
+
+import hashlib
+import json
+import os
+import socketserver
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from .mcp_manager import MCPManager
+from .mcp_native_fallback import NativeFilesystemFallback
+from .mcp_transport import MCPBrokerClient
+
+DEFAULT_BROKER_SOCKET = os.path.join("~", ".swarmdev", "mcp-broker.sock")
+BROKER_SOCKET_ENV = "SWARMDEV_MCP_BROKER_SOCKET"
+
+
+def get_broker_socket_path(settings: Optional[Dict] = None) -> str:
+    """Resolve the broker socket path from the environment, settings or default."""
+    settings = settings or {}
+    path = os.environ.get(BROKER_SOCKET_ENV) or settings.get("socketPath") or DEFAULT_BROKER_SOCKET
+    return os.path.abspath(os.path.expanduser(path))
+
+
+def broker_server_key(server_id: str, spec: Dict) -> str:
+    """
+    Key a server by its id and launch spec.
+
+    Commands and specs embed the project directory (volume mounts, cwd,
+    project_dir), so two projects using "filesystem" or "shell" must not
+    share a process.
+    """
+    digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    return f"{server_id}-{digest}"
+
+
+class _BrokerRequestHandler(socketserver.StreamRequestHandler):
+    """Serve newline-delimited JSON-RPC requests from one client connection."""
+
+    def handle(self):
+        broker: "MCPBroker" = self.server.broker
+        while True:
+            try:
+                line = self.rfile.readline(broker.max_request_bytes + 1)
+            except OSError:
+                return
+            if not line:
+                return
+            if len(line) > broker.max_request_bytes:
+                broker.logger.error("Dropping broker client: request exceeds size limit")
+                return
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                response = broker.handle_request(request)
+            except ValueError as e:
+                response = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": f"Parse error: {e}"}}
+
+            try:
+                self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                return
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MCPBroker:
+    """
+    Long-lived owner of MCP server processes shared across swarmdev runs.
+
+    Clients send the launch spec of the server they want with every call;
+    the broker registers it on first use and forwards the call through its
+    own MCPManager, so caching, stderr draining and framing all apply.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, state_dir: Optional[str] = None):
+        self.socket_path = socket_path or get_broker_socket_path()
+        self.state_dir = state_dir or os.path.expanduser("~")
+        self.max_request_bytes = 64 * 1024 * 1024
+        self.started_at = time.time()
+
+        # The broker must never try to connect to itself
+        self.manager = MCPManager(
+            {"enabled": True, "mcpSettings": {"broker": {"enabled": False}}},
+            self.state_dir
+        )
+        # Servers are registered on demand from client launch specs, under
+        # their keys; the broker's own home directory is no project to fall back to
+        self.manager.servers.clear()
+        self.manager.register_native_fallback("filesystem", None)
+        self.logger = self.manager.mcp_logger
+
+        self._register_lock = threading.Lock()
+        self._server: Optional[_ThreadingUnixServer] = None
+
+    def ensure_server(self, server_id: str, spec: Dict) -> str:
+        """Register a server for the given launch spec if needed and return its key."""
+        key = broker_server_key(server_id, spec)
+        with self._register_lock:
+            if key not in self.manager.servers:
+                self.manager._register_server(key, dict(spec))
+                if key in self.manager.servers:
+                    self.manager.servers[key]["status"] = "ready"
+                    # Cache invalidation and native fallbacks go by the logical id
+                    self.manager.logical_server_ids[key] = server_id
+                    if server_id == "filesystem" and spec.get("project_dir"):
+                        self.manager.register_native_fallback(key, NativeFilesystemFallback(spec["project_dir"]))
+                    self.logger.info(f"Broker registered '{server_id}' as {key}")
+        return key
+
+    def handle_request(self, request: Dict) -> Dict:
+        """Dispatch one broker JSON-RPC request."""
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+
+        try:
+            if method == "broker/call":
+                key = self.ensure_server(params["server"], params.get("spec", {}))
+                if key not in self.manager.servers:
+                    return self._error(request_id, -32001, f"Broker could not register server '{params['server']}'")
+                result = self.manager.call_tool(
+                    key, params["method"], params.get("params", {}), params.get("timeout")
+                )
+                return {"jsonrpc": "2.0", "id": request_id, "result": result}
+            if method == "broker/ping":
+                return {"jsonrpc": "2.0", "id": request_id, "result": {"pid": os.getpid()}}
+            if method == "broker/status":
+                return {"jsonrpc": "2.0", "id": request_id, "result": self.get_status()}
+            if method == "broker/shutdown":
+                threading.Thread(target=self.stop, daemon=True).start()
+                return {"jsonrpc": "2.0", "id": request_id, "result": {"stopping": True}}
+            return self._error(request_id, -32601, f"Method not found: {method}")
+        except KeyError as e:
+            return self._error(request_id, -32602, f"Missing parameter: {e}")
+        except Exception as e:
+            self.logger.error(f"Broker request {method} failed: {e}", exc_info=True)
+            return self._error(request_id, -32603, f"Broker error: {e}")
+
+    @staticmethod
+    def _error(request_id, code: int, message: str) -> Dict:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+    def get_status(self) -> Dict:
+        """Summarize broker uptime, servers and call metrics."""
+        servers = {
+            key: {
+                "status": info.get("status"),
+                "pid": info.get("pid"),
+                "usage_count": info.get("usage_count", 0),
+                "last_used": info.get("last_used"),
+            }
+            for key, info in list(self.manager.servers.items())
+        }
+        return {
+            "pid": os.getpid(),
+            "socket": self.socket_path,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "uptime_seconds": time.time() - self.started_at,
+            "servers": servers,
+            "metrics": self.manager.get_metrics(),
+            "health": self.manager.get_health_report(),
+        }
+
+    def serve_forever(self):
+        """Bind the Unix socket and serve until stop() is called."""
+        socket_dir = os.path.dirname(self.socket_path)
+        os.makedirs(socket_dir, exist_ok=True)
+
+        if os.path.exists(self.socket_path):
+            if MCPBrokerClient(self.socket_path).ping():
+                raise RuntimeError(f"An MCP broker is already running on {self.socket_path}")
+            os.unlink(self.socket_path)  # Stale socket from a crashed broker
+
+        old_umask = os.umask(0o177)  # Socket is private to the current user
+        try:
+            self._server = _ThreadingUnixServer(self.socket_path, _BrokerRequestHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.broker = self
+
+        self.logger.info(f"MCP broker listening on {self.socket_path} (PID: {os.getpid()})")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._cleanup()
+
+    def stop(self):
+        """Stop serving; serve_forever() returns and servers are shut down."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _cleanup(self):
+        if self._server is not None:
+            self._server.server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self.manager.shutdown()
+        self.logger.info("MCP broker stopped")
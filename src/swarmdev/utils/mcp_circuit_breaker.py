@@ -0,0 +1,165 @@
+"""
+Per-server circuit breakers for MCP calls.
+
+A server whose container is wedged makes every call wait for the full
+request timeout. The breaker watches the health metrics the MCP metrics
+collector already keeps and, once a server looks unhealthy, rejects calls
+immediately for a cool-down period. After that a single probe call is let
+through; if it succeeds the circuit closes again.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .mcp_metrics import MCPToolHealth
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Call statuses (as recorded by the metrics collector) that show the server
+# is responsive. "error" is a well-formed JSON-RPC error reply.
+RESPONSIVE_STATUSES = {"success", "error"}
+
+
+@dataclass
+class CircuitBreakerPolicy:
+    """Thresholds for opening and re-closing a circuit."""
+    enabled: bool = True
+    failure_threshold: int = 3
+    min_health_score: float = 0.3
+    min_calls: int = 5
+    open_seconds: float = 15.0
+    max_open_seconds: float = 300.0
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "CircuitBreakerPolicy":
+        """Build a policy from the camelCase mcpSettings.circuitBreaker dict."""
+        base = cls()
+        return cls(
+            enabled=bool(config.get("enabled", base.enabled)),
+            failure_threshold=int(config.get("failureThreshold", base.failure_threshold)),
+            min_health_score=float(config.get("minHealthScore", base.min_health_score)),
+            min_calls=int(config.get("minCalls", base.min_calls)),
+            open_seconds=float(config.get("openSeconds", base.open_seconds)),
+            max_open_seconds=float(config.get("maxOpenSeconds", base.max_open_seconds)),
+        )
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one MCP server.
+
+    The circuit opens when the server's consecutive failures reach
+    ``failure_threshold``, or when its health score over the calls made
+    since the circuit last closed drops below ``min_health_score``. The
+    score is windowed so that a recovered server is not held back by
+    failures from before its last recovery. Each failed probe doubles the
+    cool-down, up to ``max_open_seconds``.
+    """
+
+    def __init__(self, server_id: str, policy: CircuitBreakerPolicy):
+        self.server_id = server_id
+        self.policy = policy
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.open_until = 0.0
+        self.open_seconds = policy.open_seconds
+        self.last_reason: Optional[str] = None
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        # Health counters at the moment the circuit last closed
+        self._baseline_calls = 0
+        self._baseline_responsive = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the server now. Moves open to half-open when due."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now >= self.open_until:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            # A probe that never reported back (e.g. the caller crashed) is
+            # abandoned after the longest cool-down
+            if self.state == HALF_OPEN and (
+                not self._probe_in_flight or now - self._probe_started > self.policy.max_open_seconds
+            ):
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 when not open)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.open_until - time.monotonic())
+
+    def record_result(self, status: str, health: Optional[MCPToolHealth]) -> bool:
+        """
+        Update the breaker with the outcome of a call.
+
+        Returns True if this result opened the circuit.
+        """
+        responsive = status in RESPONSIVE_STATUSES
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if responsive:
+                    self._close(health)
+                    return False
+                self.open_seconds = min(self.open_seconds * 2, self.policy.max_open_seconds)
+                self._open(f"probe failed ({status})")
+                return True
+
+            if self.state != CLOSED or responsive or health is None:
+                return False
+
+            if health.consecutive_failures >= self.policy.failure_threshold:
+                self._open(f"{health.consecutive_failures} consecutive failures")
+                return True
+
+            window_calls = health.total_calls - self._baseline_calls
+            if window_calls >= self.policy.min_calls:
+                responsive_calls = health.successful_calls + health.error_calls - self._baseline_responsive
+                score = responsive_calls / window_calls - min(health.consecutive_failures * 0.1, 0.5)
+                if score < self.policy.min_health_score:
+                    self._open(f"health score {score:.2f} over last {window_calls} calls")
+                    return True
+            return False
+
+    def _open(self, reason: str):
+        self.state = OPEN
+        self.opened_at = time.time()
+        self.open_until = time.monotonic() + self.open_seconds
+        self.last_reason = reason
+        self.times_opened += 1
+
+    def _close(self, health: Optional[MCPToolHealth]):
+        self.state = CLOSED
+        self.open_seconds = self.policy.open_seconds
+        self.opened_at = None
+        if health is not None:
+            self._baseline_calls = health.total_calls
+            self._baseline_responsive = health.successful_calls + health.error_calls
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State summary for health reports."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "retry_after": round(self.retry_after(), 1),
+                "last_reason": self.last_reason,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls,
+            }
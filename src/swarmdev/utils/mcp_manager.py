@@ -18,6 +18,22 @@ import fcntl
 
 # Import enhanced MCP logging and metrics
 from .mcp_metrics import get_mcp_logger, get_metrics_collector, MCPLogger, MCPMetricsCollector
+from .mcp_response_cache import MCPResponseCache
+from .mcp_circuit_breaker import CircuitBreaker, CircuitBreakerPolicy, CLOSED, HALF_OPEN
+from .mcp_native_fallback import NativeFallback, NativeFilesystemFallback
+from .mcp_transport import (
+    StderrDrainer, JSONRPCFrameReader, FrameTooLargeError, MCPBrokerClient,
+    StreamableHTTPTransport, MCPSessionExpiredError
+)
+
+# Servers whose behavior depends on the project they run for: the broker
+# keeps a separate process per project and runs shell/git in the project directory
+PROJECT_SCOPED_SERVERS = {"filesystem", "shell", "git"}
+CWD_DEPENDENT_SERVERS = {"shell", "git"}
+
+# Error codes of failures on our side of a brokered call, by circuit status;
+# other error codes were reported by the server itself
+BROKER_ERROR_STATUS = {-32000: "timeout", -32001: "failure", -32002: "failure", -32003: "failure", -32004: "failure"}
 
 
 class MCPManager:
@@ -54,13 +70,65 @@ class MCPManager:
         self.retry_count = settings.get("retryCount", 3)
         self.retry_delay = settings.get("retryDelay", 1.0)
         
+        # Read-through cache for idempotent tool calls (read_file, list_files, fetch, ...)
+        self.response_cache = MCPResponseCache(settings.get("responseCache", {}))
+        
+        # Server stderr is drained continuously so chatty servers never block on it
+        self.stderr_buffer_bytes = int(settings.get("stderrBufferKiB", 64)) * 1024
+        self.stderr_error_tail_bytes = int(settings.get("stderrErrorTailBytes", 2048))
+        self._stderr_drainers: Dict[int, StderrDrainer] = {}  # pid -> drainer
+        
+        # Stdout framing: bounded message size, one reusable buffer per process
+        self.max_message_bytes = int(settings.get("maxMessageBytes", 32 * 1024 * 1024))
+        self._frame_readers: Dict[int, JSONRPCFrameReader] = {}  # pid -> reader
+        self._io_locks: Dict[str, threading.Lock] = {}  # server_id -> request/response lock
+        
+        # Idle reaping and a cap on concurrently running servers (0 disables either)
+        self.idle_timeout = float(settings.get("idleTimeout", 300))
+        self.max_live_servers = int(settings.get("maxLiveServers", 0))
+        self._reaper_thread: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        
+        # Pre-spawned standby processes for servers configured with "standby": true,
+        # and per-server locks so reconnecting one server never blocks the others
+        self._standby: Dict[str, subprocess.Popen] = {}
+        self._standby_pending = set()
+        self._reconnect_locks: Dict[str, threading.RLock] = {}
+        self._shutting_down = False
+        
+        # Servers configured with "url" are reached over streamable HTTP through
+        # one pooled keep-alive client each, instead of a spawned process
+        self.http_max_connections = int(settings.get("httpMaxConnections", 16))
+        self._http_transports: Dict[str, StreamableHTTPTransport] = {}
+        
+        # Optional local broker daemon (swarmdev mcp-daemon) that owns warm servers
+        self.broker_settings = settings.get("broker", {})
+        self._broker: Optional[MCPBrokerClient] = None
+        # Servers registered under another id (the broker's per-spec keys), by the
+        # logical id that cache invalidation rules and native fallbacks know them by
+        self.logical_server_ids: Dict[str, str] = {}
+        
+        # Per-server circuit breakers; while a circuit is open calls go to the
+        # server's "fallback" replica or a native handler, or fail fast
+        breaker_settings = settings.get("circuitBreaker", {})
+        self.circuit_policy = CircuitBreakerPolicy.from_config(breaker_settings)
+        self.native_fallbacks_enabled = breaker_settings.get("nativeFallbacks", True)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._native_fallbacks: Dict[str, NativeFallback] = {
+            "filesystem": NativeFilesystemFallback(project_dir)
+        }
+        
         self.metrics = {
             "total_calls": 0,
             "successful_calls": 0,
             "failed_calls": 0,
             "servers_available": 0,
             "discovery_failures": 0,
-            "timeouts": 0
+            "timeouts": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "circuit_rejections": 0,
+            "fallback_calls": 0
         }
         
         # Enhanced MCP-specific logging
@@ -79,6 +147,7 @@ class MCPManager:
             self.mcp_logger.info(f"Persistent connections: {self.persistent_connections}")
             self.mcp_logger.info("MCP Manager initialized - MCP tools enabled")
             self._load_mcp_config()
+            self._connect_broker()
         else:
             self.mcp_logger.info("MCP Manager initialized - MCP tools disabled")
     
@@ -201,11 +270,26 @@ class MCPManager:
             self.persistent_connections = settings.get("persistentConnections", self.persistent_connections)
             self.init_timeout = settings.get("initializationTimeout", self.init_timeout) # Ensure this is also updated
             self.discovery_timeout = settings.get("discoveryTimeout", self.discovery_timeout) # And this
+            if "responseCache" in settings:
+                self.response_cache = MCPResponseCache(settings["responseCache"])
+            self.stderr_buffer_bytes = int(settings.get("stderrBufferKiB", self.stderr_buffer_bytes // 1024)) * 1024
+            self.stderr_error_tail_bytes = int(settings.get("stderrErrorTailBytes", self.stderr_error_tail_bytes))
+            self.max_message_bytes = int(settings.get("maxMessageBytes", self.max_message_bytes))
+            self.idle_timeout = float(settings.get("idleTimeout", self.idle_timeout))
+            self.max_live_servers = int(settings.get("maxLiveServers", self.max_live_servers))
+            self.http_max_connections = int(settings.get("httpMaxConnections", self.http_max_connections))
+            if "circuitBreaker" in settings:
+                self.circuit_policy = CircuitBreakerPolicy.from_config(settings["circuitBreaker"])
+                self.native_fallbacks_enabled = settings["circuitBreaker"].get("nativeFallbacks", True)
+            # Broker settings passed to the constructor win over config files
+            constructor_settings = self.config.get("mcpSettings", self.config.get("settings", {}))
+            self.broker_settings = constructor_settings.get("broker", settings.get("broker", self.broker_settings))
             
             # Clear existing servers before registering from the new config, to avoid duplicates if _load_mcp_config is called multiple times
             self.servers.clear()
             self.connections.clear()
             self.capabilities.clear()
+            self._breakers.clear()
 
             # Initialize servers from the final merged configuration
             for server_id, server_config in servers.items():
@@ -254,6 +338,8 @@ class MCPManager:
                     "command": ["docker", "run", "-i", "--rm", "ghcr.io/chungoid/memory:latest"],
                     "timeout": 30,
                     "enabled": True,
+                    # The knowledge graph lives in the container, stopping it would lose it
+                    "evictable": False,
                     "description": "Persistent memory storage for context"
                 },
                 "sequential-thinking": {
@@ -346,30 +432,45 @@ class MCPManager:
             # Handle shell executor portability
             if server_id == "shell" and len(command) >= 3 and command[1] == "-m" and command[2] == "swarmdev.mcp_tools.shell_executor":
                 # Try to find the shell_executor.py script for direct execution
-                shell_script_path = os.path.join(self.project_dir, 'src', 'swarmdev', 'mcp_tools', 'shell_executor.py')
+                shell_script_path = os.path.join(os.path.abspath(self.project_dir), 'src', 'swarmdev', 'mcp_tools', 'shell_executor.py')
                 if os.path.exists(shell_script_path):
                     # Use direct path for better portability
                     command = ["python", shell_script_path]
                     self.mcp_logger.info(f"Shell executor: Using direct path for portability: {shell_script_path}")
                 # If not found, keep the module import approach
             
-            # Handle shell expansions in command
+            # Handle shell expansions in command. Absolute, since the command may run
+            # elsewhere (the broker daemon, or git with the project as its cwd)
+            project_dir = os.path.abspath(self.project_dir)
             for i, arg in enumerate(command):
                 if isinstance(arg, str):
                     # Replace $(pwd) with actual current directory
                     if "$(pwd)" in arg:
-                        command[i] = arg.replace("$(pwd)", self.project_dir)
+                        command[i] = arg.replace("$(pwd)", project_dir)
                     # Replace ${pwd} variant
                     elif "${pwd}" in arg:
-                        command[i] = arg.replace("${pwd}", self.project_dir)
+                        command[i] = arg.replace("${pwd}", project_dir)
             
             timeout = server_config.get("timeout", self.default_timeout)
+            url = server_config.get("url")
+            if not command and not url:
+                self.mcp_logger.error(f"Server '{server_id}' needs either a 'command' or a 'url'")
+                return
             
             self.servers[server_id] = {
                 "id": server_id,
                 "command": command,
+                "url": url,
+                "headers": server_config.get("headers"),
+                "cwd": server_config.get("cwd"),
+                "env": server_config.get("env"),
                 "description": server_config.get("description", ""),
                 "timeout": timeout,
+                "evictable": server_config.get("evictable", True),
+                "standby": server_config.get("standby", False),
+                "init_delay": server_config.get("init_delay", 0.2),
+                "fallback": server_config.get("fallback"),
+                "circuit_breaker": server_config.get("circuitBreaker", True),
                 "status": "configured",
                 "attempts": 0,
                 "last_error": None,
@@ -379,7 +480,10 @@ class MCPManager:
             }
             
             self.mcp_logger.info(f"Successfully registered MCP server '{server_id}'")
-            self.mcp_logger.info(f"  Command: {' '.join(command)}")
+            if url:
+                self.mcp_logger.info(f"  URL: {url} (streamable HTTP)")
+            else:
+                self.mcp_logger.info(f"  Command: {' '.join(command)}")
             self.mcp_logger.info(f"  Timeout: {timeout}s")
             # Debug filesystem registration
             if server_id == "filesystem":
@@ -388,6 +492,77 @@ class MCPManager:
         except Exception as e:
             self.mcp_logger.error(f"Failed to register MCP server '{server_id}': {e}", exc_info=True)
     
+    def _connect_broker(self):
+        """Route calls through a running MCP broker daemon if one is available."""
+        enabled = self.broker_settings.get("enabled", "auto")
+        if enabled is False:
+            return
+        
+        from .mcp_broker import get_broker_socket_path
+        socket_path = get_broker_socket_path(self.broker_settings)
+        if not os.path.exists(socket_path):
+            if enabled is True:
+                self.mcp_logger.warning(f"MCP broker enabled but no socket found at {socket_path}; using local servers")
+            return
+        
+        client = MCPBrokerClient(socket_path)
+        if client.ping():
+            self._broker = client
+            self.mcp_logger.info(f"Using MCP broker at {socket_path}")
+        else:
+            client.close()
+            self.mcp_logger.warning(f"MCP broker socket {socket_path} is not responding; using local servers")
+    
+    def _broker_spec(self, server_id: str) -> Dict:
+        """Launch spec sent to the broker so it can start the same server we would."""
+        server = self.servers[server_id]
+        spec = {
+            "command": server["command"],
+            "cwd": server.get("cwd"),
+            "env": server.get("env"),
+            "timeout": server.get("timeout", self.default_timeout),
+            "init_delay": server.get("init_delay", 0.2),
+            "evictable": server.get("evictable", True),
+            "standby": server.get("standby", False),
+            "description": server.get("description", ""),
+        }
+        # Part of the spec, and so of the broker's key: projects never share these servers
+        if server_id in PROJECT_SCOPED_SERVERS:
+            spec["project_dir"] = os.path.abspath(self.project_dir)
+            if server_id in CWD_DEPENDENT_SERVERS and not spec["cwd"]:
+                spec["cwd"] = spec["project_dir"]
+        return spec
+    
+    def _call_via_broker(self, server_id: str, method: str, params: Dict, timeout: float) -> Optional[Dict]:
+        """
+        Forward a call to the broker daemon.
+        
+        Returns None if the broker is unreachable, in which case the manager
+        falls back to local server processes.
+        """
+        request_params = {
+            "server": server_id,
+            "spec": self._broker_spec(server_id),
+            "method": method,
+            "params": params,
+            "timeout": timeout,
+        }
+        broker = self._broker
+        if broker is None:
+            return None
+        try:
+            # Allow for a cold start of the server inside the broker
+            response = broker.request("broker/call", request_params, timeout + self.init_timeout + 5)
+        except (ConnectionError, ValueError) as e:
+            self.mcp_logger.warning(f"MCP broker unavailable ({e}); falling back to local servers")
+            self._broker = None
+            broker.close()
+            return None
+        
+        if "error" in response:
+            return self._create_error_response(-32001, f"MCP broker error: {response['error'].get('message')}", None)
+        return response.get("result", {})
+    
     def initialize_tools(self) -> bool:
         """Initialize MCP servers with lazy loading approach."""
         if not self.enabled:
@@ -416,17 +591,58 @@ class MCPManager:
         if server_id not in self.servers:
             self.mcp_logger.error(f"Attempted to initialize unknown server: {server_id}")
             return False
-
+        
+        if self.servers[server_id].get("url"):
+            if not self._connect_http_server(server_id):
+                return False
+        else:
+            self._enforce_live_server_cap(exclude=server_id)
+            
+            process = self._spawn_server_process(server_id)
+            if process is None:
+                return False
+            self._install_connection(server_id, process)
+        
+        # Optional: Discover capabilities right after successful handshake
+        if self.auto_discovery:
+            self.mcp_logger.info(f"Performing capability discovery for {server_id} after successful handshake.")
+            self._discover_capabilities(server_id)
+            # Check if discovery failed and update server status accordingly
+            if self.servers[server_id].get('status') == 'discovery_failed':
+                self.mcp_logger.error(f"Server {server_id} handshake successful, but capability discovery failed. Marking as unusable.")
+                # No need to change status again, _discover_capabilities already set it.
+                return False # Initialization is not fully successful
+        
+        self._schedule_standby(server_id)
+        return True
+    
+    def _install_connection(self, server_id: str, process: subprocess.Popen):
+        """Make a handshaken process the active connection of a server."""
+        with self._lock:
+            self.connections[server_id] = process # Store the raw process object
+            self.servers[server_id]['pid'] = process.pid
+            self.servers[server_id]['status'] = 'running' # Or 'initialized_handshake_complete'
+            self.servers[server_id]['started_at'] = datetime.now().isoformat()
+        self._ensure_reaper()
+    
+    def _spawn_server_process(self, server_id: str, standby: bool = False) -> Optional[subprocess.Popen]:
+        """
+        Start a server process and complete the MCP initialize handshake.
+        
+        Returns the process, or None on failure. Standby spawns do not touch
+        the server's status, since the active connection may be healthy.
+        """
         server_config = self.servers[server_id]
         command = server_config.get('command')
         cwd = server_config.get('cwd')
         env_vars = server_config.get('env')
+        label = f"{server_id} (standby)" if standby else server_id
 
         if not command:
             self.mcp_logger.error(f"No command specified for server: {server_id}")
-            return False
+            return None
 
-        self.mcp_logger.info(f"Initializing server: {server_id} with command: '{command}'")
+        self.mcp_logger.info(f"Initializing server: {label} with command: '{command}'")
         if cwd:
             self.mcp_logger.info(f"  Working directory: {cwd}")
         if env_vars:
@@ -435,23 +651,19 @@ class MCPManager:
             current_env.update(env_vars)
             env_vars = current_env
         
+        def mark_failed(status: str, error: str):
+            self.servers[server_id]['last_error'] = error
+            if not standby:
+                self.servers[server_id]['status'] = status
+        
         process = None
         try:
-            # Start the server process
-                    # Removed debug logging to eliminate spam
-        # self.mcp_logger.debug(f"Starting subprocess for {server_id}: {command}")
-        # self.mcp_logger.debug(f"Starting {server_id} server: {' '.join(command)}")
-        # Debug for filesystem command execution (reduced to debug level)
-        # if server_id == "filesystem":
-        #     self.mcp_logger.debug(f"Filesystem command: {command}")
-            
             process = subprocess.Popen(
                 command, 
                 stdin=subprocess.PIPE, 
                 stdout=subprocess.PIPE, 
                 stderr=subprocess.PIPE, 
                 # text=True, # text=True can cause issues with precise byte control needed for some protocols
-                # bufsize=0, # Might be useful for unbuffered, but let's test default first with handshake
                 shell=isinstance(command, str),
                 cwd=cwd,
                 env=env_vars
@@ -459,7 +671,7 @@ class MCPManager:
 
             # Add check for process and its pipes immediately after Popen
             if process is None or process.stdin is None or process.stdout is None:
-                self.mcp_logger.error(f"Popen failed to create a valid process or stdio pipes for {server_id}. PID: {process.pid if process else 'N/A'}. Terminating if possible.")
+                self.mcp_logger.error(f"Popen failed to create a valid process or stdio pipes for {label}. PID: {process.pid if process else 'N/A'}. Terminating if possible.")
                 if process: # Try to clean up if process object exists but pipes are bad
                     try: process.terminate()
                     except: pass # Best effort
@@ -467,16 +679,21 @@ class MCPManager:
                     except: pass # Best effort
                     try: process.kill()
                     except: pass # Best effort
-                self.servers[server_id]['status'] = 'failed_popen_io'
-                self.servers[server_id]['last_error'] = "Popen failed to establish valid process or stdio pipes."
-                return False
+                mark_failed('failed_popen_io', "Popen failed to establish valid process or stdio pipes.")
+                return None
             
-            # self.mcp_logger.debug(f"Started {server_id} server with PID: {process.pid if process else 'None'}")
-            self.mcp_logger.info(f"Subprocess for {server_id} started. PID: {process.pid}")
+            self.mcp_logger.info(f"Subprocess for {label} started. PID: {process.pid}")
+            
+            if process.stderr is not None:
+                self._stderr_drainers[process.pid] = StderrDrainer(
+                    process.stderr, f"{server_id}:{process.pid}", self.mcp_logger,
+                    max_bytes=self.stderr_buffer_bytes
+                ).start()
+            self._frame_readers[process.pid] = JSONRPCFrameReader(
+                process.stdout, max_message_bytes=self.max_message_bytes
+            )
             
             # Brief pause to allow server to actually start its process before handshake
-            # The old code did not have an explicit sleep here before handshake, relying on readline timeout.
-            # The init_delay of 2.0s is now effectively before this handshake.
             time.sleep(server_config.get('init_delay', 0.2)) # Short delay for process to spawn, main delay before was too long for handshake
 
             # MCP Initialization Handshake
@@ -495,36 +712,22 @@ class MCPManager:
                 },
             }
             
-            self.mcp_logger.info(f"Sending 'initialize' handshake to {server_id} (PID: {process.pid}), request_id: {init_request_id}")
+            self.mcp_logger.info(f"Sending 'initialize' handshake to {label} (PID: {process.pid}), request_id: {init_request_id}")
             payload_str = json.dumps(handshake_request) + "\n"
             process.stdin.write(payload_str.encode('utf-8'))
             process.stdin.flush()
 
-            self.mcp_logger.debug(f"[{server_id} - {init_request_id}] Waiting for 'initialize' response...")
+            self.mcp_logger.debug(f"[{label} - {init_request_id}] Waiting for 'initialize' response...")
 
-            response_json = None
-            if self._wait_for_response(process, self.init_timeout): # Use self.init_timeout
-                raw_response_text = process.stdout.readline().decode('utf-8').strip()
-                self.mcp_logger.debug(f"Raw 'initialize' response from {server_id} (PID: {process.pid}): '{raw_response_text}'")
-                if raw_response_text:
-                    try:
-                        response_json = json.loads(raw_response_text)
-                        if response_json.get("id") != init_request_id:
-                            self.mcp_logger.error(f"Initialize response ID mismatch for {server_id}. Expected '{init_request_id}', got '{response_json.get('id')}'")
-                            response_json = None # Invalid response
-                        elif "error" in response_json:
-                            self.mcp_logger.error(f"Server {server_id} returned error during initialize: {response_json['error']}")
-                            response_json = None # Error response
-                    except json.JSONDecodeError as e:
-                        self.mcp_logger.error(f"Failed to decode JSON initialize response from {server_id}: {e}. Raw: '{raw_response_text}'")
-                        response_json = None
-                else:
-                    self.mcp_logger.error(f"Empty 'initialize' response from {server_id} (PID: {process.pid})")
-            else:
-                self.mcp_logger.error(f"Timeout waiting for 'initialize' response from {server_id} (PID: {process.pid})")
+            response_json, _, read_error = self._read_response(process, init_request_id, self.init_timeout)
+            if read_error:
+                self.mcp_logger.error(f"Failed to read 'initialize' response from {label} (PID: {process.pid}): {read_error}")
+            elif "error" in response_json:
+                self.mcp_logger.error(f"Server {label} returned error during initialize: {response_json['error']}")
+                response_json = None # Error response
 
             if response_json and "result" in response_json:
-                self.mcp_logger.info(f"Server {server_id} initialized successfully (handshake part 1). Response: {response_json.get('result')}")
+                self.mcp_logger.info(f"Server {label} initialized successfully (handshake part 1). Response: {response_json.get('result')}")
                 
                 # Send 'initialized' notification (note: no "id" for notifications)
                 initialized_notification = {
@@ -532,57 +735,172 @@ class MCPManager:
                     "method": "notifications/initialized",
                     "params": {}
                 }
-                self.mcp_logger.info(f"Sending 'initialized' notification to {server_id} (PID: {process.pid})")
+                self.mcp_logger.info(f"Sending 'initialized' notification to {label} (PID: {process.pid})")
                 notification_str = json.dumps(initialized_notification) + "\n"
                 process.stdin.write(notification_str.encode('utf-8'))
                 process.stdin.flush()
-
-                with self._lock:
-                    self.connections[server_id] = process # Store the raw process object
-                    self.servers[server_id]['pid'] = process.pid
-                    self.servers[server_id]['status'] = 'running' # Or 'initialized_handshake_complete'
-                
-                # Optional: Discover capabilities right after successful handshake
-                if self.auto_discovery:
-                    self.mcp_logger.info(f"Performing capability discovery for {server_id} after successful handshake.")
-                    self._discover_capabilities(server_id)
-                    # Check if discovery failed and update server status accordingly
-                    if self.servers[server_id].get('status') == 'discovery_failed':
-                        self.mcp_logger.error(f"Server {server_id} handshake successful, but capability discovery failed. Marking as unusable.")
-                        # No need to change status again, _discover_capabilities already set it.
-                        return False # Initialization is not fully successful
-                
-                # Log the successful response before returning
-                self.mcp_logger.debug(f"Successful response from {server_id} (PID: {process.pid}, request_id: {init_request_id}): {response_json}")
-
-                return True
+                return process
             else:
                 # Initialization failed
-                self.mcp_logger.error(f"MCP Handshake failed for {server_id} (PID: {process.pid}). Terminating process.")
+                self.mcp_logger.error(f"MCP Handshake failed for {label} (PID: {process.pid}). Terminating process.")
                 stderr_output = self._read_stderr_non_blocking(process) # Try to get any last words
                 if stderr_output:
-                    self.mcp_logger.error(f"Stderr from {server_id} (PID: {process.pid}) on handshake failure: {stderr_output}")
+                    self.mcp_logger.error(f"Stderr from {label} (PID: {process.pid}) on handshake failure: {stderr_output}")
                 process.terminate()
                 try:
                     process.wait(timeout=1.0) # Give it a moment to terminate
                 except subprocess.TimeoutExpired:
                     process.kill()
-                self.servers[server_id]['status'] = 'failed_handshake'
-                self.servers[server_id]['last_error'] = "MCP Handshake failed"
-                return False
+                self._release_process_io(process)
+                mark_failed('failed_handshake', "MCP Handshake failed")
+                return None
 
         except FileNotFoundError:
-            self.mcp_logger.error(f"Command not found for server {server_id}: {command.split()[0] if isinstance(command, str) else command[0]}", exc_info=True)
+            self.mcp_logger.error(f"Command not found for server {label}: {command.split()[0] if isinstance(command, str) else command[0]}", exc_info=True)
             if process: process.kill() # Ensure it's killed if Popen partially succeeded
-            return False
+            return None
         except (OSError, subprocess.SubprocessError) as e:
-            self.mcp_logger.error(f"Failed to start server {server_id} (command: '{command}'): {e}", exc_info=True)
+            self.mcp_logger.error(f"Failed to start server {label} (command: '{command}'): {e}", exc_info=True)
             if process: process.kill() # Ensure it's killed
-            return False
+            return None
         except Exception as e: # Catch any other unexpected error during initialization
-            self.mcp_logger.critical(f"Unexpected error initializing server {server_id}: {e}", exc_info=True)
+            self.mcp_logger.critical(f"Unexpected error initializing server {label}: {e}", exc_info=True)
             if process: process.kill()
+            return None
+    
+    def _connect_http_server(self, server_id: str) -> bool:
+        """Open a pooled HTTP session to a server configured with "url" and run the handshake."""
+        server = self.servers[server_id]
+        try:
+            transport = StreamableHTTPTransport(
+                server["url"],
+                headers=server.get("headers"),
+                timeout=server.get("timeout", self.default_timeout),
+                max_connections=self.http_max_connections,
+                max_message_bytes=self.max_message_bytes,
+                logger=self.mcp_logger
+            )
+        except ImportError as e:
+            self.mcp_logger.error(f"Cannot connect to {server_id}: {e}")
+            server["status"] = "failed_transport"
+            server["last_error"] = str(e)
+            return False
+        
+        handshake_request = {
+            "jsonrpc": "2.0",
+            "id": str(uuid.uuid4()),
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-03-26",  # First revision with streamable HTTP
+                "capabilities": {},
+                "clientInfo": {
+                    "name": "swarmdev-mcp-manager",
+                    "version": "1.0.0"
+                }
+            },
+        }
+        self.mcp_logger.info(f"Sending 'initialize' handshake to {server_id} at {server['url']}")
+        try:
+            response, _ = transport.request(handshake_request, self.init_timeout)
+            if "result" not in response:
+                raise ConnectionError(f"initialize returned error: {response.get('error')}")
+            transport.protocol_version = response["result"].get("protocolVersion")
+            transport.notify({"jsonrpc": "2.0", "method": "notifications/initialized", "params": {}})
+        except (ConnectionError, TimeoutError, EOFError, ValueError, FrameTooLargeError) as e:
+            self.mcp_logger.error(f"MCP Handshake failed for {server_id} at {server['url']}: {e}")
+            transport.close()
+            with self._lock:
+                server["status"] = "failed_handshake"
+                server["last_error"] = f"MCP Handshake failed: {e}"
             return False
+        
+        self.mcp_logger.info(
+            f"Server {server_id} initialized over HTTP (session: {transport.session_id or 'none'}, "
+            f"protocol: {transport.protocol_version})"
+        )
+        with self._lock:
+            previous = self._http_transports.pop(server_id, None)
+            self._http_transports[server_id] = transport
+            server["status"] = "running"
+            server["started_at"] = datetime.now().isoformat()
+        if previous is not None:
+            previous.close()
+        return True
+    
+    def _get_http_transport(self, server_id: str) -> StreamableHTTPTransport:
+        """Return the HTTP transport of a "url" server, connecting it if needed."""
+        transport = self._http_transports.get(server_id)
+        if transport is not None:
+            return transport
+        with self._lock:
+            reconnect_lock = self._reconnect_locks.setdefault(server_id, threading.RLock())
+        with reconnect_lock:
+            transport = self._http_transports.get(server_id)
+            if transport is not None:
+                return transport # Another caller connected while we waited
+            if not self._initialize_server(server_id):
+                raise ConnectionError(f"Failed to initialize or connect to server: {server_id}")
+            return self._http_transports[server_id]
+    
+    def _drop_http_transport(self, server_id: str, transport: StreamableHTTPTransport):
+        """Forget an HTTP transport whose session is gone so the next call re-initializes."""
+        with self._lock:
+            if self._http_transports.get(server_id) is transport:
+                del self._http_transports[server_id]
+        transport.close()
+    
+    def _ensure_connected(self, server_id: str):
+        """Connect a server over its configured transport. Raises ConnectionError on failure."""
+        if self.servers[server_id].get("url"):
+            self._get_http_transport(server_id)
+        else:
+            self._get_live_connection(server_id)
+    
+    def _schedule_standby(self, server_id: str):
+        """Pre-spawn a handshaken standby process in the background for servers with "standby": true."""
+        server = self.servers.get(server_id, {})
+        if not server.get("standby") or server.get("url") or self._broker is not None:
+            return
+        with self._lock:
+            if server_id in self._standby or server_id in self._standby_pending:
+                return
+            self._standby_pending.add(server_id)
+        
+        def spawn():
+            try:
+                process = self._spawn_server_process(server_id, standby=True)
+            finally:
+                with self._lock:
+                    self._standby_pending.discard(server_id)
+            if process is None:
+                return
+            with self._lock:
+                if not self._shutting_down and server_id not in self._standby:
+                    self._standby[server_id] = process
+                    self.mcp_logger.info(f"Standby for {server_id} ready (PID: {process.pid})")
+                    return
+            self._stop_server_process(server_id, process)
+        
+        threading.Thread(target=spawn, name=f"mcp-standby-{server_id}", daemon=True).start()
+    
+    def _promote_standby(self, server_id: str) -> Optional[subprocess.Popen]:
+        """Swap in the standby process of a failed server, if one is alive."""
+        with self._lock:
+            standby = self._standby.pop(server_id, None)
+        if standby is None:
+            return None
+        if standby.poll() is not None:
+            self.mcp_logger.warning(f"Standby for {server_id} (PID: {standby.pid}) has exited; starting a fresh process")
+            self._release_process_io(standby)
+            return None
+        
+        self.mcp_logger.info(f"Promoting standby for {server_id} (PID: {standby.pid})")
+        self._install_connection(server_id, standby)
+        # Capabilities were discovered on the original process and still apply
+        if server_id not in self.capabilities and self.auto_discovery:
+            self._discover_capabilities(server_id)
+        self._schedule_standby(server_id)
+        return standby
     
     def _discover_capabilities(self, server_id: str):
         """Discover capabilities of a server using tools/list."""
@@ -675,35 +993,46 @@ class MCPManager:
         with self._lock:
             self.metrics["total_calls"] += 1
         
-        # Enhanced logging: Call start (debug level only)
-        # self.enhanced_logger.log_call_start(
-        #     call_id=call_id,
-        #     tool_id=tool_id,
-        #     method=method,
-        #     params=params,
-        #     timeout=timeout or self.servers[tool_id]["timeout"],
-        #     agent_id=agent_id,
-        #     context=context
-        # )
-        
         # Minimal logging for user experience
         self.mcp_logger.debug(f"MCP call: {tool_id}.{method} (ID: {call_id})")
         
+        # Serve idempotent tool calls from the response cache when possible
+        cacheable = method == "tools/call" and self.response_cache.is_cacheable(tool_id, params)
+        if cacheable:
+            cached = self.response_cache.get(tool_id, params)
+            with self._lock:
+                self.metrics["cache_hits" if cached is not None else "cache_misses"] += 1
+            if cached is not None:
+                self.mcp_logger.debug(f"Cache HIT for {tool_id}.{params.get('name')} (ID: {call_id})")
+                with self._lock:
+                    self.metrics["successful_calls"] += 1
+                self.servers[tool_id]["last_used"] = datetime.now().isoformat()
+                self.servers[tool_id]["usage_count"] += 1
+                return cached
+        
+        # Fail fast (or reroute) instead of waiting out timeouts on a sick server
+        breaker = self._get_breaker(tool_id)
+        if breaker is not None and not breaker.allow_request():
+            return self._call_with_open_circuit(tool_id, method, params, timeout, breaker)
+        
         try:
-            # Ensure server is connected
-            if tool_id not in self.connections:
+            # Ensure server is connected (the broker owns servers when in use)
+            if self._broker is None and tool_id not in self.connections and tool_id not in self._http_transports:
                 self.mcp_logger.info(f"Lazy initialization: establishing connection for {tool_id}")
-                if not self._initialize_server(tool_id):
+                try:
+                    self._ensure_connected(tool_id)
+                    connected = True
+                except ConnectionError:
+                    connected = False
+                if not connected:
                     response = {"error": f"Failed to initialize server {tool_id}"}
                     response_time = time.time() - start_time
-                    
-                    # self.enhanced_logger.log_call_end(
-                    #     call_id=call_id,
-                    #     status="connection_failure",
-                    #     duration=response_time,
-                    #     response=response,
-                    #     error=Exception(response["error"])
-                    # )
+                    self.metrics_collector.record_call(
+                        tool_id, self._metric_tool_name(method, params), response_time, "connection_failure"
+                    )
+                    # A failed capability discovery was already recorded by its tools/list call
+                    if self.servers[tool_id].get("status") != "discovery_failed":
+                        self._record_circuit_result(tool_id, "connection_failure")
                     
                     with self._lock:
                         self.metrics["failed_calls"] += 1
@@ -712,8 +1041,16 @@ class MCPManager:
                     return response
             
             # Call the method
+            cache_generation = self.response_cache.generation
             result = self._call_server_method(tool_id, method, params, timeout)
             
+            # Writes invalidate cached reads of the same path; reads are stored
+            # only if no invalidation happened while they were in flight
+            if method == "tools/call":
+                self.response_cache.observe_call(self.logical_server_ids.get(tool_id, tool_id), params)
+                if cacheable:
+                    self.response_cache.put(tool_id, params, result, generation=cache_generation)
+            
             # Note: sequential-thinking multi-step orchestration is handled at the agent layer. MCPManager stays single-call.
             
             # Determine call status
@@ -723,15 +1060,6 @@ class MCPManager:
             else:
                 status = "success"
             
-            # Enhanced logging: Call end (debug level only)
-            # self.enhanced_logger.log_call_end(
-            #     call_id=call_id,
-            #     status=status,
-            #     duration=response_time,
-            #     response=result,
-            #     error=None if status == "success" else Exception(result.get("error", "unknown"))
-            # )
-            
             # Update metrics and tool usage
             with self._lock:
                 if status == "success":
@@ -753,33 +1081,142 @@ class MCPManager:
             
             response_time = time.time() - start_time
             error_msg = f"Error calling MCP server '{tool_id}': {e}"
-            
-            # Enhanced logging: Exception (debug level only)
-            # self.enhanced_logger.log_call_end(
-            #     call_id=call_id,
-            #     status="exception",
-            #     duration=response_time,
-            #     response=None,
-            #     error=e
-            # )
+            self._record_circuit_result(tool_id, "failure")
             
             self.mcp_logger.error(f"MCP call exception: {error_msg} (ID: {call_id})")
             return {"error": error_msg}
 
-    def _create_error_response(self, code: int, message: str, request_id: Optional[str]) -> Dict:
+    def register_native_fallback(self, server_id: str, handler: Optional[NativeFallback]):
+        """
+        Register an in-process handler used while a server's circuit is open.
+        
+        The handler receives (method, params) and returns a JSON-RPC style
+        response, or None if it cannot serve the request. Passing None removes
+        the handler. A built-in handler covers the core filesystem tools.
+        """
+        with self._lock:
+            if handler is None:
+                self._native_fallbacks.pop(server_id, None)
+            else:
+                self._native_fallbacks[server_id] = handler
+    
+    def _get_breaker(self, server_id: str) -> Optional[CircuitBreaker]:
+        """Circuit breaker for a server, or None if breakers are disabled for it."""
+        if not self.circuit_policy.enabled or not self.servers.get(server_id, {}).get("circuit_breaker", True):
+            return None
+        breaker = self._breakers.get(server_id)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(server_id, CircuitBreaker(server_id, self.circuit_policy))
+        return breaker
+    
+    def _record_circuit_result(self, server_id: str, status: str):
+        """Feed a call outcome to the server's breaker and react to state changes."""
+        breaker = self._get_breaker(server_id)
+        if breaker is None:
+            return
+        was_probing = breaker.state == HALF_OPEN
+        if breaker.record_result(status, self.metrics_collector.get_tool_health(server_id)):
+            self.mcp_logger.warning(
+                f"Circuit OPEN for {server_id} ({breaker.last_reason}); "
+                f"failing fast for {breaker.open_seconds:.0f}s"
+            )
+            # Restart a wedged server so the probe talks to a fresh process
+            if self.servers.get(server_id, {}).get("evictable", True) and server_id in self.connections:
+                threading.Thread(
+                    target=self._evict_server, args=(server_id, "circuit breaker opened"), daemon=True
+                ).start()
+        elif was_probing and breaker.state == CLOSED:
+            self.mcp_logger.info(f"Circuit CLOSED for {server_id}: probe call succeeded")
+    
+    def _call_with_open_circuit(self, tool_id: str, method: str, params: Dict,
+                                timeout: Optional[int], breaker: CircuitBreaker) -> Dict:
+        """Serve a call for a server whose circuit is open: replica, native handler or fast failure."""
+        with self._lock:
+            self.metrics["circuit_rejections"] += 1
+        
+        fallback_id = self.servers[tool_id].get("fallback")
+        if fallback_id and fallback_id != tool_id and fallback_id in self.servers:
+            fallback_breaker = self._get_breaker(fallback_id)
+            if fallback_breaker is None or fallback_breaker.state == CLOSED:
+                self.mcp_logger.info(f"Circuit open for {tool_id}; routing {method} to fallback server {fallback_id}")
+                with self._lock:
+                    self.metrics["fallback_calls"] += 1
+                return self.call_tool(fallback_id, method, params, timeout)
+        
+        native = self._native_fallbacks.get(tool_id) if self.native_fallbacks_enabled else None
+        if native is not None:
+            response = native(method, params)
+            if response is not None:
+                self.mcp_logger.info(f"Circuit open for {tool_id}; served {self._metric_tool_name(method, params)} natively")
+                if method == "tools/call":
+                    self.response_cache.observe_call(self.logical_server_ids.get(tool_id, tool_id), params)
+                failed = isinstance(response.get("result"), dict) and response["result"].get("isError")
+                with self._lock:
+                    self.metrics["fallback_calls"] += 1
+                    self.metrics["failed_calls" if failed else "successful_calls"] += 1
+                return response
+        
+        message = (
+            f"Circuit open for server {tool_id} ({breaker.last_reason}); "
+            f"failing fast, next probe in {breaker.retry_after():.0f}s"
+        )
+        self.mcp_logger.warning(message)
+        with self._lock:
+            self.metrics["failed_calls"] += 1
+        return self._create_error_response(-32004, message, None)
+    
+    @staticmethod
+    def _broker_call_status(response: Dict) -> str:
+        """Circuit status of a brokered call, mapped like the outcome of a direct stdio call."""
+        error = response.get("error")
+        if not error:
+            return "success"
+        if isinstance(error, dict):
+            return BROKER_ERROR_STATUS.get(error.get("code"), "error")
+        return "failure"
+    
+    @staticmethod
+    def _metric_tool_name(method: str, params: Dict) -> str:
+        """Histogram key for a call: the tool name for tools/call, else the method."""
+        if method == "tools/call" and isinstance(params, dict) and params.get("name"):
+            return params["name"]
+        return method
+    
+    def _create_error_response(self, code: int, message: str, request_id: Optional[str],
+                               stderr: Optional[str] = None) -> Dict:
         """Create a standardized JSON-RPC error response."""
+        error = {"code": code, "message": message}
+        if stderr:
+            error["data"] = {"stderr": stderr}
         return {
             "jsonrpc": "2.0",
-            "error": {"code": code, "message": message},
+            "error": error,
             "id": request_id
         }
 
+    def _release_process_io(self, process: Optional[subprocess.Popen]):
+        """Forget the stdout reader and stderr drainer of a process that has been stopped."""
+        if process is None:
+            return
+        self._frame_readers.pop(process.pid, None)
+        drainer = self._stderr_drainers.pop(process.pid, None)
+        if drainer is not None:
+            drainer.join(timeout=0.5)
+
     def _read_stderr_non_blocking(self, process: subprocess.Popen) -> str:
-        """Read from a process's stderr stream without blocking."""
+        """Return recent stderr output of a process without blocking."""
         stderr_output = ""
         if not process or not hasattr(process, 'stderr') or not process.stderr:
             return stderr_output
         
+        # Normal path: stderr is drained continuously, return the ring buffer tail
+        drainer = self._stderr_drainers.get(process.pid)
+        if drainer is not None:
+            if process.poll() is not None:
+                drainer.join(timeout=0.2) # Let the drainer pick up the last words
+            return drainer.tail(self.stderr_error_tail_bytes)
+        
         # Ensure the process is not None and stderr is a valid stream object
         if process.stderr is None: # Explicitly check for None stderr
             return stderr_output
@@ -869,6 +1306,20 @@ class MCPManager:
         else:
              call_timeout = timeout if timeout is not None else self.servers.get(server_id, {}).get("timeout", self.default_timeout)
         
+        if self.servers.get(server_id, {}).get("url"):
+            return self._call_http_server_method(server_id, method, params, call_timeout)
+        
+        if self._broker is not None:
+            broker_start = time.monotonic()
+            broker_response = self._call_via_broker(server_id, method, params, call_timeout)
+            if broker_response is not None:
+                call_status = self._broker_call_status(broker_response)
+                self.metrics_collector.record_call(
+                    server_id, self._metric_tool_name(method, params), time.monotonic() - broker_start, call_status
+                )
+                self._record_circuit_result(server_id, call_status)
+                return broker_response
+        
         request_id = str(uuid.uuid4())
         payload = {
             "jsonrpc": "2.0",
@@ -878,95 +1329,98 @@ class MCPManager:
         }
         payload_str = json.dumps(payload)
 
-        self.mcp_logger.debug(f"Calling server '{server_id}', method '{method}', params: {json.dumps(params)}, timeout: {call_timeout}s, request_id: {request_id}")
-        # self.enhanced_logger.log_call_start(
-        #     call_id=request_id,
-        #     tool_id=server_id,
-        #     method=method,
-        #     params=params,
-        #     timeout=float(call_timeout)
-        # )
-
+        if self.mcp_logger.isEnabledFor(logging.DEBUG):
+            self.mcp_logger.debug(f"Calling server '{server_id}', method '{method}', params: {json.dumps(params)}, timeout: {call_timeout}s, request_id: {request_id}")
         start_time = time.monotonic()
         response_json: Dict = {}
         error_response: Optional[Dict] = None
-        raw_response_text = ""
+        frame_bytes = 0
+        call_status = "failure"
         conn: Optional[subprocess.Popen] = None
 
         try:
-            with self._lock:
-                if server_id not in self.connections or self.connections[server_id].poll() is not None:
-                    self.mcp_logger.info(f"No active connection to {server_id} or process terminated. Attempting to re-initialize.")
-                    if not self._initialize_server(server_id):
-                        # _initialize_server logs its own errors
-                        raise ConnectionError(f"Failed to initialize or connect to server: {server_id}")
-                conn = self.connections[server_id]
-            
-            if conn is None: # Should be caught by ConnectionError above, but as a safeguard
-                 raise ConnectionError(f"Connection object for {server_id} is None after initialization attempt.")
-
-            self.mcp_logger.debug(f"Sending payload to {server_id} (PID: {conn.pid}): {payload_str}")
-            conn.stdin.write(payload_str.encode('utf-8') + b'\n')
-            conn.stdin.flush()
+            # One request/response exchange at a time per stdio connection. If the
+            # server was evicted, replaced or died while we waited for the lock, reconnect.
+            io_lock = self._get_io_lock(server_id)
+            deadline = start_time + call_timeout
+            while True:
+                conn = self._get_live_connection(server_id)
+                # Time spent queued behind other exchanges counts against this call's timeout
+                if not io_lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"Timed out after {call_timeout}s waiting for the connection to {server_id} (method: {method})")
+                if self.connections.get(server_id) is conn and conn.poll() is None:
+                    break
+                io_lock.release()
 
-            self.mcp_logger.debug(f"[{server_id} - {request_id}] Waiting for response data...")
-            if not self._wait_for_response(conn, call_timeout):
+            io_failed = True
+            try:
+                if self.mcp_logger.isEnabledFor(logging.DEBUG):
+                    self.mcp_logger.debug(f"Sending payload to {server_id} (PID: {conn.pid}): {payload_str}")
+                conn.stdin.write((payload_str + "\n").encode('utf-8'))
+                conn.stdin.flush()
+                
+                self.mcp_logger.debug(f"[{server_id} - {request_id}] Waiting for response data...")
+                response_json, frame_bytes, read_error = self._read_response(
+                    conn, request_id, max(0.0, deadline - time.monotonic())
+                )
+                io_failed = read_error == "eof"
+            finally:
+                if io_failed:
+                    # Reap an exiting server while still holding the lock, so queued
+                    # callers see it as dead and reconnect instead of writing to it
+                    try:
+                        conn.wait(timeout=0.5)
+                    except subprocess.TimeoutExpired:
+                        pass
+                io_lock.release()
+            
+            if read_error == "timeout":
                 self.mcp_logger.error(f"Timeout waiting for stdout response from {server_id} (PID: {conn.pid}, method: {method}, request_id: {request_id})")
                 stderr_output = self._read_stderr_non_blocking(conn)
                 error_message = f"Timeout waiting for response from {server_id} (method: {method})."
                 if stderr_output:
                     error_message += f" Server stderr: {stderr_output}"
-                error_response = self._create_error_response(-32000, error_message, request_id)
+                error_response = self._create_error_response(-32000, error_message, request_id, stderr=stderr_output)
                 self.metrics["timeouts"] += 1
-            else:
-                # Response data is expected, try to read it
-                raw_response_text = conn.stdout.readline().decode('utf-8').strip()
-                self.mcp_logger.debug(f"Raw response from {server_id} (PID: {conn.pid}, request_id: {request_id}): '{raw_response_text}'")
-
-                if not raw_response_text:
-                    # Empty response could mean server closed stdout or crashed
-                    exit_code = conn.poll()
-                    stderr_output = self._read_stderr_non_blocking(conn)
-                    if exit_code is not None:
-                        self.mcp_logger.error(f"Empty response from {server_id} (PID: {conn.pid}, request_id: {request_id}). Server process terminated with exit code {exit_code}.")
-                        error_message = f"Empty response and server {server_id} terminated (exit code {exit_code})."
-                    else:
-                        self.mcp_logger.warning(f"Empty response from {server_id} (PID: {conn.pid}, request_id: {request_id}), but server process still running.")
-                        error_message = f"Empty response from server {server_id}."
-                    if stderr_output:
-                        error_message += f" Server stderr: {stderr_output}"
-                    error_response = self._create_error_response(-32000, error_message, request_id)
-                else:
-                    try:
-                        response_json = json.loads(raw_response_text)
-                        if response_json.get("id") != request_id:
-                            self.mcp_logger.warning(f"Response ID mismatch for {server_id} (request_id: {request_id}). Expected '{request_id}', got '{response_json.get('id')}'. Response: {raw_response_text}")
-                            error_response = self._create_error_response(-32603, f"Response ID mismatch. Expected '{request_id}', got '{response_json.get('id')}'", request_id)
-                            response_json = {} # Clear parsed JSON if it's not for us or is an error itself
-                        elif "error" in response_json:
-                            self.mcp_logger.warning(f"Server {server_id} (PID: {conn.pid}, request_id: {request_id}) returned an error: {response_json['error']}")
-                            # This is a valid JSON-RPC error response from the server, not a transport error.
-                            # We let it pass through as response_json and the caller can inspect it.
-                            pass
-                    except json.JSONDecodeError as e_json:
-                        self.mcp_logger.error(f"JSONDecodeError from {server_id} (PID: {conn.pid}, request_id: {request_id}): {e_json}. Raw response: '{raw_response_text}'")
-                        stderr_output = self._read_stderr_non_blocking(conn)
-                        error_message = f"Invalid JSON response from server {server_id}: {e_json}. Raw: '{raw_response_text}'"
-                        if stderr_output:
-                            error_message += f". Server stderr: {stderr_output}"
-                        error_response = self._create_error_response(-32700, error_message, request_id) # Parse error
-
-            # Additional check: if process terminated after we thought we got a response but didn't form an error_response yet
-            if conn.poll() is not None and not error_response and not ("result" in response_json or "error" in response_json) :
-                exit_code = conn.returncode
-                self.mcp_logger.error(f"Server {server_id} (PID: {conn.pid}) terminated unexpectedly (exit code {exit_code}) after potential read for request_id: {request_id}. Raw response was: '{raw_response_text}'")
+                call_status = "timeout"
+            elif read_error == "eof":
+                # Server closed stdout, most likely because it crashed
+                try:
+                    exit_code = conn.wait(timeout=0.5)
+                except subprocess.TimeoutExpired:
+                    exit_code = None
                 stderr_output = self._read_stderr_non_blocking(conn)
-                error_message = f"Server {server_id} terminated unexpectedly (exit code {exit_code})."
+                if exit_code is not None:
+                    self.mcp_logger.error(f"Empty response from {server_id} (PID: {conn.pid}, request_id: {request_id}). Server process terminated with exit code {exit_code}.")
+                    error_message = f"Server {server_id} terminated unexpectedly (exit code {exit_code})."
+                else:
+                    self.mcp_logger.warning(f"Server {server_id} (PID: {conn.pid}, request_id: {request_id}) closed stdout but is still running.")
+                    error_message = f"Empty response from server {server_id}."
                 if stderr_output:
                     error_message += f" Server stderr: {stderr_output}"
-                error_response = self._create_error_response(-32003, error_message, request_id)
-                response_json = {} # Clear any partial/invalid json
+                error_response = self._create_error_response(-32003, error_message, request_id, stderr=stderr_output)
+            elif read_error:
+                self.mcp_logger.error(f"Invalid response from {server_id} (PID: {conn.pid}, request_id: {request_id}): {read_error}")
+                stderr_output = self._read_stderr_non_blocking(conn)
+                error_message = f"Invalid response from server {server_id}: {read_error}"
+                if stderr_output:
+                    error_message += f". Server stderr: {stderr_output}"
+                error_response = self._create_error_response(-32700, error_message, request_id, stderr=stderr_output) # Parse error
+            else:
+                self.mcp_logger.debug(f"Received {frame_bytes} byte response from {server_id} (PID: {conn.pid}, request_id: {request_id})")
+                if "result" in response_json:
+                    call_status = "success"
+                elif "error" in response_json:
+                    call_status = "error"
+                    self.mcp_logger.warning(f"Server {server_id} (PID: {conn.pid}, request_id: {request_id}) returned an error: {response_json['error']}")
+                    # This is a valid JSON-RPC error response from the server, not a transport error.
+                    # We let it pass through as response_json and the caller can inspect it.
 
+        except TimeoutError as e_lock_timeout:
+            self.mcp_logger.error(f"{e_lock_timeout} (request_id: {request_id})")
+            error_response = self._create_error_response(-32000, str(e_lock_timeout), request_id)
+            self.metrics["timeouts"] += 1
+            call_status = "timeout"
         except ConnectionRefusedError as e_conn_refused:
             self.mcp_logger.error(f"Connection refused by {server_id} (method: {method}, request_id: {request_id}): {e_conn_refused}")
             error_response = self._create_error_response(-32001, f"Connection refused by server {server_id}: {str(e_conn_refused)}", request_id)
@@ -981,7 +1435,7 @@ class MCPManager:
             error_message = f"Broken pipe error with server {server_id}: {str(e_broken_pipe)}"
             if stderr_output:
                 error_message += f". Server stderr: {stderr_output}"
-            error_response = self._create_error_response(-32002, error_message, request_id)
+            error_response = self._create_error_response(-32002, error_message, request_id, stderr=stderr_output)
             self.metrics["failed_calls"] += 1
         except Exception as e_generic:
             self.mcp_logger.critical(f"Unexpected error calling {server_id} (PID: {conn.pid if conn else 'N/A'}, request_id: {request_id}): {e_generic}", exc_info=True)
@@ -989,62 +1443,251 @@ class MCPManager:
             error_message = f"Unexpected server error with {server_id}: {str(e_generic)}"
             if stderr_output:
                 error_message += f". Server stderr: {stderr_output}"
-            error_response = self._create_error_response(-32000, error_message, request_id)
+            error_response = self._create_error_response(-32000, error_message, request_id, stderr=stderr_output)
             self.metrics["failed_calls"] += 1
         finally:
             duration = time.monotonic() - start_time
-            log_status = "failure"
-            log_response = {}
-            log_error_obj = None
-
-            if error_response:
-                log_response = error_response
-                log_error_obj = error_response.get("error") # This is a dict, as per JSON-RPC spec
-            elif response_json: # This means no error_response was set
-                if "result" in response_json:
-                    log_status = "success"
-                # If "error" is in response_json, it's an error from the server itself, still a "failure" for this layer's success metric
-                # but the response itself is valid JSON-RPC
-                log_response = response_json
-                log_error_obj = response_json.get("error") # This is a dict
-            else: # Should not happen if logic is correct, but as a fallback
-                log_response = {"error": {"code": -32000, "message": "Internal error: No response or error_response set"}}
-                log_error_obj = log_response.get("error")
-
-
-            # self.enhanced_logger.log_call_end(
-            #     call_id=request_id,
-            #     status=log_status,
-            #     duration=duration,
-            #     response=log_response,
-            #     error=log_error_obj # Pass the error object (dict) or None
-            # )
-            self.mcp_logger.debug(f"Call to {server_id} method {method} (request_id: {request_id}) ended with status '{log_status}', took {duration:.4f}s")
+            # Byte counts come from the raw frame length; nothing is re-serialized
+            self.metrics_collector.record_call(
+                server_id, self._metric_tool_name(method, params), duration, call_status, frame_bytes
+            )
+            self._record_circuit_result(server_id, call_status)
+            self.mcp_logger.debug(f"Call to {server_id} method {method} (request_id: {request_id}) ended with status '{call_status}', took {duration:.4f}s")
 
         if error_response:
             return error_response
         return response_json # Return the parsed JSON or an empty dict if parsing failed but no transport error occurred
     
-    def _wait_for_response(self, process: subprocess.Popen, timeout: float) -> bool:
-        """Wait for response with timeout."""
-        import select
+    def _call_http_server_method(self, server_id: str, method: str, params: Dict, call_timeout: float) -> Dict:
+        """Call a method on a "url" server. Requests run concurrently over the pooled client."""
+        request_id = str(uuid.uuid4())
+        payload = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+            "id": request_id
+        }
+        if self.mcp_logger.isEnabledFor(logging.DEBUG):
+            self.mcp_logger.debug(f"Calling HTTP server '{server_id}', method '{method}', params: {json.dumps(params)}, timeout: {call_timeout}s, request_id: {request_id}")
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if sys.platform != 'win32':
-                ready, _, _ = select.select([process.stdout], [], [], 0.1)
-                if ready:
-                    return True
+        start_time = time.monotonic()
+        frame_bytes = 0
+        call_status = "failure"
+        try:
+            for attempt in range(2):
+                transport = self._get_http_transport(server_id)
+                try:
+                    response_json, frame_bytes = transport.request(payload, call_timeout)
+                    break
+                except MCPSessionExpiredError:
+                    if attempt:
+                        raise
+                    self.mcp_logger.info(f"MCP session for {server_id} expired; re-initializing")
+                    self._drop_http_transport(server_id, transport)
+            
+            self.mcp_logger.debug(f"Received {frame_bytes} byte response from {server_id} over HTTP (request_id: {request_id})")
+            if "result" in response_json:
+                call_status = "success"
+            elif "error" in response_json:
+                call_status = "error"
+                self.mcp_logger.warning(f"Server {server_id} (request_id: {request_id}) returned an error: {response_json['error']}")
+            return response_json
+        except TimeoutError:
+            self.mcp_logger.error(f"Timeout waiting for HTTP response from {server_id} (method: {method}, request_id: {request_id})")
+            self.metrics["timeouts"] += 1
+            call_status = "timeout"
+            return self._create_error_response(-32000, f"Timeout waiting for response from {server_id} (method: {method}).", request_id)
+        except FrameTooLargeError as e:
+            frame_bytes = e.size
+            self.mcp_logger.error(f"Invalid response from {server_id} (request_id: {request_id}): {e}")
+            return self._create_error_response(-32700, f"Invalid response from server {server_id}: response exceeds maxMessageBytes ({e.limit} bytes)", request_id)
+        except (EOFError, ValueError) as e:
+            self.mcp_logger.error(f"Invalid response from {server_id} (request_id: {request_id}): {e}")
+            return self._create_error_response(-32700, f"Invalid response from server {server_id}: {e}", request_id)
+        except ConnectionError as e:
+            self.mcp_logger.error(f"Connection error for {server_id} (method: {method}, request_id: {request_id}): {e}")
+            self.metrics["failed_calls"] += 1
+            return self._create_error_response(-32001, f"Connection error with server {server_id}: {e}", request_id)
+        finally:
+            duration = time.monotonic() - start_time
+            self.metrics_collector.record_call(
+                server_id, self._metric_tool_name(method, params), duration, call_status, frame_bytes
+            )
+            self._record_circuit_result(server_id, call_status)
+            self.mcp_logger.debug(f"Call to {server_id} method {method} (request_id: {request_id}) ended with status '{call_status}', took {duration:.4f}s")
+    
+    def _get_live_connection(self, server_id: str) -> subprocess.Popen:
+        """
+        Return the running process for a server, (re)starting it if needed.
+        
+        Reconnection is serialized per server, so a slow spawn and handshake
+        never holds the global manager lock.
+        """
+        with self._lock:
+            conn = self.connections.get(server_id)
+            if conn is not None and conn.poll() is None:
+                return conn
+            reconnect_lock = self._reconnect_locks.setdefault(server_id, threading.RLock())
+        
+        with reconnect_lock:
+            with self._lock:
+                conn = self.connections.get(server_id)
+                if conn is not None and conn.poll() is None:
+                    return conn # Another caller reconnected while we waited
+                dead_process = self.connections.pop(server_id, None)
+            
+            if dead_process is not None:
+                self.mcp_logger.info(f"Process for {server_id} terminated. Re-initializing.")
+                stderr_output = self._read_stderr_non_blocking(dead_process)
+                if stderr_output:
+                    self.mcp_logger.warning(f"Last stderr from {server_id} (PID: {dead_process.pid}) before exit: {stderr_output}")
+                self._release_process_io(dead_process)
             else:
-                # Windows fallback
-                time.sleep(0.1)
-                if process.stdout.readable():
-                    return True
+                self.mcp_logger.info(f"No active connection to {server_id}. Initializing.")
             
-            if process.poll() is not None:
+            promoted = self._promote_standby(server_id)
+            if promoted is not None:
+                return promoted
+            if not self._initialize_server(server_id):
+                # _initialize_server logs its own errors
+                raise ConnectionError(f"Failed to initialize or connect to server: {server_id}")
+            with self._lock:
+                return self.connections[server_id]
+
+    def _get_io_lock(self, server_id: str) -> threading.Lock:
+        """Return the lock serializing request/response exchanges with a server."""
+        with self._lock:
+            lock = self._io_locks.get(server_id)
+            if lock is None:
+                lock = self._io_locks[server_id] = threading.Lock()
+            return lock
+
+    def _read_response(self, process: subprocess.Popen, request_id: str,
+                       timeout: float) -> Tuple[Optional[Dict], int, Optional[str]]:
+        """
+        Read messages from a server until the response to request_id arrives.
+        
+        Notifications, server-initiated requests and late responses to earlier
+        (timed out) requests are skipped, so the stream stays in sync.
+        
+        Returns:
+            Tuple of (response, frame size in bytes, error). error is None on
+            success, "timeout", "eof" or a description of an invalid message.
+        """
+        reader = self._frame_readers.get(process.pid)
+        if reader is None:
+            reader = self._frame_readers[process.pid] = JSONRPCFrameReader(
+                process.stdout, max_message_bytes=self.max_message_bytes
+            )
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, 0, "timeout"
+            try:
+                frame = reader.read_frame(remaining)
+            except FrameTooLargeError as e:
+                return None, e.size, f"response exceeds maxMessageBytes ({e.limit} bytes)"
+            except EOFError:
+                return None, 0, "eof"
+            if frame is None:
+                return None, 0, "timeout"
+            
+            try:
+                message = json.loads(frame)
+            except ValueError as e:  # JSONDecodeError and UnicodeDecodeError
+                preview = bytes(frame[:200]).decode('utf-8', errors='replace')
+                return None, len(frame), f"invalid JSON ({e}). Raw: '{preview}'"
+            if not isinstance(message, dict):
+                return None, len(frame), f"unexpected JSON-RPC message type {type(message).__name__}"
+            
+            if message.get("id") == request_id and "method" not in message:
+                return message, len(frame), None
+            if "method" in message:
+                self.mcp_logger.debug(f"Skipping server message '{message.get('method')}' (PID: {process.pid}) while waiting for {request_id}")
+            else:
+                self.mcp_logger.warning(f"Discarding stale response id '{message.get('id')}' (PID: {process.pid}) while waiting for {request_id}")
+
+    def _idle_since(self, server_id: str) -> float:
+        """Timestamp of the last activity of a running server."""
+        server = self.servers.get(server_id, {})
+        last_activity = server.get("last_used") or server.get("started_at")
+        if not last_activity:
+            return 0.0
+        try:
+            return datetime.fromisoformat(last_activity).timestamp()
+        except ValueError:
+            return 0.0
+
+    def _evict_server(self, server_id: str, reason: str) -> bool:
+        """
+        Stop a running server so that it restarts transparently on next use.
+        
+        Servers with a call in flight are left alone. Callers that grabbed the
+        connection just before eviction notice the swap and reconnect.
+        """
+        with self._lock:
+            io_lock = self._get_io_lock(server_id)
+            if not io_lock.acquire(blocking=False):
                 return False
+            try:
+                process = self.connections.pop(server_id, None)
+                if process is None:
+                    return False
+                standby = self._standby.pop(server_id, None)
+                server = self.servers.get(server_id)
+                if server is not None:
+                    server["status"] = "ready"
+                    server["pid"] = None
+            finally:
+                io_lock.release()
         
-        return False
+        self.mcp_logger.info(f"Stopping {server_id} (PID: {process.pid}): {reason}")
+        self._stop_server_process(server_id, process)
+        if standby is not None:
+            self._stop_server_process(server_id, standby)
+        return True
+
+    def _enforce_live_server_cap(self, exclude: Optional[str] = None):
+        """Evict least recently used servers so a new one fits under maxLiveServers."""
+        if self.max_live_servers <= 0:
+            return
+        with self._lock:
+            live = [sid for sid in self.connections if sid != exclude]
+            candidates = sorted(
+                (sid for sid in live if self.servers.get(sid, {}).get("evictable", True)),
+                key=lambda sid: (self._idle_since(sid), self.servers[sid].get("usage_count", 0))
+            )
+        excess = len(live) + 1 - self.max_live_servers
+        for server_id in candidates:
+            if excess <= 0:
+                break
+            if self._evict_server(server_id, f"LRU eviction (maxLiveServers={self.max_live_servers})"):
+                excess -= 1
+        if excess > 0:
+            self.mcp_logger.warning(f"Running {len(live) + 1} servers, above maxLiveServers={self.max_live_servers}; no idle evictable server to stop")
+
+    def _ensure_reaper(self):
+        """Start the idle reaper thread once the first server is running."""
+        if self.idle_timeout <= 0 or (self._reaper_thread and self._reaper_thread.is_alive()):
+            return
+        self._reaper_stop.clear()
+        self._reaper_thread = threading.Thread(target=self._reap_idle_servers, name="mcp-idle-reaper", daemon=True)
+        self._reaper_thread.start()
+
+    def _reap_idle_servers(self):
+        """Periodically stop evictable servers idle for longer than idleTimeout."""
+        interval = max(1.0, min(30.0, self.idle_timeout / 4))
+        while not self._reaper_stop.wait(interval):
+            cutoff = time.time() - self.idle_timeout
+            with self._lock:
+                idle = [
+                    sid for sid in self.connections
+                    if self.servers.get(sid, {}).get("evictable", True) and self._idle_since(sid) < cutoff
+                ]
+            for server_id in idle:
+                self._evict_server(server_id, f"idle for more than {self.idle_timeout:.0f}s")
 
     def get_available_tools(self) -> List[str]:
         """Get all ready servers."""
@@ -1069,13 +1712,14 @@ class MCPManager:
     
     def get_server_capabilities(self, server_id: str) -> Dict:
         """Get discovered capabilities for a specific server."""
+        # Ensure that capabilities for this server_id are attempted to be loaded if not present.
+        # This can happen if initialize_tools wasn't called or a server was added dynamically.
+        # Discovery may start the server, so it runs without holding the manager lock.
+        if server_id not in self.capabilities and server_id in self.servers:
+            self.mcp_logger.info(f"Capabilities for {server_id} not yet discovered. Attempting discovery now.")
+            self._discover_capabilities(server_id) # This will populate self.capabilities[server_id]
+        
         with self._lock:
-            # Ensure that capabilities for this server_id are attempted to be loaded if not present.
-            # This can happen if initialize_tools wasn't called or a server was added dynamically.
-            if server_id not in self.capabilities and server_id in self.servers:
-                self.mcp_logger.info(f"Capabilities for {server_id} not yet discovered. Attempting discovery now.")
-                self._discover_capabilities(server_id) # This will populate self.capabilities[server_id]
-            
             # Fallback to server's stored capabilities if primary self.capabilities is missing entry
             # though _discover_capabilities should ensure self.capabilities[server_id] exists.
             caps = self.capabilities.get(server_id, self.servers.get(server_id, {}).get('capabilities', {}))
@@ -1086,10 +1730,18 @@ class MCPManager:
         """Get usage metrics for MCP servers."""
         return self.metrics.copy()
     
+    def generate_performance_report(self) -> str:
+        """Human-readable performance report including latency percentiles."""
+        return self.metrics_collector.generate_performance_report()
+    
     def get_health_report(self) -> Dict:
         """Get comprehensive health report for all MCP servers."""
         try:
             health_data = self.metrics_collector.get_system_health()
+            health_data["response_cache"] = self.response_cache.get_stats()
+            health_data["circuit_breakers"] = {
+                server_id: breaker.snapshot() for server_id, breaker in list(self._breakers.items())
+            }
             
             # Log server health checks
             for server_id in self.servers.keys():
@@ -1106,6 +1758,33 @@ class MCPManager:
         """Check if MCP tools are enabled."""
         return self.enabled
     
+    def _stop_server_process(self, server_id: str, process: subprocess.Popen):
+        """Close stdin, terminate (then kill) a server process and release its I/O helpers."""
+        try:
+            if process.stdin:
+                try:
+                    process.stdin.close()
+                except OSError as e_stdin:
+                    self.mcp_logger.debug(f"Error closing stdin for {server_id} (PID: {process.pid}): {e_stdin}")
+            
+            if process.poll() is None: # Check if process is still running
+                process.terminate()
+                try:
+                    process.wait(timeout=2) # Reduced timeout slightly
+                    self.mcp_logger.debug(f"Gracefully terminated process for {server_id} (PID: {process.pid})")
+                except subprocess.TimeoutExpired:
+                    self.mcp_logger.warning(f"Timeout terminating {server_id} (PID: {process.pid}), attempting to kill.")
+                    process.kill()
+                    process.wait(timeout=1) # Wait for kill
+                    self.mcp_logger.debug(f"Killed process for {server_id} (PID: {process.pid})")
+                except Exception as e_wait:
+                    self.mcp_logger.error(f"Error during process wait for {server_id} (PID: {process.pid}): {e_wait}")
+            else:
+                self.mcp_logger.debug(f"Process for {server_id} (PID: {process.pid}) already terminated with code: {process.returncode}")
+            self._release_process_io(process)
+        except Exception as e:
+            self.mcp_logger.error(f"Error closing connection to '{server_id}': {e}", exc_info=True)
+    
     def shutdown(self):
         """Clean shutdown of all MCP connections."""
         if not self.enabled:
@@ -1113,44 +1792,38 @@ class MCPManager:
         
         self.mcp_logger.info("=== MCP MANAGER SHUTDOWN ===")
         
+        # Servers owned by the broker stay warm for the next run
+        if self._broker is not None:
+            self._broker.close()
+            self._broker = None
+        
+        self._reaper_stop.set()
+        
+        with self._lock:
+            self._shutting_down = True
+            standbys, self._standby = self._standby, {}
+        for server_id, process in standbys.items():
+            self._stop_server_process(server_id, process)
+        
         # Close connections
         if self.connections:
             self.mcp_logger.info(f"Closing {len(self.connections)} connections")
-            for server_id, connection_obj in self.connections.items(): # Renamed to connection_obj for clarity
-                try:
-                    process = None
-                    # Check if connection_obj is the Popen process itself or a dict containing it
-                    if isinstance(connection_obj, subprocess.Popen):
-                        process = connection_obj
-                    elif isinstance(connection_obj, dict) and "process" in connection_obj and isinstance(connection_obj["process"], subprocess.Popen):
-                        process = connection_obj["process"]
-                    else:
-                        self.mcp_logger.warning(f"Unexpected connection object type for {server_id}: {type(connection_obj)}. Skipping shutdown for this connection.")
-                        continue
-                    
-                    if process.stdin:
-                        try:
-                            process.stdin.close()
-                        except OSError as e_stdin:
-                            self.mcp_logger.debug(f"Error closing stdin for {server_id} (PID: {process.pid}): {e_stdin}")
-                    
-                    if process.poll() is None: # Check if process is still running
-                        process.terminate()
-                        try:
-                            process.wait(timeout=2) # Reduced timeout slightly
-                            self.mcp_logger.debug(f"Gracefully terminated process for {server_id} (PID: {process.pid})")
-                        except subprocess.TimeoutExpired:
-                            self.mcp_logger.warning(f"Timeout terminating {server_id} (PID: {process.pid}), attempting to kill.")
-                            process.kill()
-                            process.wait(timeout=1) # Wait for kill
-                            self.mcp_logger.debug(f"Killed process for {server_id} (PID: {process.pid})")
-                        except Exception as e_wait:
-                            self.mcp_logger.error(f"Error during process wait for {server_id} (PID: {process.pid}): {e_wait}")
-                    else:
-                        self.mcp_logger.debug(f"Process for {server_id} (PID: {process.pid}) already terminated with code: {process.returncode}")
-
-                except Exception as e:
-                    self.mcp_logger.error(f"Error closing connection to '{server_id}': {e}", exc_info=True)
+            for server_id, connection_obj in list(self.connections.items()): # Renamed to connection_obj for clarity
+                # Check if connection_obj is the Popen process itself or a dict containing it
+                if isinstance(connection_obj, subprocess.Popen):
+                    process = connection_obj
+                elif isinstance(connection_obj, dict) and "process" in connection_obj and isinstance(connection_obj["process"], subprocess.Popen):
+                    process = connection_obj["process"]
+                else:
+                    self.mcp_logger.warning(f"Unexpected connection object type for {server_id}: {type(connection_obj)}. Skipping shutdown for this connection.")
+                    continue
+                self._stop_server_process(server_id, process)
         
         self.connections.clear()
+        
+        with self._lock:
+            transports, self._http_transports = self._http_transports, {}
+        for server_id, transport in transports.items():
+            self.mcp_logger.info(f"Closing HTTP session to {server_id}")
+            transport.close()
         self.mcp_logger.info("MCP Manager shutdown complete") 
\ No newline at end of file
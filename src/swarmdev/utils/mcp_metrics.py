@@ -5,12 +5,13 @@ This module provides detailed metrics collection, performance tracking,
 and structured logging for MCP (Model Context Protocol) operations.
 """
 
+import bisect
 import time
 import json
 import logging
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 from pathlib import Path
@@ -42,6 +43,7 @@ class MCPToolHealth:
     successful_calls: int = 0
     failed_calls: int = 0
     timeout_calls: int = 0
+    error_calls: int = 0  # Failed with a JSON-RPC error reply; the server itself responded
     avg_response_time: float = 0.0
     last_success_time: Optional[str] = None
     last_failure_time: Optional[str] = None
@@ -63,6 +65,76 @@ class MCPSystemMetrics:
     uptime_start: str = ""
     last_reset_time: str = ""
 
+# Fixed log-scale latency buckets: 4 per doubling from 50us to ~15 minutes,
+# so any percentile is reported within ~19% of the true value.
+LATENCY_BUCKET_BOUNDS: List[float] = [5e-5 * 2 ** (i / 4) for i in range(97)]
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram for one (server, tool) pair.
+
+    Recording is a bisect over precomputed bounds plus a few counter
+    updates, so it is cheap enough to stay enabled for every call.
+    Not thread-safe on its own; the collector serializes access.
+    """
+
+    __slots__ = ("counts", "count", "total_duration", "max_duration",
+                 "total_bytes", "max_bytes", "failures", "timeouts")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.total_bytes = 0
+        self.max_bytes = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def record(self, duration: float, status: str, response_bytes: int = 0):
+        self.counts[bisect.bisect_left(LATENCY_BUCKET_BOUNDS, duration)] += 1
+        self.count += 1
+        self.total_duration += duration
+        if duration > self.max_duration:
+            self.max_duration = duration
+        self.total_bytes += response_bytes
+        if response_bytes > self.max_bytes:
+            self.max_bytes = response_bytes
+        if status != "success":
+            self.failures += 1
+            if status == "timeout":
+                self.timeouts += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index >= len(LATENCY_BUCKET_BOUNDS):
+                    return self.max_duration
+                return min(LATENCY_BUCKET_BOUNDS[index], self.max_duration)
+        return self.max_duration
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "mean": self.total_duration / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+            "max": self.max_duration,
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
 class MCPLogger:
     """Enhanced MCP logging with structured format and performance tracking."""
     
@@ -72,7 +144,8 @@ class MCPLogger:
         self.logs_dir.mkdir(parents=True, exist_ok=True)
         
         self.logger = self._setup_logger()
-        self.metrics_collector = MCPMetricsCollector()
+        # Share the process-wide collector so health reports see these calls
+        self.metrics_collector = get_metrics_collector()
         
     def _setup_logger(self) -> logging.Logger:
         """Set up structured MCP logger."""
@@ -146,14 +219,17 @@ class MCPLogger:
         self.metrics_collector.start_call(metrics)
     
     def log_call_end(self, call_id: str, status: str, duration: float,
-                    response: Dict = None, error: Exception = None):
+                    response: Dict = None, error: Exception = None,
+                    response_bytes: Optional[int] = None):
         """Log the end of an MCP call with results."""
+        if response_bytes is None:
+            response_bytes = len(str(response)) if response else 0
         call_data = {
             "event": "mcp_call_end",
             "call_id": call_id,
             "status": status,
             "duration": round(duration, 3),
-            "response_size": len(str(response)) if response else 0,
+            "response_size": response_bytes,
             "has_error": error is not None,
             "timestamp": datetime.now().isoformat()
         }
@@ -169,7 +245,7 @@ class MCPLogger:
         
         # Complete metrics tracking
         self.metrics_collector.end_call(
-            call_id, status, duration, response, error
+            call_id, status, duration, response, error, response_bytes
         )
     
     def log_connection_event(self, tool_id: str, event: str, details: Dict = None):
@@ -228,6 +304,7 @@ class MCPMetricsCollector:
         self.active_calls: Dict[str, MCPCallMetrics] = {}
         self.call_history: deque = deque(maxlen=max_call_history)
         self.tool_metrics: Dict[str, MCPToolHealth] = {}
+        self.latency: Dict[Tuple[str, str], LatencyHistogram] = {}
         self.system_metrics = MCPSystemMetrics(
             uptime_start=datetime.now().isoformat()
         )
@@ -245,7 +322,8 @@ class MCPMetricsCollector:
                 )
     
     def end_call(self, call_id: str, status: str, duration: float,
-                response: Dict = None, error: Exception = None):
+                response: Dict = None, error: Exception = None,
+                response_bytes: Optional[int] = None):
         """Complete tracking for an MCP call."""
         with self.lock:
             if call_id not in self.active_calls:
@@ -260,65 +338,113 @@ class MCPMetricsCollector:
                 metrics.error_type = type(error).__name__
                 metrics.error_message = str(error)
             
-            if response:
+            if response_bytes is not None:
+                metrics.response_size = response_bytes
+            elif response:
                 metrics.response_size = len(str(response))
             
-            # Update tool metrics
-            tool_health = self.tool_metrics[metrics.tool_id]
-            tool_health.total_calls += 1
-            
-            if status == "success":
-                tool_health.successful_calls += 1
-                tool_health.consecutive_failures = 0
-                tool_health.last_success_time = datetime.now().isoformat()
-            else:
-                tool_health.failed_calls += 1
-                tool_health.consecutive_failures += 1
-                tool_health.last_failure_time = datetime.now().isoformat()
-                
-                if status == "timeout":
-                    tool_health.timeout_calls += 1
-            
-            # Update response time average
-            if tool_health.total_calls > 0:
-                tool_health.avg_response_time = (
-                    (tool_health.avg_response_time * (tool_health.total_calls - 1) + duration) 
-                    / tool_health.total_calls
-                )
-            
-            # Calculate health score
-            success_rate = tool_health.successful_calls / tool_health.total_calls
-            failure_penalty = min(tool_health.consecutive_failures * 0.1, 0.5)
-            timeout_penalty = min(tool_health.timeout_calls / tool_health.total_calls * 0.3, 0.3)
-            
-            tool_health.health_score = max(0.0, success_rate - failure_penalty - timeout_penalty)
-            
-            # Determine connection status
-            if tool_health.health_score >= 0.8:
-                tool_health.connection_status = "healthy"
-            elif tool_health.health_score >= 0.5:
-                tool_health.connection_status = "degraded"
-            else:
-                tool_health.connection_status = "unhealthy"
-            
-            # Update system metrics
-            self.system_metrics.total_calls += 1
-            if status == "success":
-                self.system_metrics.successful_calls += 1
-            else:
-                self.system_metrics.failed_calls += 1
-                if status == "timeout":
-                    self.system_metrics.timeout_calls += 1
+            self._update_health(metrics.tool_id, status, duration)
+            self.call_history.append(metrics)
+    
+    def record_call(self, tool_id: str, tool_name: str, duration: float,
+                    status: str, response_bytes: int = 0):
+        """
+        Record a completed call without start/end bookkeeping.
+        
+        This is the hot-path entry point used by the MCP Manager: it feeds
+        the per-(server, tool) latency histogram and the health metrics.
+        response_bytes should be the raw frame length, not a re-serialization.
+        """
+        with self.lock:
+            key = (tool_id, tool_name)
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = LatencyHistogram()
+            histogram.record(duration, status, response_bytes)
             
-            # Update system response time average
-            if self.system_metrics.total_calls > 0:
-                self.system_metrics.avg_response_time = (
-                    (self.system_metrics.avg_response_time * (self.system_metrics.total_calls - 1) + duration)
-                    / self.system_metrics.total_calls
-                )
+            self._update_health(tool_id, status, duration)
+            self.call_history.append(MCPCallMetrics(
+                call_id="",
+                tool_id=tool_id,
+                method=tool_name,
+                start_time=0.0,
+                duration=duration,
+                status=status,
+                response_size=response_bytes
+            ))
+    
+    def _update_health(self, tool_id: str, status: str, duration: float):
+        """Update tool and system health for a finished call. Caller holds the lock."""
+        tool_health = self.tool_metrics.get(tool_id)
+        if tool_health is None:
+            tool_health = self.tool_metrics[tool_id] = MCPToolHealth(tool_id=tool_id)
+        tool_health.total_calls += 1
+        
+        if status == "success":
+            tool_health.successful_calls += 1
+            tool_health.consecutive_failures = 0
+            tool_health.last_success_time = datetime.now().isoformat()
+        elif status == "error":
+            # An error reply still proves the server is up, so it does not
+            # count towards consecutive failures or lower the health score
+            tool_health.failed_calls += 1
+            tool_health.error_calls += 1
+            tool_health.consecutive_failures = 0
+        else:
+            tool_health.failed_calls += 1
+            tool_health.consecutive_failures += 1
+            tool_health.last_failure_time = datetime.now().isoformat()
             
-            # Add to history
-            self.call_history.append(metrics)
+            if status == "timeout":
+                tool_health.timeout_calls += 1
+        
+        # Update response time average
+        tool_health.avg_response_time = (
+            (tool_health.avg_response_time * (tool_health.total_calls - 1) + duration) 
+            / tool_health.total_calls
+        )
+        
+        # Calculate health score
+        success_rate = (tool_health.successful_calls + tool_health.error_calls) / tool_health.total_calls
+        failure_penalty = min(tool_health.consecutive_failures * 0.1, 0.5)
+        timeout_penalty = min(tool_health.timeout_calls / tool_health.total_calls * 0.3, 0.3)
+        
+        tool_health.health_score = max(0.0, success_rate - failure_penalty - timeout_penalty)
+        
+        # Determine connection status
+        if tool_health.health_score >= 0.8:
+            tool_health.connection_status = "healthy"
+        elif tool_health.health_score >= 0.5:
+            tool_health.connection_status = "degraded"
+        else:
+            tool_health.connection_status = "unhealthy"
+        
+        # Update system metrics
+        self.system_metrics.total_calls += 1
+        if status == "success":
+            self.system_metrics.successful_calls += 1
+        else:
+            self.system_metrics.failed_calls += 1
+            if status == "timeout":
+                self.system_metrics.timeout_calls += 1
+        
+        # Update system response time average
+        self.system_metrics.avg_response_time = (
+            (self.system_metrics.avg_response_time * (self.system_metrics.total_calls - 1) + duration)
+            / self.system_metrics.total_calls
+        )
+    
+    def get_latency_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Latency percentiles and byte counts keyed by "server/tool"."""
+        with self.lock:
+            return self._summarize_latency()
+    
+    def _summarize_latency(self) -> Dict[str, Dict[str, Any]]:
+        """Caller must hold the lock."""
+        return {
+            f"{tool_id}/{tool_name}": histogram.summary()
+            for (tool_id, tool_name), histogram in sorted(self.latency.items())
+        }
     
     def get_tool_health(self, tool_id: str) -> Optional[MCPToolHealth]:
         """Get health metrics for a specific tool."""
@@ -341,7 +467,8 @@ class MCPMetricsCollector:
                 "system_metrics": asdict(self.system_metrics),
                 "tool_health": {tid: asdict(health) for tid, health in self.tool_metrics.items()},
                 "active_calls": len(self.active_calls),
-                "recent_performance": self._get_recent_performance()
+                "recent_performance": self._get_recent_performance(),
+                "latency": self._summarize_latency()
             }
     
     def _get_recent_performance(self) -> Dict[str, Any]:
@@ -392,6 +519,18 @@ class MCPMetricsCollector:
         
         report.append("")
         
+        # Latency distribution per server/tool
+        if health_data["latency"]:
+            report.append("LATENCY (p50 / p90 / p99 / max):")
+            for key, summary in health_data["latency"].items():
+                report.append(
+                    f"  {key}: {summary['count']} calls, "
+                    f"{summary['p50'] * 1000:.1f} / {summary['p90'] * 1000:.1f} / "
+                    f"{summary['p99'] * 1000:.1f} / {summary['max'] * 1000:.1f} ms, "
+                    f"{summary['total_bytes']:,} bytes"
+                )
+            report.append("")
+        
         # Recent trends
         recent = health_data["recent_performance"]
         if recent["calls"] > 0:
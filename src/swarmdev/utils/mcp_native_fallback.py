@@ -0,0 +1,106 @@
+"""
+In-process fallbacks for MCP servers.
+
+Used by the MCP Manager while a server's circuit is open, so that core
+operations keep working when a container is unhealthy. Handlers take the
+JSON-RPC method and params and return a JSON-RPC style response, or None
+when they cannot serve the request.
+"""
+
+import os
+import stat
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+NativeFallback = Callable[[str, Dict], Optional[Dict]]
+
+
+class NativeFilesystemFallback:
+    """
+    Minimal stand-in for the filesystem MCP server.
+
+    Supports the tools the agents rely on (reading, writing, listing and
+    creating directories) with the same /workspace path convention and the
+    same text result format. Paths are confined to the project directory,
+    which is what the filesystem container has mounted.
+    """
+
+    def __init__(self, project_dir: str):
+        self.root = os.path.realpath(project_dir)
+        self._tools: Dict[str, Callable[[Dict], str]] = {
+            "read_file": self._read_file,
+            "read_multiple_files": self._read_multiple_files,
+            "write_file": self._write_file,
+            "create_directory": self._create_directory,
+            "list_directory": self._list_directory,
+            "get_file_info": self._get_file_info,
+        }
+
+    def __call__(self, method: str, params: Dict) -> Optional[Dict]:
+        if method != "tools/call" or not isinstance(params, dict):
+            return None
+        handler = self._tools.get(params.get("name"))
+        if handler is None:
+            return None
+
+        try:
+            text = handler(params.get("arguments") or {})
+            return {"jsonrpc": "2.0", "id": None, "result": {"content": [{"type": "text", "text": text}]}}
+        except (OSError, ValueError, KeyError) as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": None,
+                "result": {"content": [{"type": "text", "text": f"Error: {e}"}], "isError": True},
+            }
+
+    def _resolve(self, path: str) -> str:
+        relative = str(path)
+        if relative.startswith("/workspace"):
+            relative = relative[len("/workspace"):]
+        resolved = os.path.realpath(os.path.join(self.root, relative.lstrip("/")))
+        if resolved != self.root and not resolved.startswith(self.root + os.sep):
+            raise ValueError(f"Access denied - path outside allowed directories: {path}")
+        return resolved
+
+    def _read_file(self, arguments: Dict) -> str:
+        with open(self._resolve(arguments["path"]), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _read_multiple_files(self, arguments: Dict) -> str:
+        parts: List[str] = []
+        for path in arguments["paths"]:
+            try:
+                parts.append(f"{path}:\n{self._read_file({'path': path})}\n")
+            except (OSError, ValueError) as e:
+                parts.append(f"{path}: Error - {e}")
+        return "\n---\n".join(parts)
+
+    def _write_file(self, arguments: Dict) -> str:
+        target = self._resolve(arguments["path"])
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(arguments["content"])
+        return f"Successfully wrote to {arguments['path']}"
+
+    def _create_directory(self, arguments: Dict) -> str:
+        os.makedirs(self._resolve(arguments["path"]), exist_ok=True)
+        return f"Successfully created directory {arguments['path']}"
+
+    def _list_directory(self, arguments: Dict) -> str:
+        target = self._resolve(arguments["path"])
+        entries = []
+        for entry in sorted(os.scandir(target), key=lambda e: e.name):
+            entries.append(f"{'[DIR]' if entry.is_dir() else '[FILE]'} {entry.name}")
+        return "\n".join(entries)
+
+    def _get_file_info(self, arguments: Dict) -> str:
+        info = os.stat(self._resolve(arguments["path"]))
+        fields = {
+            "size": info.st_size,
+            "created": datetime.fromtimestamp(info.st_ctime).isoformat(),
+            "modified": datetime.fromtimestamp(info.st_mtime).isoformat(),
+            "accessed": datetime.fromtimestamp(info.st_atime).isoformat(),
+            "isDirectory": stat.S_ISDIR(info.st_mode),
+            "isFile": stat.S_ISREG(info.st_mode),
+            "permissions": oct(info.st_mode)[-3:],
+        }
+        return "\n".join(f"{key}: {value}" for key, value in fields.items())
@@ -0,0 +1,280 @@
+"""
+Response cache for idempotent MCP tool calls.
+
+Agents repeat the same read-only tool calls many times per iteration
+(reading manifest files, recursive listings, library docs, URL fetches).
+This module keeps those responses in memory with per-tool policies and
+drops filesystem entries as soon as a write touches the same path.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class CachePolicy:
+    """Caching policy for a single tool name."""
+    ttl: float = 60.0
+    max_bytes: int = 4 * 1024 * 1024
+    max_entries: int = 256
+    path_scoped: bool = False
+
+    @classmethod
+    def from_config(cls, config: Dict, base: Optional["CachePolicy"] = None) -> "CachePolicy":
+        """Build a policy from a camelCase config dict, falling back to base."""
+        base = base or cls()
+        return cls(
+            ttl=float(config.get("ttl", base.ttl)),
+            max_bytes=int(config.get("maxBytes", base.max_bytes)),
+            max_entries=int(config.get("maxEntries", base.max_entries)),
+            path_scoped=bool(config.get("pathScoped", base.path_scoped)),
+        )
+
+
+# Read-only tools that are safe to cache by default. Filesystem reads are
+# path scoped so that writes to the same path invalidate them.
+DEFAULT_CACHE_POLICIES: Dict[str, CachePolicy] = {
+    "read_file": CachePolicy(ttl=30.0, max_bytes=8 * 1024 * 1024, max_entries=512, path_scoped=True),
+    "read_multiple_files": CachePolicy(ttl=30.0, max_bytes=8 * 1024 * 1024, max_entries=128, path_scoped=True),
+    "list_files": CachePolicy(ttl=30.0, max_bytes=4 * 1024 * 1024, max_entries=128, path_scoped=True),
+    "list_directory": CachePolicy(ttl=30.0, max_bytes=4 * 1024 * 1024, max_entries=256, path_scoped=True),
+    "directory_tree": CachePolicy(ttl=30.0, max_bytes=4 * 1024 * 1024, max_entries=64, path_scoped=True),
+    "get_file_info": CachePolicy(ttl=30.0, max_bytes=1 * 1024 * 1024, max_entries=512, path_scoped=True),
+    "search_files": CachePolicy(ttl=30.0, max_bytes=2 * 1024 * 1024, max_entries=128, path_scoped=True),
+    "resolve-library-id": CachePolicy(ttl=3600.0, max_bytes=2 * 1024 * 1024, max_entries=256),
+    "get-library-docs": CachePolicy(ttl=3600.0, max_bytes=16 * 1024 * 1024, max_entries=128),
+    "fetch": CachePolicy(ttl=300.0, max_bytes=16 * 1024 * 1024, max_entries=128),
+}
+
+# Filesystem tools that modify paths and therefore invalidate cached reads.
+WRITE_TOOLS = {
+    "write_file", "edit_file", "create_directory", "delete_file", "move_file",
+}
+
+# Servers whose tools can change the working tree in ways we cannot see
+# (arbitrary shell commands, git checkouts). Any call drops path-scoped entries.
+OPAQUE_WRITE_SERVERS = {"shell", "git"}
+
+PATH_ARGUMENT_KEYS = ("path", "paths", "source", "destination")
+
+
+def normalize_tool_path(path: str) -> str:
+    """Normalize a tool path argument so /workspace/x, ./x and x compare equal."""
+    path = str(path).strip()
+    if path.startswith("/workspace"):
+        path = path[len("/workspace"):]
+    path = path.lstrip("/")
+    normalized = os.path.normpath(path) if path else "."
+    return "" if normalized == "." else normalized
+
+
+def _paths_overlap(first: str, second: str) -> bool:
+    """True when one path equals, contains or is contained by the other."""
+    if first == second or first == "" or second == "":
+        return True
+    return first.startswith(second + os.sep) or second.startswith(first + os.sep)
+
+
+def extract_tool_paths(arguments: Dict) -> List[str]:
+    """Collect normalized path arguments from a tool call."""
+    paths = []
+    for key in PATH_ARGUMENT_KEYS:
+        value = arguments.get(key)
+        if isinstance(value, str):
+            paths.append(normalize_tool_path(value))
+        elif isinstance(value, list):
+            paths.extend(normalize_tool_path(item) for item in value if isinstance(item, str))
+    return paths
+
+
+class MCPResponseCache:
+    """
+    Thread-safe LRU cache of successful MCP ``tools/call`` responses.
+
+    Entries are stored as serialized JSON so every hit returns a fresh
+    object that callers can mutate freely, and so the byte budget of each
+    policy is measured on the real payload size.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", True)
+
+        self.policies: Dict[str, CachePolicy] = dict(DEFAULT_CACHE_POLICIES)
+        for tool_name, policy_config in settings.get("policies", {}).items():
+            if policy_config is False or (isinstance(policy_config, dict) and policy_config.get("enabled") is False):
+                self.policies.pop(tool_name, None)
+            elif isinstance(policy_config, dict):
+                self.policies[tool_name] = CachePolicy.from_config(policy_config, self.policies.get(tool_name))
+
+        self.opaque_write_servers = set(settings.get("invalidateOnServers", OPAQUE_WRITE_SERVERS))
+
+        # tool_name -> OrderedDict[key -> (expires_at, payload, paths)]
+        self._entries: Dict[str, "OrderedDict[str, Tuple[float, str, List[str]]]"] = {}
+        self._bytes: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # Bumped on every invalidation so a read that was in flight while a
+        # write happened cannot store its (possibly stale) response
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _tool_stats(self, tool_name: str) -> Dict[str, int]:
+        stats = self._stats.get(tool_name)
+        if stats is None:
+            stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+            self._stats[tool_name] = stats
+        return stats
+
+    @staticmethod
+    def _make_key(server_id: str, arguments: Dict) -> str:
+        return server_id + "|" + json.dumps(arguments, sort_keys=True, default=str)
+
+    def is_cacheable(self, server_id: str, params: Dict) -> bool:
+        """Whether a tools/call request is covered by a cache policy."""
+        return self.enabled and isinstance(params, dict) and params.get("name") in self.policies
+
+    def get(self, server_id: str, params: Dict) -> Optional[Dict]:
+        """Return a cached response for the request, or None on a miss."""
+        if not self.is_cacheable(server_id, params):
+            return None
+
+        tool_name = params["name"]
+        key = self._make_key(server_id, params.get("arguments", {}))
+        with self._lock:
+            stats = self._tool_stats(tool_name)
+            entries = self._entries.get(tool_name)
+            entry = entries.get(key) if entries else None
+            if entry is None:
+                stats["misses"] += 1
+                return None
+            expires_at, payload, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(tool_name, key)
+                stats["misses"] += 1
+                return None
+            entries.move_to_end(key)
+            stats["hits"] += 1
+        return json.loads(payload)
+
+    def put(self, server_id: str, params: Dict, response: Dict, generation: Optional[int] = None):
+        """
+        Store a successful response according to the tool's policy.
+
+        If generation is given and an invalidation happened since it was
+        read, the response is discarded.
+        """
+        if not self.is_cacheable(server_id, params):
+            return
+        if not isinstance(response, dict) or response.get("error") or "result" not in response:
+            return
+        result = response.get("result")
+        if isinstance(result, dict) and result.get("isError"):
+            return
+
+        tool_name = params["name"]
+        policy = self.policies[tool_name]
+        arguments = params.get("arguments", {})
+        payload = json.dumps(response)
+        size = len(payload)
+        if size > policy.max_bytes:
+            return
+
+        key = self._make_key(server_id, arguments)
+        paths = extract_tool_paths(arguments) if policy.path_scoped else []
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            entries = self._entries.setdefault(tool_name, OrderedDict())
+            if key in entries:
+                self._remove(tool_name, key)
+            entries[key] = (time.monotonic() + policy.ttl, payload, paths)
+            self._bytes[tool_name] = self._bytes.get(tool_name, 0) + size
+            stats = self._tool_stats(tool_name)
+            stats["stores"] += 1
+
+            while entries and (len(entries) > policy.max_entries or self._bytes[tool_name] > policy.max_bytes):
+                oldest_key = next(iter(entries))
+                self._remove(tool_name, oldest_key)
+                stats["evictions"] += 1
+
+    def _remove(self, tool_name: str, key: str):
+        """Remove one entry. Caller must hold the lock."""
+        entries = self._entries.get(tool_name)
+        if entries and key in entries:
+            _, payload, _ = entries.pop(key)
+            self._bytes[tool_name] -= len(payload)
+
+    def observe_call(self, server_id: str, params: Dict):
+        """Invalidate cached reads affected by a (possibly) mutating call."""
+        if not self.enabled or not isinstance(params, dict):
+            return
+        tool_name = params.get("name")
+        if server_id in self.opaque_write_servers:
+            self.invalidate_paths(None)
+        elif tool_name in WRITE_TOOLS:
+            self.invalidate_paths(extract_tool_paths(params.get("arguments", {})))
+
+    def invalidate_paths(self, paths: Optional[Iterable[str]]):
+        """
+        Drop path-scoped entries overlapping any of the given paths.
+
+        Passing None drops every path-scoped entry.
+        """
+        targets = None if paths is None else list(paths)
+        with self._lock:
+            self._generation += 1
+            for tool_name, entries in self._entries.items():
+                if not self.policies.get(tool_name, CachePolicy()).path_scoped:
+                    continue
+                stale_keys = [
+                    key for key, (_, _, entry_paths) in entries.items()
+                    if targets is None or any(
+                        _paths_overlap(entry_path, target)
+                        for entry_path in entry_paths for target in targets
+                    )
+                ]
+                for key in stale_keys:
+                    self._remove(tool_name, key)
+                if stale_keys:
+                    self._tool_stats(tool_name)["invalidations"] += len(stale_keys)
+
+    def clear(self):
+        """Drop all cached entries, keeping statistics."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss statistics overall and per tool."""
+        with self._lock:
+            per_tool = {}
+            total_hits = total_misses = 0
+            for tool_name, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                per_tool[tool_name] = {
+                    **stats,
+                    "entries": len(self._entries.get(tool_name, {})),
+                    "bytes": self._bytes.get(tool_name, 0),
+                    "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+                }
+                total_hits += stats["hits"]
+                total_misses += stats["misses"]
+
+        lookups = total_hits + total_misses
+        return {
+            "enabled": self.enabled,
+            "hits": total_hits,
+            "misses": total_misses,
+            "hit_rate": total_hits / lookups if lookups else 0.0,
+            "tools": per_tool,
+        }
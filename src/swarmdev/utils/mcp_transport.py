@@ -0,0 +1,476 @@
+"""
+Transport helpers for MCP server connections.
+
+Low-level pieces used by the MCP Manager to talk to stdio servers, to the
+local broker and to servers exposed over streamable HTTP.
+"""
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+from collections import deque
+from typing import IO, Dict, Optional, Tuple
+
+
+class StderrDrainer:
+    """
+    Continuously drain a server's stderr pipe on a daemon thread.
+
+    A server that writes more than the OS pipe buffer (typically 64 KiB) to
+    stderr blocks on its own writes if nobody reads them, which looks like a
+    request timeout from the client side. The drainer reads stderr as soon
+    as data arrives, keeps the last ``max_bytes`` in a ring buffer for error
+    reporting and forwards complete lines to the MCP log at debug level.
+    """
+
+    def __init__(self, stream: IO[bytes], name: str, logger: logging.Logger,
+                 max_bytes: int = 64 * 1024, chunk_size: int = 4096):
+        self.stream = stream
+        self.name = name
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+
+        self._chunks = deque()
+        self._buffered = 0
+        self._total_bytes = 0
+        self._partial_line = b""
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name=f"mcp-stderr-{name}", daemon=True
+        )
+
+    def start(self) -> "StderrDrainer":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            fd = self.stream.fileno()
+        except (ValueError, OSError):
+            return
+
+        while True:
+            try:
+                chunk = os.read(fd, self.chunk_size)
+            except (OSError, ValueError):
+                break
+            if not chunk:
+                break
+            self._append(chunk)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self._log_lines(chunk)
+
+        if self._partial_line and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"[{self.name} stderr] {self._partial_line.decode('utf-8', errors='replace')}")
+        self._partial_line = b""
+
+    def _append(self, chunk: bytes):
+        with self._lock:
+            self._chunks.append(chunk)
+            self._buffered += len(chunk)
+            self._total_bytes += len(chunk)
+            while self._buffered - len(self._chunks[0]) >= self.max_bytes:
+                self._buffered -= len(self._chunks.popleft())
+
+    def _log_lines(self, chunk: bytes):
+        data = self._partial_line + chunk
+        lines = data.split(b"\n")
+        self._partial_line = lines.pop()
+        for line in lines:
+            if line.strip():
+                self.logger.debug(f"[{self.name} stderr] {line.decode('utf-8', errors='replace').rstrip()}")
+
+    def tail(self, max_bytes: Optional[int] = None) -> str:
+        """Return the most recent stderr output (at most max_bytes) as text."""
+        limit = self.max_bytes if max_bytes is None else min(max_bytes, self.max_bytes)
+        with self._lock:
+            data = b"".join(self._chunks)
+        if len(data) > limit:
+            data = data[-limit:]
+        return data.decode("utf-8", errors="replace").strip()
+
+    @property
+    def total_bytes(self) -> int:
+        """Total number of bytes drained since the process started."""
+        return self._total_bytes
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+
+class FrameTooLargeError(Exception):
+    """Raised when a JSON-RPC message exceeds the configured size limit."""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"JSON-RPC message of at least {size} bytes exceeds limit of {limit} bytes")
+        self.size = size
+        self.limit = limit
+
+
+class JSONRPCFrameReader:
+    """
+    Newline-delimited JSON-RPC framing over a raw stdout pipe.
+
+    Reads go straight from the file descriptor into one reusable bytearray,
+    so a message is held once as bytes and handed to ``json.loads`` without
+    an intermediate str. Messages larger than ``max_message_bytes`` are
+    rejected and skipped without being buffered in full, which keeps the
+    stream in sync for the next request.
+    """
+
+    def __init__(self, stream: IO[bytes], max_message_bytes: int = 32 * 1024 * 1024,
+                 read_size: int = 64 * 1024):
+        self.fd = stream.fileno()
+        self.max_message_bytes = max_message_bytes
+        self.read_size = read_size
+
+        self._buffer = bytearray()
+        self._start = 0  # Offset of the first unconsumed byte
+        self._scan = 0  # Offset up to which no newline exists
+        self._discarding = False  # Skipping the tail of an oversized message
+
+    def read_frame(self, timeout: float) -> Optional[bytes]:
+        """
+        Return the next non-empty message (without newline) as bytes.
+
+        Returns None on timeout, raises EOFError when the stream closes and
+        FrameTooLargeError when a message exceeds the size limit.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            frame = self._next_buffered_frame()
+            if frame is not None:
+                if frame and not frame.isspace():  # isspace() avoids copying large frames
+                    return frame
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return None
+            chunk = os.read(self.fd, self.read_size)
+            if not chunk:
+                raise EOFError("stream closed")
+            self._buffer += chunk
+
+    def _next_buffered_frame(self) -> Optional[bytes]:
+        while True:
+            newline = self._buffer.find(b"\n", self._scan)
+            if newline == -1:
+                self._scan = len(self._buffer)
+                pending = len(self._buffer) - self._start
+                if pending > self.max_message_bytes or (self._discarding and pending):
+                    self._reset_buffer()
+                    if not self._discarding:
+                        self._discarding = True
+                        raise FrameTooLargeError(pending, self.max_message_bytes)
+                return None
+
+            frame_length = newline - self._start
+            frame = None
+            if not self._discarding and frame_length <= self.max_message_bytes:
+                frame = bytes(self._buffer[self._start:newline])
+            self._start = self._scan = newline + 1
+            self._compact()
+
+            if self._discarding:
+                # End of the oversized message, resume normal framing
+                self._discarding = False
+                continue
+            if frame is None:
+                raise FrameTooLargeError(frame_length, self.max_message_bytes)
+            return frame
+
+    def _compact(self):
+        if self._start == len(self._buffer):
+            self._reset_buffer()
+        elif self._start > 1024 * 1024:
+            del self._buffer[:self._start]
+            self._scan -= self._start
+            self._start = 0
+
+    def _reset_buffer(self):
+        self._buffer.clear()
+        self._start = self._scan = 0
+
+
+class MCPBrokerClient:
+    """
+    Client side of the local MCP broker (see ``swarmdev mcp-daemon``).
+
+    Requests are newline-delimited JSON-RPC messages over a Unix socket.
+    Each thread gets its own socket so concurrent agents do not serialize
+    on a single connection.
+    """
+
+    def __init__(self, socket_path: str, connect_timeout: float = 2.0,
+                 max_response_bytes: int = 64 * 1024 * 1024):
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+        self.max_response_bytes = max_response_bytes
+        self._local = threading.local()
+        self._sockets = []
+        self._lock = threading.Lock()
+        self._request_counter = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import socket
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.connect_timeout)
+            sock.connect(self.socket_path)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            with self._lock:
+                self._sockets.append(sock)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            sock, reader = conn
+            for closeable in (reader, sock):
+                try:
+                    closeable.close()
+                except OSError:
+                    pass
+            with self._lock:
+                if sock in self._sockets:
+                    self._sockets.remove(sock)
+
+    def request(self, method: str, params: dict, timeout: float) -> dict:
+        """
+        Send one request to the broker and return its JSON-RPC response.
+
+        Raises ConnectionError if the broker cannot be reached or the
+        connection breaks mid-request.
+        """
+        with self._lock:
+            self._request_counter += 1
+            request_id = f"broker-{os.getpid()}-{self._request_counter}"
+        payload = json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+
+        try:
+            sock, reader = self._connection()
+            sock.settimeout(timeout)
+            sock.sendall((payload + "\n").encode("utf-8"))
+            line = reader.readline(self.max_response_bytes + 1)
+        except (OSError, ValueError) as e:
+            self._drop_connection()
+            raise ConnectionError(f"MCP broker request failed: {e}") from e
+        if not line:
+            self._drop_connection()
+            raise ConnectionError("MCP broker closed the connection")
+        if len(line) > self.max_response_bytes:
+            # The rest of the oversized line is still unread, so the connection is unusable
+            self._drop_connection()
+            raise ConnectionError(f"MCP broker response exceeds {self.max_response_bytes} bytes")
+
+        response = json.loads(line)
+        if response.get("id") != request_id:
+            self._drop_connection()
+            raise ConnectionError(f"MCP broker response ID mismatch: expected {request_id}, got {response.get('id')}")
+        return response
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """Check whether a broker is listening on the socket."""
+        try:
+            return "result" in self.request("broker/ping", {}, timeout)
+        except (ConnectionError, ValueError):
+            return False
+
+    def close(self):
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+class MCPSessionExpiredError(ConnectionError):
+    """The HTTP server no longer knows our Mcp-Session-Id and wants a new initialize."""
+
+
+class StreamableHTTPTransport:
+    """
+    MCP streamable HTTP transport for servers configured with ``url``.
+
+    Every request is a POST of one JSON-RPC message; the server answers with
+    either a JSON body or an SSE stream that ends with the response. One
+    pooled keep-alive client is shared by all threads, so many requests can
+    be in flight on the same server at once, unlike a stdio pipe.
+
+    Errors are mapped to builtin exceptions so callers do not depend on
+    httpx: TimeoutError, ConnectionError (MCPSessionExpiredError when the
+    session is gone), EOFError for a stream that ends without a response and
+    FrameTooLargeError for oversized messages.
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 30.0, max_connections: int = 16,
+                 max_message_bytes: int = 32 * 1024 * 1024,
+                 logger: Optional[logging.Logger] = None):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "MCP servers configured with 'url' require httpx. Install it with: pip install httpx"
+            ) from e
+
+        self.url = url
+        self.max_message_bytes = max_message_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self.session_id: Optional[str] = None
+        self.protocol_version: Optional[str] = None
+        self._httpx = httpx
+
+        try:
+            import h2  # noqa: F401
+            http2 = url.startswith("https://")
+        except ImportError:
+            http2 = False
+
+        self._client = httpx.Client(
+            headers={
+                "Accept": "application/json, text/event-stream",
+                "Content-Type": "application/json",
+                **(headers or {}),
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+            http2=http2,
+        )
+
+    def _session_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        if self.protocol_version:
+            headers["MCP-Protocol-Version"] = self.protocol_version
+        return headers
+
+    def request(self, message: Dict, timeout: float) -> Tuple[Dict, int]:
+        """
+        Send a JSON-RPC request and return (response, response size in bytes).
+
+        Server notifications and requests arriving on the SSE stream before
+        the response are skipped.
+        """
+        request_id = message.get("id")
+        body = json.dumps(message).encode("utf-8")
+        deadline = time.monotonic() + timeout
+        httpx = self._httpx
+
+        try:
+            with self._client.stream(
+                "POST", self.url, content=body, headers=self._session_headers(),
+                timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+            ) as response:
+                self._check_status(response)
+                if message.get("method") == "initialize":
+                    self.session_id = response.headers.get("mcp-session-id") or self.session_id
+
+                content_type = response.headers.get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    return self._read_event_stream(response, request_id, deadline)
+                data = self._read_body(response)
+        except httpx.TimeoutException as e:
+            raise TimeoutError(f"HTTP request to {self.url} timed out: {e}") from e
+        except httpx.HTTPError as e:
+            raise ConnectionError(f"HTTP request to {self.url} failed: {e}") from e
+
+        if not data.strip():
+            raise EOFError("empty HTTP response body")
+        parsed = json.loads(data)
+        if isinstance(parsed, list):  # JSON-RPC batch, pick our response
+            parsed = next((item for item in parsed if isinstance(item, dict) and item.get("id") == request_id), None)
+            if parsed is None:
+                raise EOFError(f"HTTP batch response has no reply for {request_id}")
+        return parsed, len(data)
+
+    def notify(self, message: Dict, timeout: float = 10.0):
+        """Send a JSON-RPC notification (the server answers 202 Accepted)."""
+        httpx = self._httpx
+        try:
+            response = self._client.post(
+                self.url, content=json.dumps(message).encode("utf-8"),
+                headers=self._session_headers(), timeout=timeout,
+            )
+            self._check_status(response)
+        except httpx.TimeoutException as e:
+            raise TimeoutError(f"HTTP notification to {self.url} timed out: {e}") from e
+        except httpx.HTTPError as e:
+            raise ConnectionError(f"HTTP notification to {self.url} failed: {e}") from e
+
+    def _check_status(self, response):
+        if response.status_code == 404 and self.session_id:
+            self.session_id = None
+            raise MCPSessionExpiredError(f"MCP session expired on {self.url}")
+        if response.status_code >= 400:
+            response.read()
+            raise ConnectionError(
+                f"HTTP {response.status_code} from {self.url}: {response.text[:500]}"
+            )
+
+    def _read_body(self, response) -> bytes:
+        data = bytearray()
+        for chunk in response.iter_bytes():
+            data += chunk
+            if len(data) > self.max_message_bytes:
+                raise FrameTooLargeError(len(data), self.max_message_bytes)
+        return bytes(data)
+
+    def _read_event_stream(self, response, request_id, deadline: float) -> Tuple[Dict, int]:
+        """Read SSE events until the one carrying the response to request_id."""
+        data_lines = []
+        event_bytes = 0
+        for line in response.iter_lines():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"SSE stream from {self.url} did not deliver a response in time")
+            if line.startswith("data:"):
+                chunk = line[5:].lstrip(" ")
+                data_lines.append(chunk)
+                event_bytes += len(chunk)
+                if event_bytes > self.max_message_bytes:
+                    raise FrameTooLargeError(event_bytes, self.max_message_bytes)
+                continue
+            if line or not data_lines:
+                continue  # Comments, event/id/retry fields and keep-alives
+
+            payload = "\n".join(data_lines)
+            data_lines = []
+            event_bytes = 0
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                self.logger.warning(f"Ignoring non-JSON SSE event from {self.url}: {payload[:200]}")
+                continue
+            if isinstance(message, dict) and message.get("id") == request_id and "method" not in message:
+                return message, len(payload)
+            if isinstance(message, dict) and "method" in message:
+                self.logger.debug(f"Skipping server message '{message.get('method')}' from {self.url} while waiting for {request_id}")
+        raise EOFError(f"SSE stream from {self.url} ended without a response to {request_id}")
+
+    def close(self):
+        """Terminate the session (best effort) and close pooled connections."""
+        if self.session_id:
+            try:
+                self._client.delete(self.url, headers=self._session_headers(), timeout=5.0)
+            except self._httpx.HTTPError:
+                pass
+            self.session_id = None
+        self._client.close()
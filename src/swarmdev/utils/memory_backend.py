@@ -0,0 +1,460 @@
+"""
+Storage backends for the project knowledge graph.
+
+MemoryContextManager talks to a MemoryBackend using the memory MCP server's
+tool names and argument shapes (create_entities, create_relations,
+add_observations, delete_entities, delete_observations, delete_relations,
+open_nodes, search_nodes, read_graph). Responses follow
+MCPManager.call_tool: {"result": ...} on success, {"error": ...} on failure.
+
+Backends:
+    SQLiteMemoryBackend  Embedded store in .swarmdev/memory.db, no container needed
+    MCPMemoryBackend     The "memory" MCP server
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+
+class MemoryBackend(ABC):
+    """Interface for knowledge graph storage."""
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        """Whether the backend can serve requests."""
+        return True
+
+    def call_tool(self, tool_name: str, arguments: Dict) -> Dict:
+        """Dispatch a memory tool call by name to the matching method."""
+        handler = getattr(self, tool_name, None)
+        if tool_name.startswith("_") or tool_name not in MEMORY_TOOLS or handler is None:
+            return {"error": f"Memory backend '{self.name}' does not support tool: {tool_name}"}
+        try:
+            return handler(**arguments)
+        except TypeError as e:
+            return {"error": f"Invalid arguments for {tool_name}: {e}"}
+
+    @abstractmethod
+    def create_entities(self, entities: List[Dict]) -> Dict:
+        """Create entities ({name, entityType, observations}); existing names are skipped."""
+        pass
+
+    @abstractmethod
+    def create_relations(self, relations: List[Dict]) -> Dict:
+        """Create relations ({from, to, relationType}); existing ones are skipped."""
+        pass
+
+    @abstractmethod
+    def add_observations(self, observations: List[Dict]) -> Dict:
+        """Add observations ({entityName, contents}) to existing entities."""
+        pass
+
+    @abstractmethod
+    def delete_entities(self, entityNames: List[str]) -> Dict:
+        """Delete entities together with their observations and relations."""
+        pass
+
+    @abstractmethod
+    def delete_observations(self, deletions: List[Dict]) -> Dict:
+        """Delete observations ({entityName, observations})."""
+        pass
+
+    @abstractmethod
+    def delete_relations(self, relations: List[Dict]) -> Dict:
+        """Delete relations ({from, to, relationType})."""
+        pass
+
+    @abstractmethod
+    def open_nodes(self, names: List[str]) -> Dict:
+        """Entities with the given names and the relations between them."""
+        pass
+
+    @abstractmethod
+    def search_nodes(self, query: str) -> Dict:
+        """Entities whose name, type or observations contain the query, and the relations between them."""
+        pass
+
+    @abstractmethod
+    def read_graph(self) -> Dict:
+        """The whole graph."""
+        pass
+
+    def close(self):
+        """Release resources held by the backend."""
+        pass
+
+
+MEMORY_TOOLS = {
+    "create_entities", "create_relations", "add_observations",
+    "delete_entities", "delete_observations", "delete_relations",
+    "open_nodes", "search_nodes", "read_graph",
+}
+
+
+class MCPMemoryBackend(MemoryBackend):
+    """Knowledge graph stored by the "memory" MCP server."""
+
+    name = "mcp"
+
+    def __init__(self, mcp_manager, logger: Optional[logging.Logger] = None):
+        self.mcp_manager = mcp_manager
+        self.logger = logger or logging.getLogger(__name__)
+
+    def is_available(self) -> bool:
+        if not self.mcp_manager:
+            self.logger.warning("MEMORY_CONTEXT_INIT: No MCPManager provided. MemoryContextManager will be non-operational.")
+            return False
+        if not self.mcp_manager.is_enabled():
+            self.logger.warning("MEMORY_CONTEXT_INIT: MCPManager is disabled. MemoryContextManager will be non-operational.")
+            return False
+
+        memory_server_info = self.mcp_manager.get_tool_info("memory")
+        if not memory_server_info or memory_server_info.get("status") == "discovery_failed":
+            self.logger.critical("MEMORY_CONTEXT_INIT: Critical - MCP 'memory' server failed discovery or is not configured. MemoryContextManager will be non-operational.")
+            return False
+
+        # Further check if capabilities were actually discovered (not an empty list of tools if discovery succeeded)
+        memory_capabilities = self.mcp_manager.get_server_capabilities("memory")
+        if memory_capabilities.get("discovery_failed"):
+            self.logger.critical("MEMORY_CONTEXT_INIT: Critical - MCP 'memory' server capabilities show discovery_failed=True. MemoryContextManager will be non-operational.")
+            return False
+        if not memory_capabilities.get("tools"):
+            # This case implies discovery 'succeeded' but returned no tools, which is also problematic.
+            self.logger.warning("MEMORY_CONTEXT_INIT: Warning - MCP 'memory' server reported successful discovery but no tools listed. Assuming non-operational.")
+            return False
+        return True
+
+    def call_tool(self, tool_name: str, arguments: Dict) -> Dict:
+        result = self.mcp_manager.call_tool("memory", "tools/call", {
+            "name": tool_name,
+            "arguments": arguments
+        })
+        return self._unwrap_text_result(result)
+
+    @staticmethod
+    def _unwrap_text_result(result: Dict) -> Dict:
+        """The memory server returns the graph as JSON text content; decode it into the result."""
+        nested = result.get("result")
+        if not isinstance(nested, dict) or nested.get("isError") or "content" not in nested:
+            return result
+        content = nested.get("content") or []
+        if len(content) == 1 and content[0].get("type") == "text":
+            try:
+                decoded = json.loads(content[0].get("text", ""))
+            except ValueError:
+                return result
+            return dict(result, result=decoded)
+        return result
+
+    def create_entities(self, entities: List[Dict]) -> Dict:
+        return self.call_tool("create_entities", {"entities": entities})
+
+    def create_relations(self, relations: List[Dict]) -> Dict:
+        return self.call_tool("create_relations", {"relations": relations})
+
+    def add_observations(self, observations: List[Dict]) -> Dict:
+        return self.call_tool("add_observations", {"observations": observations})
+
+    def delete_entities(self, entityNames: List[str]) -> Dict:
+        return self.call_tool("delete_entities", {"entityNames": entityNames})
+
+    def delete_observations(self, deletions: List[Dict]) -> Dict:
+        return self.call_tool("delete_observations", {"deletions": deletions})
+
+    def delete_relations(self, relations: List[Dict]) -> Dict:
+        return self.call_tool("delete_relations", {"relations": relations})
+
+    def open_nodes(self, names: List[str]) -> Dict:
+        return self.call_tool("open_nodes", {"names": names})
+
+    def search_nodes(self, query: str) -> Dict:
+        return self.call_tool("search_nodes", {"query": query})
+
+    def read_graph(self) -> Dict:
+        return self.call_tool("read_graph", {})
+
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """
+    Embedded knowledge graph in a SQLite database.
+
+    Each call runs in one transaction, so a batch of entities or relations
+    is written atomically. search_nodes uses an FTS5 trigram index (case-
+    insensitive substring match, like the memory server) when the SQLite
+    build supports it, and LIKE scans otherwise.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entities (
+            name TEXT PRIMARY KEY,
+            entity_type TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS observations (
+            id INTEGER PRIMARY KEY,
+            entity_name TEXT NOT NULL REFERENCES entities(name) ON DELETE CASCADE,
+            content TEXT NOT NULL,
+            UNIQUE (entity_name, content)
+        );
+        CREATE TABLE IF NOT EXISTS relations (
+            from_entity TEXT NOT NULL,
+            to_entity TEXT NOT NULL,
+            relation_type TEXT NOT NULL,
+            PRIMARY KEY (from_entity, to_entity, relation_type)
+        );
+        CREATE INDEX IF NOT EXISTS relations_to ON relations (to_entity);
+    """
+
+    def __init__(self, db_path: str, logger: Optional[logging.Logger] = None):
+        self.db_path = db_path
+        self.logger = logger or logging.getLogger(__name__)
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript(self.SCHEMA)
+        self._fts = self._create_fts_index()
+        self.logger.info(f"MEMORY: Using SQLite memory backend at {db_path} (full-text search: {'fts5' if self._fts else 'like'})")
+
+    def _create_fts_index(self) -> bool:
+        """Create the trigram index over names, types and observations. Returns False if unsupported."""
+        try:
+            with self._conn:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'memory_fts'"
+                ).fetchone()
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts "
+                    "USING fts5(entity_name UNINDEXED, text, tokenize='trigram')"
+                )
+                if not exists:
+                    # Index a database written while full-text search was unavailable
+                    self._conn.execute(
+                        "INSERT INTO memory_fts (entity_name, text) "
+                        "SELECT name, name || char(10) || entity_type FROM entities"
+                    )
+                    self._conn.execute(
+                        "INSERT INTO memory_fts (entity_name, text) SELECT entity_name, content FROM observations"
+                    )
+            return True
+        except sqlite3.OperationalError as e:
+            self.logger.info(f"MEMORY: SQLite FTS5 trigram index unavailable ({e}); search_nodes will scan")
+            return False
+
+    def _insert_observations(self, entity_name: str, contents: List[str]) -> List[str]:
+        """Caller holds the lock inside a transaction. Returns the observations that were new."""
+        added = []
+        for content in contents:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO observations (entity_name, content) VALUES (?, ?)",
+                (entity_name, content)
+            )
+            if cursor.rowcount:
+                added.append(content)
+                if self._fts:
+                    self._conn.execute("INSERT INTO memory_fts (entity_name, text) VALUES (?, ?)", (entity_name, content))
+        return added
+
+    def create_entities(self, entities: List[Dict]) -> Dict:
+        created = []
+        try:
+            with self._lock, self._conn:
+                for entity in entities:
+                    name = entity["name"]
+                    entity_type = entity.get("entityType", "")
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO entities (name, entity_type) VALUES (?, ?)", (name, entity_type)
+                    )
+                    if not cursor.rowcount:
+                        continue # Same as the memory server: existing entities are left untouched
+                    if self._fts:
+                        self._conn.execute(
+                            "INSERT INTO memory_fts (entity_name, text) VALUES (?, ?)", (name, f"{name}\n{entity_type}")
+                        )
+                    observations = self._insert_observations(name, entity.get("observations", []))
+                    created.append({"name": name, "entityType": entity_type, "observations": observations})
+        except (sqlite3.Error, KeyError) as e:
+            return {"error": f"create_entities failed: {e}"}
+        return {"result": created}
+
+    def create_relations(self, relations: List[Dict]) -> Dict:
+        created = []
+        try:
+            with self._lock, self._conn:
+                for relation in relations:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO relations (from_entity, to_entity, relation_type) VALUES (?, ?, ?)",
+                        (relation["from"], relation["to"], relation["relationType"])
+                    )
+                    if cursor.rowcount:
+                        created.append(relation)
+        except (sqlite3.Error, KeyError) as e:
+            return {"error": f"create_relations failed: {e}"}
+        return {"result": created}
+
+    def add_observations(self, observations: List[Dict]) -> Dict:
+        results = []
+        try:
+            with self._lock, self._conn:
+                for item in observations:
+                    name = item["entityName"]
+                    if not self._conn.execute("SELECT 1 FROM entities WHERE name = ?", (name,)).fetchone():
+                        # Rolls the whole batch back, like the memory server
+                        raise KeyError(f"Entity with name {name} not found")
+                    results.append({"entityName": name, "addedObservations": self._insert_observations(name, item.get("contents", []))})
+        except (sqlite3.Error, KeyError) as e:
+            return {"error": f"add_observations failed: {e}"}
+        return {"result": results}
+
+    def delete_entities(self, entityNames: List[str]) -> Dict:
+        try:
+            with self._lock, self._conn:
+                for name in entityNames:
+                    # Observations go with the entity (ON DELETE CASCADE)
+                    self._conn.execute("DELETE FROM entities WHERE name = ?", (name,))
+                    self._conn.execute("DELETE FROM relations WHERE from_entity = ? OR to_entity = ?", (name, name))
+                    if self._fts:
+                        self._conn.execute("DELETE FROM memory_fts WHERE entity_name = ?", (name,))
+        except sqlite3.Error as e:
+            return {"error": f"delete_entities failed: {e}"}
+        return {"result": "Entities deleted successfully"}
+
+    def delete_observations(self, deletions: List[Dict]) -> Dict:
+        try:
+            with self._lock, self._conn:
+                for item in deletions:
+                    for content in item.get("observations", []):
+                        self._conn.execute(
+                            "DELETE FROM observations WHERE entity_name = ? AND content = ?", (item["entityName"], content)
+                        )
+                        if self._fts:
+                            self._conn.execute(
+                                "DELETE FROM memory_fts WHERE entity_name = ? AND text = ?", (item["entityName"], content)
+                            )
+        except (sqlite3.Error, KeyError) as e:
+            return {"error": f"delete_observations failed: {e}"}
+        return {"result": "Observations deleted successfully"}
+
+    def delete_relations(self, relations: List[Dict]) -> Dict:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "DELETE FROM relations WHERE from_entity = ? AND to_entity = ? AND relation_type = ?",
+                    [(r["from"], r["to"], r["relationType"]) for r in relations]
+                )
+        except (sqlite3.Error, KeyError) as e:
+            return {"error": f"delete_relations failed: {e}"}
+        return {"result": "Relations deleted successfully"}
+
+    def _graph(self, names: Optional[List[str]]) -> Dict:
+        """Caller holds the lock. Entities (all when names is None) and the relations between them."""
+        if names is None:
+            entity_rows = self._conn.execute("SELECT name, entity_type FROM entities ORDER BY rowid").fetchall()
+            observation_rows = self._conn.execute("SELECT entity_name, content FROM observations ORDER BY id").fetchall()
+            relation_rows = self._conn.execute("SELECT from_entity, to_entity, relation_type FROM relations").fetchall()
+        else:
+            names = list(dict.fromkeys(names))
+            wanted = set(names)
+            entity_rows, observation_rows, relation_rows = [], [], []
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                entity_rows += self._conn.execute(
+                    f"SELECT name, entity_type FROM entities WHERE name IN ({marks})", chunk
+                ).fetchall()
+                observation_rows += self._conn.execute(
+                    f"SELECT entity_name, content FROM observations WHERE entity_name IN ({marks}) ORDER BY id", chunk
+                ).fetchall()
+                relation_rows += [
+                    row for row in self._conn.execute(
+                        f"SELECT from_entity, to_entity, relation_type FROM relations WHERE from_entity IN ({marks})", chunk
+                    ) if row[1] in wanted
+                ]
+            order = {name: i for i, name in enumerate(names)}
+            entity_rows.sort(key=lambda row: order[row[0]])
+
+        entities = {name: {"name": name, "entityType": entity_type, "observations": []} for name, entity_type in entity_rows}
+        for entity_name, content in observation_rows:
+            entities[entity_name]["observations"].append(content)
+        return {
+            "entities": list(entities.values()),
+            "relations": [{"from": f, "to": t, "relationType": r} for f, t, r in relation_rows],
+        }
+
+    def open_nodes(self, names: List[str]) -> Dict:
+        try:
+            with self._lock:
+                return {"result": self._graph(names)}
+        except sqlite3.Error as e:
+            return {"error": f"open_nodes failed: {e}"}
+
+    def search_nodes(self, query: str) -> Dict:
+        try:
+            with self._lock:
+                if self._fts and len(query) >= 3:
+                    phrase = '"' + query.replace('"', '""') + '"'
+                    rows = self._conn.execute(
+                        "SELECT DISTINCT entity_name FROM memory_fts WHERE memory_fts MATCH ?", (phrase,)
+                    ).fetchall()
+                else:
+                    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                    rows = self._conn.execute(
+                        "SELECT name FROM entities WHERE name LIKE ? ESCAPE '\\' OR entity_type LIKE ? ESCAPE '\\' "
+                        "UNION SELECT entity_name FROM observations WHERE content LIKE ? ESCAPE '\\'",
+                        (pattern, pattern, pattern)
+                    ).fetchall()
+                return {"result": self._graph([row[0] for row in rows])}
+        except sqlite3.Error as e:
+            return {"error": f"search_nodes failed: {e}"}
+
+    def read_graph(self) -> Dict:
+        try:
+            with self._lock:
+                return {"result": self._graph(None)}
+        except sqlite3.Error as e:
+            return {"error": f"read_graph failed: {e}"}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_memory_backend(config: Optional[Dict], mcp_manager=None, project_dir: str = ".",
+                          logger: Optional[logging.Logger] = None) -> MemoryBackend:
+    """
+    Build the memory backend selected by the memory config's "backend" key.
+
+    "sqlite" uses the embedded store, "mcp" the memory MCP server, and
+    "auto" (default) the MCP server when it is available and SQLite otherwise.
+    """
+    config = config or {}
+    logger = logger or logging.getLogger(__name__)
+    backend = config.get("backend", "auto")
+    db_path = config.get("db_path") or os.path.join(project_dir, ".swarmdev", "memory.db")
+
+    if backend == "sqlite":
+        return SQLiteMemoryBackend(db_path, logger=logger)
+    if backend == "mcp":
+        return MCPMemoryBackend(mcp_manager, logger=logger)
+    if backend != "auto":
+        logger.warning(f"MEMORY: Unknown memory backend '{backend}', using auto")
+
+    if mcp_manager and mcp_manager.is_enabled():
+        mcp_backend = MCPMemoryBackend(mcp_manager, logger=logger)
+        if mcp_backend.is_available():
+            return mcp_backend
+        logger.warning("MEMORY: MCP memory server unavailable; falling back to the embedded SQLite backend")
+    return SQLiteMemoryBackend(db_path, logger=logger)
@@ -1,15 +1,35 @@
 """
-Memory-driven context manager for SwarmDev using knowledge graph MCP server.
+Memory-driven context manager for SwarmDev using a knowledge graph backend
+(embedded SQLite store or the memory MCP server).
 Provides intelligent context awareness across workflow iterations.
 """
 
+import copy
 import json
 import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import uuid
 
+from .memory_backend import MemoryBackend, MCPMemoryBackend
+from .memory_graph_mirror import MemoryGraphMirror
+from .memory_snapshot import export_snapshot, import_snapshot
+from .memory_vector_index import MemoryVectorIndex
+from .memory_write_queue import MemoryWriteQueue
+
+# Observations written by store_file_operation / store_directory_operation
+OPERATION_PATTERN = re.compile(r"^(?:File|Directory) operation '(.+?)' performed on '(.+?)'")
+OPERATION_TASK_PATTERN = re.compile(r"^Associated with task '(.*)' in iteration (\d+)\.")
+# Operation history on a FileArtifact, one timestamped observation per operation
+FILE_HISTORY_PATTERN = re.compile(r"^File operation: (.+?) \| Iteration: (\d+) \| Task: (.*) \| [^|]*$")
+
+# "Key: value" observations where only the latest value matters
+SUPERSEDED_OBSERVATION_KEYS = ("Status", "Continuation Decision Status", "Evolved Goal")
+
 
 @dataclass
 class ContextMemory:
@@ -18,47 +38,78 @@ class ContextMemory:
     entity_type: str
     observations: List[str]
     relations: List[Dict[str, str]]
+    
+    def to_entity(self) -> Dict:
+        """Entity payload in the memory server's create_entities schema."""
+        return {"name": self.entity_name, "entityType": self.entity_type, "observations": list(self.observations)}
 
 
 class MemoryContextManager:
     """
-    Manages context memory using knowledge graph MCP server.
+    Manages context memory using a knowledge graph MemoryBackend (the memory
+    MCP server unless another backend is passed in).
     Stores file operations, task completions, and iteration context.
+    
+    Writes go through a write-behind queue and reach the memory server in
+    batches on a background thread, so store_* methods return as soon as
+    the write is queued. Reads flush pending writes first; call flush() at
+    iteration boundaries to make writes visible to other clients.
+    
+    Entities and relations written or read are kept in a local mirror:
+    writes of already known entities and relations are skipped (or reduced
+    to their new observations), and open_nodes reads of known entities are
+    answered locally.
+    
+    With a MemoryVectorIndex, search_relevant_context ranks entities by
+    embedding similarity instead of substring matching.
     """
     
-    def __init__(self, mcp_manager, project_id: str, logger: Optional[logging.Logger] = None):
+    def __init__(self, mcp_manager, project_id: str, logger: Optional[logging.Logger] = None,
+                 config: Optional[Dict] = None, backend: Optional[MemoryBackend] = None,
+                 vector_index: Optional[MemoryVectorIndex] = None):
         self.mcp_manager = mcp_manager
         self.project_id = project_id
         self.logger = logger or logging.getLogger(__name__)
         self.project_node_name = f"project_node_{self.project_id}" # Define project_node_name
         self.memory_service_available = True # Assume true initially
-
-        if self.mcp_manager and self.mcp_manager.is_enabled():
-            memory_server_info = self.mcp_manager.get_tool_info("memory")
-            if not memory_server_info or memory_server_info.get("status") == "discovery_failed":
-                self.logger.critical("MEMORY_CONTEXT_INIT: Critical - MCP 'memory' server failed discovery or is not configured. MemoryContextManager will be non-operational.")
-                self.memory_service_available = False
-            else:
-                # Further check if capabilities were actually discovered (not an empty list of tools if discovery succeeded)
-                memory_capabilities = self.mcp_manager.get_server_capabilities("memory")
-                if not memory_capabilities.get("tools") and not memory_capabilities.get("discovery_failed"):
-                    # This case implies discovery 'succeeded' but returned no tools, which is also problematic.
-                    self.logger.warning("MEMORY_CONTEXT_INIT: Warning - MCP 'memory' server reported successful discovery but no tools listed. Assuming non-operational.")
-                    self.memory_service_available = False
-                elif memory_capabilities.get("discovery_failed"): # Redundant check, but explicit
-                     self.logger.critical("MEMORY_CONTEXT_INIT: Critical - MCP 'memory' server capabilities show discovery_failed=True. MemoryContextManager will be non-operational.")
-                     self.memory_service_available = False
-
-            if self.memory_service_available:
-                 self._initialize_project_memory()
-            else:
-                self.logger.warning("MEMORY_CONTEXT_INIT: Skipping _initialize_project_memory as memory service is not available.")
-        elif self.mcp_manager and not self.mcp_manager.is_enabled():
-            self.logger.warning("MEMORY_CONTEXT_INIT: MCPManager is disabled. MemoryContextManager will be non-operational.")
-            self.memory_service_available = False
-        else: # No mcp_manager
-            self.logger.warning("MEMORY_CONTEXT_INIT: No MCPManager provided. MemoryContextManager will be non-operational.")
-            self.memory_service_available = False
+        
+        config = config or {}
+        self.write_behind = config.get("write_behind", True)
+        self._write_queue = MemoryWriteQueue(
+            self._write_batch,
+            batch_size=config.get("write_batch_size", 50),
+            flush_interval=config.get("write_flush_interval", 1.0),
+            logger=self.logger
+        )
+        self._mirror = MemoryGraphMirror()
+        self.vector_index = vector_index
+        
+        # retrieve_iteration_context results by iteration, dropped when that
+        # iteration (or an earlier one) gets new writes
+        self._context_cache: Dict[int, Dict] = {}
+        self._context_generation = 0
+        self._context_lock = threading.Lock()  # Serializes retrievals
+        self._cache_lock = threading.Lock()  # Guards the cache and generation; never held during I/O
+        self._read_pool: Optional[ThreadPoolExecutor] = None
+        
+        # Compaction: operations older than this many iterations are rolled up
+        self.compaction_enabled = config.get("compaction", True)
+        self.compact_after_iterations = int(config.get("compact_after_iterations", 2))
+        self.max_observations = int(config.get("max_observations_per_entity", 50))
+        self._latest_iteration = 0
+        self._compacted_through = 0
+        
+        # Snapshot of this project's subgraph, written on close() for the next build to warm-start from
+        self.snapshot_path = config.get("snapshot_path")
+        # Delete the previous build's copies on import; only for a store this project owns
+        self.snapshot_replace_source = bool(config.get("snapshot_replace_source", False))
+        
+        self.backend = backend or MCPMemoryBackend(mcp_manager, logger=self.logger)
+        self.memory_service_available = self.backend.is_available()
+        if self.memory_service_available:
+            self._initialize_project_memory()
+        else:
+            self.logger.warning("MEMORY_CONTEXT_INIT: Skipping _initialize_project_memory as memory service is not available.")
     
     def _initialize_project_memory(self):
         """Initialize project-level memory entities."""
@@ -67,11 +118,7 @@ class MemoryContextManager:
             return
         try:
             # Check if project_node already exists
-            node_check_result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "get_node",
-                "arguments": {"node_id": self.project_node_name}
-            })
-            if self._is_mcp_success(node_check_result) and node_check_result.get("result"):
+            if self._mirror.has_entity(self.project_node_name):
                 self.logger.info(f"MEMORY: Project node {self.project_node_name} already exists for project {self.project_id}.")
                 return
 
@@ -86,15 +133,10 @@ class MemoryContextManager:
                 relations=[]
             )
             
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "create_entities",
-                "arguments": {"entities": [asdict(project_cm)]} # Convert to dict
-            })
-            
-            if self._is_mcp_success(result):
-                self.logger.info(f"MEMORY: Initialized project memory for {self.project_id} with node {self.project_node_name}")
-            else:
-                self.logger.warning(f"MEMORY: Failed to initialize project memory node {self.project_node_name}: {result.get('error', result)}")
+            # Queued like any other write; create_entities leaves an existing node untouched
+            self._queue_context_memory(project_cm)
+            self._writes_queued()
+            self.logger.info(f"MEMORY: Initialized project memory for {self.project_id} with node {self.project_node_name}")
                 
         except Exception as e:
             self.logger.error(f"MEMORY: Project memory initialization failed: {e}", exc_info=True)
@@ -116,26 +158,20 @@ class MemoryContextManager:
                 ]
             }
             
-            # Create iteration entity
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "create_entities",
-                "arguments": {"entities": [iteration_entity]}
-            })
+            # Queue iteration entity
+            self._queue_entity(iteration_entity)
             
-            if self._is_mcp_success(result):
-                # Create relation to project
-                self._create_project_relation(iteration_entity["name"], "contains_iteration")
-                
-                # Create relation to previous iteration if exists
-                if iteration_count > 1:
-                    prev_iteration = f"iteration_{self.project_id}_{iteration_count - 1}"
-                    self._create_relation(iteration_entity["name"], prev_iteration, "follows_iteration")
-                
-                self.logger.info(f"MEMORY: Stored iteration {iteration_count} start context")
-                return True
-            else:
-                self.logger.error(f"MEMORY: Failed to store iteration start: {result}")
-                return False
+            # Create relation to project
+            self._create_project_relation(iteration_entity["name"], "contains_iteration")
+            
+            # Create relation to previous iteration if exists
+            if iteration_count > 1:
+                prev_iteration = f"iteration_{self.project_id}_{iteration_count - 1}"
+                self._create_relation(iteration_entity["name"], prev_iteration, "follows_iteration")
+            
+            self._writes_queued(iteration_count)
+            self.logger.info(f"MEMORY: Queued iteration {iteration_count} start context")
+            return True
                 
         except Exception as e:
             self.logger.error(f"MEMORY: Iteration start storage failed: {e}")
@@ -167,26 +203,20 @@ class MemoryContextManager:
                     f"File list: {', '.join(files_affected[:5])}" + ("..." if len(files_affected) > 5 else "")
                 ])
             
-            # Create task entity
-            result_store = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "create_entities",
-                "arguments": {"entities": [task_entity]}
-            })
+            # Queue task entity
+            self._queue_entity(task_entity)
             
-            if self._is_mcp_success(result_store):
-                # Create relation to iteration
-                iteration_name = f"iteration_{self.project_id}_{iteration_count}"
-                self._create_relation(iteration_name, task_entity["name"], "contains_task")
-                
-                # Store file entities and relations if files were affected
-                if files_affected:
-                    self._store_file_context(iteration_count, task_id, files_affected, agent_type)
-                
-                self.logger.info(f"MEMORY: Stored task completion context for {task_id}")
-                return True
-            else:
-                self.logger.error(f"MEMORY: Failed to store task completion: {result_store}")
-                return False
+            # Create relation to iteration
+            iteration_name = f"iteration_{self.project_id}_{iteration_count}"
+            self._create_relation(iteration_name, task_entity["name"], "contains_task")
+            
+            # Store file entities and relations if files were affected
+            if files_affected:
+                self._store_file_context(iteration_count, task_id, files_affected, agent_type)
+            
+            self._writes_queued(iteration_count)
+            self.logger.info(f"MEMORY: Queued task completion context for {task_id}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"MEMORY: Task completion storage failed: {e}")
@@ -198,24 +228,17 @@ class MemoryContextManager:
         if not self.memory_service_available:
             self.logger.warning(f"MEMORY: Memory service is not available. Skipping store_file_operation for {file_path}.")
             return False
-        if not self.mcp_manager: # Original check, kept for robustness
-            self.logger.warning("MCP Manager not available. Cannot store file operation.")
-            return False
         try:
             # Ensure file_path is relative to project root for consistency
             original_file_path = file_path # Keep original for logging if needed
-            if file_path.startswith(("/workspace/", "workspace/")):
-                file_path = file_path.replace("/workspace/", "", 1).replace("workspace/", "", 1)
-            if file_path.startswith("./"):
-                file_path = file_path[2:]
-            file_path = file_path.strip('/')
+            file_path = self._normalize_path(file_path)
 
 
             if not file_path:
                 self.logger.warning(f"Cannot log file operation for invalid/root path: original was '{original_file_path}'.")
                 return False
 
-            file_entity_name = f"file_{self.project_id}_{file_path.replace('/', '_')}"
+            file_entity_name = self._file_entity_name(file_path)
             op_entity_name = f"file_op_{self.project_id}_{operation}_{file_entity_name}_{task_id}_{iteration_count}_{uuid.uuid4().hex[:6]}"
             iteration_node_name = f"iteration_node_{self.project_id}_{iteration_count}"
             task_node_name = f"task_node_{self.project_id}_{task_id}_{iteration_count}"
@@ -235,69 +258,32 @@ class MemoryContextManager:
                 {"from_entity": op_entity_name, "to_entity": self.project_node_name, "type": "PART_OF_PROJECT"}
             ]
 
-            # Ensure iteration node exists (should be created by store_iteration_start)
-            iter_exists_check = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "get_node",
-                "arguments": {"node_id": iteration_node_name}
-            })
-            if not (self._is_mcp_success(iter_exists_check) and iter_exists_check.get("result")):
-                self.logger.warning(f"Iteration node {iteration_node_name} not found. File op link might be incomplete.")
-                # Optionally create it here if critical, or rely on store_iteration_start
-                # For now, log a warning.
-
-            # Ensure task node exists (should be created by store_task_completion)
-            task_exists_check = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "get_node",
-                "arguments": {"node_id": task_node_name}
-            })
-            if not (self._is_mcp_success(task_exists_check) and task_exists_check.get("result")):
-                self.logger.warning(f"Task node {task_node_name} not found. File op link might be incomplete.")
-
-
-            # Ensure file entity (FileArtifact) exists
-            file_artifact_exists_check = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "get_node",
-                "arguments": {"node_id": file_entity_name}
-            })
-            if not (self._is_mcp_success(file_artifact_exists_check) and file_artifact_exists_check.get("result")):
-                file_artifact_cm = ContextMemory(
-                    entity_name=file_entity_name, 
-                    entity_type="FileArtifact", 
-                    observations=[f"File artifact representing: {file_path} in project {self.project_id}"], 
-                    relations=[{"from_entity": file_entity_name, "to_entity": self.project_node_name, "type": "BELONGS_TO_PROJECT"}]
-                )
-                create_file_artifact_result = self.mcp_manager.call_tool(
-                    "memory", "tools/call", {
-                        "name": "create_entities",
-                        "arguments": {"entities": [asdict(file_artifact_cm)]} # Convert to dict
-                    }
-                )
-                if self._is_mcp_success(create_file_artifact_result):
-                    self.logger.debug(f"Created FileArtifact entity: {file_entity_name}")
-                else:
-                    self.logger.warning(f"Failed to create FileArtifact {file_entity_name}: {create_file_artifact_result.get('error')}")
-
+            # Ensure file entity (FileArtifact) exists; a no-op once the mirror knows it
+            file_artifact_cm = ContextMemory(
+                entity_name=file_entity_name, 
+                entity_type="FileArtifact", 
+                observations=[f"File artifact representing: {file_path} in project {self.project_id}"], 
+                relations=[{"from_entity": file_entity_name, "to_entity": self.project_node_name, "type": "BELONGS_TO_PROJECT"}]
+            )
+            self._queue_context_memory(file_artifact_cm)
+            # Operation history read back by get_file_conflict_context. One observation
+            # per operation: identical observations are stored only once
+            self._add_observations(file_entity_name, [
+                f"File operation: {operation} | Iteration: {iteration_count} | Task: {task_id} | {datetime.now().isoformat()}"
+            ])
 
-            # Create the FileOperation entity
+            # Queue the FileOperation entity
             file_op_cm = ContextMemory(
                 entity_name=op_entity_name, 
                 entity_type="FileOperation", 
                 observations=observations, 
                 relations=relations
             )
-            create_op_result = self.mcp_manager.call_tool(
-                "memory", "tools/call", {
-                    "name": "create_entities",
-                    "arguments": {"entities": [asdict(file_op_cm)]} # Convert to dict
-                }
-            )
+            self._queue_context_memory(file_op_cm)
             
-            success = self._is_mcp_success(create_op_result)
-            if success:
-                self.logger.info(f"Stored file operation '{operation}' for '{file_path}' in iteration {iteration_count} linked to task '{task_id}'.")
-            else:
-                self.logger.warning(f"Failed to store file operation for '{file_path}': {create_op_result.get('error')}")
-            return success
+            self._writes_queued(iteration_count)
+            self.logger.info(f"Queued file operation '{operation}' for '{file_path}' in iteration {iteration_count} linked to task '{task_id}'.")
+            return True
                 
         except Exception as e:
             self.logger.error(f"MEMORY: File operation storage failed for {file_path}: {e}", exc_info=True)
@@ -308,16 +294,9 @@ class MemoryContextManager:
         if not self.memory_service_available:
             self.logger.warning(f"MEMORY: Memory service is not available. Skipping store_directory_operation for {dir_path}.")
             return False
-        if not self.mcp_manager: # Original check
-            self.logger.warning("MCP Manager not available. Cannot store directory operation.")
-            return False
         try:
             original_dir_path = dir_path # Keep original for logging
-            if dir_path.startswith(("/workspace/", "workspace/")):
-                dir_path = dir_path.replace("/workspace/", "", 1).replace("workspace/", "", 1)
-            if dir_path.startswith("./"):
-                dir_path = dir_path[2:]
-            dir_path = dir_path.strip('/')
+            dir_path = self._normalize_path(dir_path)
 
             if not dir_path:
                 self.logger.warning(f"Cannot log directory operation for invalid/root path: original was '{original_dir_path}'.")
@@ -340,92 +319,80 @@ class MemoryContextManager:
                 {"from_entity": op_entity_name, "to_entity": self.project_node_name, "type": "PART_OF_PROJECT"}
             ]
 
-            # Ensure directory entity (DirectoryArtifact) exists
-            dir_artifact_exists_check = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "get_node",
-                "arguments": {"node_id": dir_entity_name}
-            })
-            if not (self._is_mcp_success(dir_artifact_exists_check) and dir_artifact_exists_check.get("result")):
-                dir_artifact_cm = ContextMemory(
-                    entity_name=dir_entity_name,
-                    entity_type="DirectoryArtifact",
-                    observations=[f"Directory artifact representing: {dir_path} in project {self.project_id}"],
-                    relations=[{"from_entity": dir_entity_name, "to_entity": self.project_node_name, "type": "BELONGS_TO_PROJECT"}]
-                )
-                create_dir_artifact_result = self.mcp_manager.call_tool(
-                    "memory", "tools/call", {
-                        "name": "create_entities",
-                        "arguments": {"entities": [asdict(dir_artifact_cm)]} # Convert to dict
-                    }
-                )
-                if self._is_mcp_success(create_dir_artifact_result):
-                    self.logger.debug(f"Created DirectoryArtifact entity: {dir_entity_name}")
-                else:
-                    self.logger.warning(f"Failed to create DirectoryArtifact {dir_entity_name}: {create_dir_artifact_result.get('error')}")
+            # Ensure directory entity (DirectoryArtifact) exists; a no-op once the mirror knows it
+            dir_artifact_cm = ContextMemory(
+                entity_name=dir_entity_name,
+                entity_type="DirectoryArtifact",
+                observations=[f"Directory artifact representing: {dir_path} in project {self.project_id}"],
+                relations=[{"from_entity": dir_entity_name, "to_entity": self.project_node_name, "type": "BELONGS_TO_PROJECT"}]
+            )
+            self._queue_context_memory(dir_artifact_cm)
             
-            # Create the DirectoryOperation entity
+            # Queue the DirectoryOperation entity
             dir_op_cm = ContextMemory(
                 entity_name=op_entity_name,
                 entity_type="DirectoryOperation",
                 observations=observations,
                 relations=relations
             )
-            create_op_result = self.mcp_manager.call_tool(
-                "memory", "tools/call", {
-                    "name": "create_entities",
-                    "arguments": {"entities": [asdict(dir_op_cm)]} # Convert to dict
-                }
-            )
+            self._queue_context_memory(dir_op_cm)
 
-            success = self._is_mcp_success(create_op_result)
-            if success:
-                self.logger.info(f"Stored directory operation '{operation}' for '{dir_path}' in iteration {iteration_count} linked to task '{task_id}'.")
-            else:
-                self.logger.warning(f"Failed to store directory operation for '{dir_path}': {create_op_result.get('error')}")
-            return success
+            self._writes_queued(iteration_count)
+            self.logger.info(f"Queued directory operation '{operation}' for '{dir_path}' in iteration {iteration_count} linked to task '{task_id}'.")
+            return True
         except Exception as e:
             self.logger.error(f"MEMORY: Directory operation storage for {dir_path} failed: {e}", exc_info=True)
             return False
     
     def retrieve_iteration_context(self, iteration_count: int) -> Dict:
-        """Retrieve relevant context for current iteration."""
+        """
+        Retrieve relevant context for current iteration.
+        
+        The four memory queries run concurrently, and the assembled context is
+        cached until this iteration or an earlier one is written to.
+        """
         if not self.memory_service_available:
             self.logger.warning(f"MEMORY: Memory service is not available. Skipping retrieve_iteration_context for iteration {iteration_count}.")
             return {}
-        try:
-            context = {
-                "previous_iterations": [],
-                "file_history": [],
-                "task_patterns": [],
-                "project_evolution": []
-            }
-            
-            # Get previous iteration context
-            if iteration_count > 1:
-                prev_context = self._get_previous_iteration_context(iteration_count - 1)
-                context["previous_iterations"] = prev_context
-            
-            # Get file evolution history
-            file_history = self._get_file_evolution_history()
-            context["file_history"] = file_history
-            
-            # Get task completion patterns
-            task_patterns = self._get_task_completion_patterns(iteration_count)
-            context["task_patterns"] = task_patterns
-            
-            # Get project evolution insights
-            evolution = self._get_project_evolution_insights(iteration_count)
-            context["project_evolution"] = evolution
-            
-            self.logger.info(f"MEMORY: Retrieved context for iteration {iteration_count}")
-            self.logger.debug(f"MEMORY: Context summary - {len(context['previous_iterations'])} iterations, "
-                            f"{len(context['file_history'])} files, {len(context['task_patterns'])} patterns")
-            
-            return context
-            
-        except Exception as e:
-            self.logger.error(f"MEMORY: Context retrieval failed: {e}")
-            return {}
+        # One retrieval at a time, so callers asking for the same iteration share it
+        with self._context_lock:
+            with self._cache_lock:
+                cached = self._context_cache.get(iteration_count)
+                generation = self._context_generation
+            if cached is not None:
+                self.logger.debug(f"MEMORY: Using cached context for iteration {iteration_count}")
+                return copy.deepcopy(cached)
+        
+            self.flush()
+            try:
+                if self._read_pool is None:
+                    self._read_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memory-read")
+                
+                # Get previous iteration context, file evolution history, task
+                # completion patterns and project evolution insights
+                previous = self._read_pool.submit(self._get_previous_iteration_context, iteration_count - 1) if iteration_count > 1 else None
+                file_history = self._read_pool.submit(self._get_file_evolution_history)
+                task_patterns = self._read_pool.submit(self._get_task_completion_patterns, iteration_count)
+                evolution = self._read_pool.submit(self._get_project_evolution_insights, iteration_count)
+                
+                context = {
+                    "previous_iterations": previous.result() if previous else [],
+                    "file_history": file_history.result(),
+                    "task_patterns": task_patterns.result(),
+                    "project_evolution": evolution.result()
+                }
+                
+                with self._cache_lock:
+                    if generation == self._context_generation:
+                        self._context_cache[iteration_count] = copy.deepcopy(context)
+            except Exception as e:
+                self.logger.error(f"MEMORY: Context retrieval failed: {e}")
+                return {}
+        
+        self.logger.info(f"MEMORY: Retrieved context for iteration {iteration_count}")
+        self.logger.debug(f"MEMORY: Context summary - {len(context['previous_iterations'])} iterations, "
+                        f"{len(context['file_history'])} files, {len(context['task_patterns'])} patterns")
+        return context
     
     def get_file_conflict_context(self, file_path: str) -> Dict:
         """Get context about potential file conflicts and previous operations."""
@@ -434,12 +401,9 @@ class MemoryContextManager:
             return {} # Return empty dict, which might be interpreted as "no context" or "is_new: True" by caller.
         try:
             # Search for file-related entities
-            file_entity_name = f"file_{self.project_id}_{file_path.replace('/', '_').replace('.', '_')}"
+            file_entity_name = self._file_entity_name(self._normalize_path(file_path))
             
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "open_nodes",
-                "arguments": {"names": [file_entity_name]}
-            })
+            result = self._open_nodes([file_entity_name])
             
             if self._is_mcp_success(result):
                 entities = result.get("result", {}).get("entities", [])
@@ -455,7 +419,13 @@ class MemoryContextManager:
                     tasks = []
                     
                     for obs in observations:
-                        if "File operation:" in obs:
+                        match = FILE_HISTORY_PATTERN.match(obs)
+                        if match:
+                            operations.append(match.group(1))
+                            iterations.append(match.group(2))
+                            tasks.append(match.group(3))
+                        # Separate observations written before operations were combined
+                        elif "File operation:" in obs:
                             operations.append(obs.split("File operation: ")[1])
                         elif "Iteration:" in obs:
                             iterations.append(obs.split("Iteration: ")[1])
@@ -485,15 +455,29 @@ class MemoryContextManager:
             return {}
     
     def search_relevant_context(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search for relevant context using semantic search."""
+        """
+        Search for relevant context using semantic search.
+        
+        Uses the vector index when there is one (observations are the best
+        matching ones, most relevant first); otherwise substring search on
+        the backend with a flat relevance score.
+        """
         if not self.memory_service_available:
             self.logger.warning(f"MEMORY: Memory service is not available. Skipping search_relevant_context for query '{query}'.")
             return []
+        if self.vector_index is not None:
+            try:
+                ranked = self._vector_search(query, limit)
+            except Exception as e:
+                self.logger.error(f"MEMORY: Vector search failed: {e}")
+                ranked = None
+            if ranked is not None:
+                self.logger.info(f"MEMORY: Found {len(ranked)} ranked context items for query: {query}")
+                return ranked
+            self.logger.warning("MEMORY: Vector search unavailable; falling back to substring search")
+        self.flush()
         try:
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "search_nodes",
-                "arguments": {"query": query}
-            })
+            result = self._search_nodes(query)
             
             if self._is_mcp_success(result):
                 entities = result.get("result", {}).get("entities", [])
@@ -565,32 +549,419 @@ class MemoryContextManager:
                 # Relations will be added by _create_relation if needed
             }
             
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "create_entities",
-                "arguments": {"entities": [analysis_entity_payload]} # Pass as a list
-            })
+            self._queue_entity(analysis_entity_payload)
             
-            if self._is_mcp_success(result):
-                # Create relation to iteration node
-                # Assuming iteration nodes are named like f"iteration_node_{self.project_id}_{iteration_count}"
-                # or f"iteration_{self.project_id}_{iteration_count}" - check consistency.
-                # Based on store_iteration_start, it's f"iteration_{self.project_id}_{iteration_count}"
-                iteration_name = f"iteration_{self.project_id}_{iteration_count}"
-                self._create_relation(iteration_name, analysis_entity_name, "produces_analysis")
-                
-                self.logger.info(f"MEMORY: Stored analysis insights for iteration {iteration_count} as entity {analysis_entity_name}")
-                return True
-            else:
-                error_details = result.get('error', result)
-                self.logger.error(f"MEMORY: Failed to store analysis insights for iteration {iteration_count}. Entity: {analysis_entity_name}. Error: {error_details}")
-                return False
+            # Create relation to iteration node
+            # Assuming iteration nodes are named like f"iteration_node_{self.project_id}_{iteration_count}"
+            # or f"iteration_{self.project_id}_{iteration_count}" - check consistency.
+            # Based on store_iteration_start, it's f"iteration_{self.project_id}_{iteration_count}"
+            iteration_name = f"iteration_{self.project_id}_{iteration_count}"
+            self._create_relation(iteration_name, analysis_entity_name, "produces_analysis")
+            
+            self._writes_queued(iteration_count)
+            self.logger.info(f"MEMORY: Queued analysis insights for iteration {iteration_count} as entity {analysis_entity_name}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"MEMORY: Analysis insights storage failed for iteration {iteration_count}: {e}", exc_info=True)
             return False
     
+    def flush(self) -> bool:
+        """Write all queued memory writes now. Returns False if any batch failed."""
+        if not self.memory_service_available:
+            return True
+        return self._write_queue.flush()
+    
+    def close(self):
+        """Flush queued writes, export the snapshot, stop the write-behind thread and close the backend."""
+        self.write_behind = False
+        self._write_queue.close()
+        if self.snapshot_path and self.memory_service_available:
+            # Roll up every operation first so the next build starts from per-file histories
+            self.compact_memory(self._latest_iteration + self.compact_after_iterations)
+            self.export_snapshot(self.snapshot_path)
+        if self._read_pool is not None:
+            self._read_pool.shutdown(wait=True)
+        if self.vector_index is not None:
+            self.vector_index.save()
+        self.memory_service_available = False
+        self.backend.close()
+    
+    def export_snapshot(self, path: str, project_dir: Optional[str] = None) -> Dict:
+        """Write this project's subgraph to a snapshot file. Returns the snapshot header or {"error": ...}."""
+        if not self.memory_service_available:
+            return {"error": "Memory service unavailable"}
+        self.flush()
+        header = export_snapshot(self.backend, self.project_id, path, project_dir, logger=self.logger)
+        if "error" in header:
+            self.logger.warning(f"MEMORY: {header['error']}")
+        return header
+    
+    def import_snapshot(self, path: str) -> Dict:
+        """
+        Warm-start from a snapshot written by an earlier build of this project.
+        
+        File and directory history is re-keyed onto this project's ID and
+        loaded in bulk, so context lookups find it without extra LLM calls.
+        Returns the number of entities and relations imported or {"error": ...}.
+        """
+        if not self.memory_service_available:
+            return {"error": "Memory service unavailable"}
+        self.flush()
+        report = import_snapshot(self.backend, path, self.project_id, delete_source=self.snapshot_replace_source,
+                                 logger=self.logger)
+        if "error" in report:
+            self.logger.warning(f"MEMORY: {report['error']}")
+            return report
+        
+        if report["source_deleted"]:
+            self._mirror.forget_entities(set(report["renamed"]))
+        # Entities that already existed were left untouched by create_entities
+        self._mirror.load([e for e in report["entities"] if not self._mirror.has_entity(e["name"])], report["relations"])
+        if self.vector_index is not None:
+            # Reuse the embeddings of the previous build's rows, then queue whatever is new
+            self.vector_index.rekey(report["renamed"], report["source_project_id"], self.project_id,
+                                    keep_source=not report["source_deleted"])
+            for entity in report["entities"]:
+                self.vector_index.add(entity["name"], entity.get("entityType", ""), entity.get("observations", []))
+        self._writes_queued()
+        return {
+            "source_project_id": report["source_project_id"],
+            "created_at": report["created_at"],
+            "entities": len(report["entities"]),
+            "relations": len(report["relations"])
+        }
+    
+    def compact_memory(self, current_iteration: Optional[int] = None) -> Dict:
+        """
+        Compact this project's part of the memory graph.
+        
+        File and directory operations older than compact_after_iterations are
+        rolled up into one history entity per file or directory and deleted.
+        Superseded "Key: value" observations are dropped, and every entity
+        keeps at most max_observations (its first plus the most recent).
+        Each iteration is rolled up once; call this at iteration boundaries.
+        
+        Returns a report with entity and relation counts before and after.
+        """
+        if not self.compaction_enabled:
+            return {"skipped": True}
+        if not self.memory_service_available:
+            return {"error": "Memory service unavailable"}
+        current = current_iteration if current_iteration is not None else self._latest_iteration
+        cutoff = current - self.compact_after_iterations
+        if cutoff <= self._compacted_through:
+            return {"skipped": True, "compacted_through": self._compacted_through}
+        
+        self.flush()
+        try:
+            graph = self._call_memory("read_graph", {})
+            if not self._is_mcp_success(graph) or not isinstance(graph.get("result"), dict):
+                return {"error": f"Failed to read memory graph: {graph.get('error', graph)}"}
+            entities = graph["result"].get("entities", [])
+            relations = graph["result"].get("relations", [])
+            by_name = {entity.get("name"): entity for entity in entities}
+            
+            op_targets = {
+                r.get("from"): r.get("to") for r in relations
+                if r.get("relationType") in ("OPERATED_ON_FILE", "OPERATED_ON_DIRECTORY")
+            }
+            op_prefixes = (f"file_op_{self.project_id}_", f"dir_op_{self.project_id}_")
+            
+            # target entity -> [(iteration, operation, task)] for operations to roll up
+            rollups: Dict[str, List] = {}
+            rolled_up_ops = []
+            for entity in entities:
+                name = entity.get("name", "")
+                target = op_targets.get(name)
+                if not name.startswith(op_prefixes) or not target:
+                    continue
+                operation, iteration, task = None, None, None
+                for observation in entity.get("observations", []):
+                    match = OPERATION_PATTERN.match(observation) or OPERATION_TASK_PATTERN.match(observation)
+                    if match and match.re is OPERATION_PATTERN:
+                        operation = match.group(1)
+                    elif match:
+                        task, iteration = match.group(1), int(match.group(2))
+                if operation is None or iteration is None or iteration > cutoff:
+                    continue
+                rollups.setdefault(target, []).append((iteration, operation, task))
+                rolled_up_ops.append(name)
+            
+            relations_added = 0
+            for target, operations in rollups.items():
+                relations_added += self._write_history_entity(target, by_name.get(target), by_name.get(f"{target}_history"), operations, cutoff)
+            
+            for start in range(0, len(rolled_up_ops), 200):
+                result = self._call_memory("delete_entities", {"entityNames": rolled_up_ops[start:start + 200]})
+                if not self._is_mcp_success(result):
+                    return {"error": f"Failed to delete rolled-up operations: {result.get('error', result)}"}
+            deleted = set(rolled_up_ops)
+            self._mirror.forget_entities(deleted)
+            
+            # Drop superseded observations and cap the rest
+            dropped_observations: Dict[str, List[str]] = {}
+            for entity in entities:
+                name = entity.get("name", "")
+                if self.project_id not in name or name in deleted:
+                    continue
+                dropped = self._observations_to_drop(entity.get("observations", []))
+                if dropped:
+                    dropped_observations[name] = dropped
+            deletions = [{"entityName": name, "observations": items} for name, items in dropped_observations.items()]
+            for start in range(0, len(deletions), 200):
+                result = self._call_memory("delete_observations", {"deletions": deletions[start:start + 200]})
+                if not self._is_mcp_success(result):
+                    return {"error": f"Failed to delete observations: {result.get('error', result)}"}
+            for name, items in dropped_observations.items():
+                self._mirror.forget_observations(name, items)
+            
+            if self.vector_index is not None:
+                self.vector_index.remove(deleted, dropped_observations)
+        except Exception as e:
+            self.logger.error(f"MEMORY: Memory compaction failed: {e}", exc_info=True)
+            return {"error": str(e)}
+        
+        self._compacted_through = cutoff
+        self._writes_queued() # Cached context may include what was just removed
+        relations_removed = sum(1 for r in relations if r.get("from") in deleted or r.get("to") in deleted)
+        new_histories = sum(1 for target in rollups if f"{target}_history" not in by_name)
+        report = {
+            "compacted_through": cutoff,
+            "entities_before": len(entities),
+            "entities_after": len(entities) - len(deleted) + new_histories,
+            "relations_before": len(relations),
+            "relations_after": len(relations) - relations_removed + relations_added,
+            "operations_rolled_up": len(deleted),
+            "histories_updated": len(rollups),
+            "observations_dropped": sum(len(items) for items in dropped_observations.values())
+        }
+        self.logger.info(
+            f"MEMORY: Compacted memory through iteration {cutoff}: entities {report['entities_before']} -> "
+            f"{report['entities_after']}, relations {report['relations_before']} -> {report['relations_after']}, "
+            f"{report['operations_rolled_up']} operations rolled up, {report['observations_dropped']} observations dropped"
+        )
+        return report
+    
+    def get_write_stats(self) -> Dict:
+        """Write-behind queue counters."""
+        return dict(self._write_queue.stats, pending=self._write_queue.pending(), mirror=self._mirror.stats())
+    
     # Private helper methods
     
+    def _write_history_entity(self, target: str, target_entity: Optional[Dict], history: Optional[Dict],
+                              operations: List, through_iteration: int) -> int:
+        """Create or update the history entity of a file/directory. Returns the number of relations created."""
+        counts: Dict[str, int] = {}
+        iterations = set()
+        tasks: List[str] = []
+        old_observations = history.get("observations", []) if history else []
+        for observation in old_observations:
+            key, _, value = observation.partition(": ")
+            if key == "Operation counts":
+                for part in value.split(", "):
+                    operation, _, count = part.rpartition("=")
+                    if operation and count.isdigit():
+                        counts[operation] = counts.get(operation, 0) + int(count)
+            elif key == "Iterations":
+                iterations.update(int(i) for i in value.split(", ") if i.isdigit())
+            elif key == "Tasks":
+                tasks.extend(t for t in value.split(", ") if t)
+        
+        operations = sorted(operations, key=lambda op: op[0])
+        for iteration, operation, task in operations:
+            counts[operation] = counts.get(operation, 0) + 1
+            iterations.add(iteration)
+            if task and task not in tasks:
+                tasks.append(task)
+        last_iteration, last_operation, last_task = operations[-1]
+        
+        name = f"{target}_history"
+        is_directory = (target_entity or {}).get("entityType") == "DirectoryArtifact" or target.startswith(f"dir_{self.project_id}_")
+        new_observations = [
+            f"Rolled-up operations on {target} through iteration {through_iteration}",
+            "Operation counts: " + ", ".join(f"{op}={n}" for op, n in sorted(counts.items())),
+            "Iterations: " + ", ".join(str(i) for i in sorted(iterations)),
+            "Tasks: " + ", ".join(tasks[-20:]),
+            f"Last operation: {last_operation} in iteration {last_iteration} (task {last_task})"
+        ]
+        # Keep the existing "Last operation" if it is later than anything rolled up now
+        previous_last = next((o for o in old_observations if o.startswith("Last operation: ")), None)
+        match = re.search(r" in iteration (\d+) ", previous_last) if previous_last else None
+        if match and int(match.group(1)) > last_iteration:
+            new_observations[-1] = previous_last
+        
+        relations_created = 0
+        if history is None:
+            entity = {"name": name, "entityType": "DirectoryHistory" if is_directory else "FileHistory", "observations": new_observations}
+            result = self._call_memory("create_entities", {"entities": [entity]})
+            if not self._is_mcp_success(result):
+                raise RuntimeError(f"Failed to create history entity {name}: {result.get('error', result)}")
+            history_relations = [
+                {"from": name, "to": target, "relationType": "SUMMARIZES"},
+                {"from": name, "to": self.project_node_name, "relationType": "PART_OF_PROJECT"}
+            ]
+            result = self._call_memory("create_relations", {"relations": history_relations})
+            if self._is_mcp_success(result):
+                relations_created = len(history_relations)
+                for relation in history_relations:
+                    self._mirror.add_relation(relation["from"], relation["to"], relation["relationType"])
+            self._mirror.load([entity])
+        else:
+            stale = [o for o in old_observations if o not in new_observations]
+            added = [o for o in new_observations if o not in old_observations]
+            if stale:
+                result = self._call_memory("delete_observations", {"deletions": [{"entityName": name, "observations": stale}]})
+                if not self._is_mcp_success(result):
+                    raise RuntimeError(f"Failed to update history entity {name}: {result.get('error', result)}")
+                self._mirror.forget_observations(name, stale)
+            if added:
+                result = self._call_memory("add_observations", {"observations": [{"entityName": name, "contents": added}]})
+                if not self._is_mcp_success(result):
+                    raise RuntimeError(f"Failed to update history entity {name}: {result.get('error', result)}")
+            self._mirror.load([dict(history, observations=new_observations)])
+            if self.vector_index is not None and stale:
+                self.vector_index.remove(observations={name: stale})
+        
+        if self.vector_index is not None:
+            self.vector_index.add(name, "DirectoryHistory" if is_directory else "FileHistory", new_observations)
+        return relations_created
+    
+    def _observations_to_drop(self, observations: List[str]) -> List[str]:
+        """Superseded observations plus the oldest ones beyond max_observations (the first is always kept)."""
+        kept = []
+        seen_keys = set()
+        dropped = []
+        for observation in reversed(observations):
+            key = observation.partition(": ")[0]
+            if key in SUPERSEDED_OBSERVATION_KEYS:
+                if key in seen_keys:
+                    dropped.append(observation)
+                    continue
+                seen_keys.add(key)
+            kept.append(observation)
+        kept.reverse()
+        if self.max_observations > 0 and len(kept) > self.max_observations:
+            dropped.extend(kept[1:len(kept) - self.max_observations + 1])
+        return dropped
+    
+    def _vector_search(self, query: str, limit: int) -> Optional[List[Dict]]:
+        """Ranked entities from the vector index, or None if embedding failed."""
+        if len(self.vector_index) == 0:
+            # Index what the backend already holds, e.g. from earlier runs
+            self.flush()
+            graph = self._call_memory("read_graph", {})
+            if self._is_mcp_success(graph) and isinstance(graph.get("result"), dict):
+                entities = graph["result"].get("entities", [])
+                self._mirror.load(entities, graph["result"].get("relations", []))
+                for entity in entities:
+                    self.vector_index.add(entity.get("name", ""), entity.get("entityType", ""), entity.get("observations", []))
+        
+        ranked = self.vector_index.search(query, limit)
+        if ranked is None:
+            return None
+        self.vector_index.save()
+        return [
+            {
+                "entity_name": item["entity_name"],
+                "entity_type": item["entity_type"],
+                "observations": item["matches"],
+                "relevance_score": round(item["relevance_score"], 4)
+            }
+            for item in ranked
+        ]
+    
+    def _call_memory(self, tool_name: str, arguments: Dict) -> Dict:
+        """Call a memory tool on the backend."""
+        return self.backend.call_tool(tool_name, arguments)
+    
+    def _open_nodes(self, names: List[str]) -> Dict:
+        """open_nodes, answered from the mirror when every node is known locally."""
+        mirrored = self._mirror.open_nodes(names)
+        if mirrored is not None:
+            return {"result": mirrored}
+        self.flush()
+        result = self._call_memory("open_nodes", {"names": names})
+        if self._is_mcp_success(result) and isinstance(result.get("result"), dict):
+            self._mirror.load(result["result"].get("entities", []), result["result"].get("relations", []))
+        return result
+    
+    def _search_nodes(self, query: str) -> Dict:
+        """search_nodes on the server; the entities found are added to the mirror."""
+        result = self._call_memory("search_nodes", {"query": query})
+        if self._is_mcp_success(result) and isinstance(result.get("result"), dict):
+            self._mirror.load(result["result"].get("entities", []), result["result"].get("relations", []))
+        return result
+    
+    def _write_batch(self, tool_name: str, arguments: Dict) -> bool:
+        """Write one batch from the write-behind queue."""
+        result = self._call_memory(tool_name, arguments)
+        if not self._is_mcp_success(result):
+            self.logger.warning(f"MEMORY: {tool_name} failed: {result.get('error', result)}")
+            # Forget the failed writes so that the next upsert sends them again
+            if tool_name == "create_entities":
+                self._mirror.forget_entities(e["name"] for e in arguments["entities"])
+            elif tool_name == "create_relations":
+                self._mirror.forget_relations((r["from"], r["to"], r["relationType"]) for r in arguments["relations"])
+            elif tool_name == "add_observations":
+                for item in arguments["observations"]:
+                    self._mirror.forget_observations(item["entityName"], item["contents"])
+            return False
+        return True
+    
+    def _queue_entity(self, entity: Dict):
+        """Upsert an entity given in the create_entities schema."""
+        name = entity["name"]
+        created, new_observations = self._mirror.upsert_entity(name, entity["entityType"], entity.get("observations", []))
+        if self.vector_index is not None and new_observations:
+            self.vector_index.add(name, entity["entityType"], new_observations)
+        if created:
+            self._write_queue.add_entity(name, entity["entityType"], new_observations)
+        elif new_observations:
+            self._write_queue.add_observations(name, new_observations)
+    
+    def _add_observations(self, entity_name: str, contents: List[str]):
+        """Queue the observations the entity does not have yet."""
+        new_observations = self._mirror.add_observations(entity_name, contents)
+        if self.vector_index is not None and new_observations:
+            self.vector_index.add(entity_name, self._mirror.entity_type(entity_name) or "", new_observations)
+        if new_observations:
+            self._write_queue.add_observations(entity_name, new_observations)
+    
+    def _queue_context_memory(self, context_memory: ContextMemory):
+        """Queue a ContextMemory entity together with its relations."""
+        self._queue_entity(context_memory.to_entity())
+        for relation in context_memory.relations:
+            self._create_relation(relation["from_entity"], relation["to_entity"], relation["type"])
+    
+    def _writes_queued(self, iteration_count: Optional[int] = None):
+        """
+        Invalidate cached context the writes affect (all of it when the
+        iteration is unknown), and send them right away when write-behind is disabled.
+        """
+        if iteration_count is not None:
+            self._latest_iteration = max(self._latest_iteration, iteration_count)
+        with self._cache_lock:
+            self._context_generation += 1
+            if iteration_count is None:
+                self._context_cache.clear()
+            else:
+                for cached_iteration in [i for i in self._context_cache if i >= iteration_count]:
+                    del self._context_cache[cached_iteration]
+        if not self.write_behind:
+            self._write_queue.flush()
+    
+    def _normalize_path(self, path: str) -> str:
+        """Make a path relative to the project root, as stored in memory."""
+        if path.startswith(("/workspace/", "workspace/")):
+            path = path.replace("/workspace/", "", 1).replace("workspace/", "", 1)
+        if path.startswith("./"):
+            path = path[2:]
+        return path.strip('/')
+    
+    def _file_entity_name(self, file_path: str) -> str:
+        return f"file_{self.project_id}_{file_path.replace('/', '_')}"
+    
     def _store_file_context(self, iteration_count: int, task_id: str, files: List[str], agent_type: str):
         """Store context for multiple files affected by a task."""
         for file_path in files:
@@ -601,10 +972,7 @@ class MemoryContextManager:
         """Get context from previous iteration."""
         try:
             iteration_name = f"iteration_{self.project_id}_{prev_iteration}"
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "open_nodes",
-                "arguments": {"names": [iteration_name]}
-            })
+            result = self._open_nodes([iteration_name])
             
             if self._is_mcp_success(result):
                 entities = result.get("result", {}).get("entities", [])
@@ -621,10 +989,7 @@ class MemoryContextManager:
     def _get_file_evolution_history(self) -> List[Dict]:
         """Get file evolution history across iterations."""
         try:
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "search_nodes",
-                "arguments": {"query": f"file_{self.project_id}"}
-            })
+            result = self._search_nodes(f"file_{self.project_id}")
             
             if self._is_mcp_success(result):
                 entities = result.get("result", {}).get("entities", [])
@@ -646,10 +1011,7 @@ class MemoryContextManager:
     def _get_task_completion_patterns(self, current_iteration: int) -> List[Dict]:
         """Get patterns from previous task completions."""
         try:
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "search_nodes",
-                "arguments": {"query": f"task_{self.project_id}"}
-            })
+            result = self._search_nodes(f"task_{self.project_id}")
             
             if self._is_mcp_success(result):
                 entities = result.get("result", {}).get("entities", [])
@@ -672,10 +1034,7 @@ class MemoryContextManager:
         """Get insights about project evolution."""
         try:
             # Get analysis entities for evolution insights
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "search_nodes",
-                "arguments": {"query": f"analysis_{self.project_id}"}
-            })
+            result = self._search_nodes(f"analysis_{self.project_id}")
             
             if self._is_mcp_success(result):
                 entities = result.get("result", {}).get("entities", [])
@@ -699,20 +1058,11 @@ class MemoryContextManager:
         self._create_relation(f"project_{self.project_id}", entity_name, relation_type)
     
     def _create_relation(self, from_entity: str, to_entity: str, relation_type: str):
-        """Create a relation between entities."""
-        try:
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "create_relations",
-                "arguments": {"relations": [{"from": from_entity, "to": to_entity, "relationType": relation_type}]}
-            })
-            
-            if self._is_mcp_success(result):
-                self.logger.debug(f"MEMORY: Created relation {from_entity} --{relation_type}--> {to_entity}")
-            else:
-                self.logger.warning(f"MEMORY: Failed to create relation: {result}")
-                
-        except Exception as e:
-            self.logger.error(f"MEMORY: Relation creation failed: {e}")
+        """Queue a relation between entities, unless it is already known."""
+        if not self._mirror.add_relation(from_entity, to_entity, relation_type):
+            return
+        self._write_queue.add_relation(from_entity, to_entity, relation_type)
+        self.logger.debug(f"MEMORY: Queued relation {from_entity} --{relation_type}--> {to_entity}")
     
     def _is_mcp_success(self, result: Dict) -> bool:
         """Check if MCP call was successful."""
@@ -732,12 +1082,10 @@ class MemoryContextManager:
         if not self.memory_service_available:
             self.logger.warning("MEMORY: Memory service is not available. Skipping get_memory_stats.")
             return {"error": "Memory service unavailable"}
+        self.flush()
         try:
             # Get entire graph to analyze
-            result = self.mcp_manager.call_tool("memory", "tools/call", {
-                "name": "read_graph",
-                "arguments": {}
-            })
+            result = self._call_memory("read_graph", {})
             
             if self._is_mcp_success(result):
                 graph = result.get("result", {})
@@ -0,0 +1,133 @@
+"""
+In-process mirror of the knowledge graph entities MemoryContextManager knows.
+
+Holds every entity and relation the manager has written or read, so that
+existence checks are set lookups, repeated creates become no-ops or
+observation-only updates, and reads of the manager's own writes are served
+without a memory server round trip.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+RelationKey = Tuple[str, str, str]
+
+
+class MemoryGraphMirror:
+    """Thread-safe local copy of entities and relations, keyed by name."""
+
+    def __init__(self):
+        self._entities: Dict[str, Dict] = {}
+        self._relations: Set[RelationKey] = set()
+        self._lock = threading.Lock()
+
+    def has_entity(self, name: str) -> bool:
+        with self._lock:
+            return name in self._entities
+
+    def entity_type(self, name: str) -> Optional[str]:
+        with self._lock:
+            entity = self._entities.get(name)
+            return entity["entityType"] if entity else None
+
+    def upsert_entity(self, name: str, entity_type: str, observations: List[str]) -> Tuple[bool, List[str]]:
+        """
+        Record an entity write.
+
+        Returns (created, new_observations): created is True if the entity
+        was not known yet; otherwise new_observations lists the observations
+        it did not have.
+        """
+        with self._lock:
+            entity = self._entities.get(name)
+            if entity is None:
+                self._entities[name] = {"name": name, "entityType": entity_type, "observations": list(observations)}
+                return True, list(observations)
+            return False, self._merge_observations(entity, observations)
+
+    def add_observations(self, name: str, contents: List[str]) -> List[str]:
+        """Record observations for an entity; returns the ones that are new."""
+        with self._lock:
+            entity = self._entities.get(name)
+            if entity is None:
+                return list(contents)
+            return self._merge_observations(entity, contents)
+
+    @staticmethod
+    def _merge_observations(entity: Dict, contents: Iterable[str]) -> List[str]:
+        known = entity["observations"]
+        new = [c for c in dict.fromkeys(contents) if c not in known]
+        known.extend(new)
+        return new
+
+    def add_relation(self, from_entity: str, to_entity: str, relation_type: str) -> bool:
+        """Record a relation; returns False if it was already known."""
+        key = (from_entity, to_entity, relation_type)
+        with self._lock:
+            if key in self._relations:
+                return False
+            self._relations.add(key)
+            return True
+
+    def load(self, entities: List[Dict], relations: Optional[List[Dict]] = None):
+        """Merge entities and relations read from the memory server."""
+        with self._lock:
+            for entity in entities:
+                name = entity.get("name")
+                if not name:
+                    continue
+                known = self._entities.get(name)
+                if known is None:
+                    self._entities[name] = {
+                        "name": name,
+                        "entityType": entity.get("entityType", ""),
+                        "observations": list(entity.get("observations", [])),
+                    }
+                else:
+                    self._merge_observations(known, entity.get("observations", []))
+            for relation in relations or []:
+                self._relations.add((relation.get("from"), relation.get("to"), relation.get("relationType")))
+
+    def open_nodes(self, names: List[str]) -> Optional[Dict]:
+        """
+        Entities and the relations between them, like the server's open_nodes.
+
+        Returns None unless every name is known, so callers fall back to the server.
+        """
+        with self._lock:
+            if not all(name in self._entities for name in names):
+                return None
+            wanted = set(names)
+            return {
+                "entities": [
+                    dict(self._entities[name], observations=list(self._entities[name]["observations"]))
+                    for name in names
+                ],
+                "relations": [
+                    {"from": f, "to": t, "relationType": r}
+                    for f, t, r in self._relations if f in wanted and t in wanted
+                ],
+            }
+
+    def forget_entities(self, names: Iterable[str]):
+        """Drop entities (deleted, or whose write failed) and their relations."""
+        with self._lock:
+            dropped = set(names)
+            for name in dropped:
+                self._entities.pop(name, None)
+            self._relations = {key for key in self._relations if key[0] not in dropped and key[1] not in dropped}
+
+    def forget_observations(self, name: str, contents: Iterable[str]):
+        with self._lock:
+            entity = self._entities.get(name)
+            if entity is not None:
+                dropped = set(contents)
+                entity["observations"] = [o for o in entity["observations"] if o not in dropped]
+
+    def forget_relations(self, keys: Iterable[RelationKey]):
+        with self._lock:
+            self._relations.difference_update(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entities": len(self._entities), "relations": len(self._relations)}
@@ -0,0 +1,259 @@
+"""
+Memory snapshots: a project's knowledge subgraph in one compact file.
+
+A snapshot is JSON Lines: a header line (format, version, project
+directory, source project ID, counts) followed by one line per entity and
+per relation. Files ending in .zst are zstd-compressed (needs the
+zstandard package), .gz files gzip-compressed, anything else is plain.
+
+Every build gets a new timestamped project ID, so snapshots are keyed by
+project directory: the default snapshot lives in the project's .swarmdev
+directory, and importing copies the file and directory history of the
+source project onto the current project ID.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SNAPSHOT_FORMAT = "swarmdev-memory-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Entities that carry history across builds. They are re-keyed onto the
+# importing project; iteration- and task-scoped entities keep their source
+# project ID so they never stand in for the new build's iterations.
+DURABLE_ENTITY_TYPES = {
+    "Project", "FileArtifact", "DirectoryArtifact", "FileOperation",
+    "DirectoryOperation", "FileHistory", "DirectoryHistory",
+}
+
+# Entities and relations per create_* call when loading a snapshot
+IMPORT_BATCH_SIZE = 500
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd memory snapshots require zstandard. Install it with: pip install zstandard")
+    return zstandard
+
+
+def _call_failed(result: Dict) -> bool:
+    nested = result.get("result")
+    return bool(result.get("error")) or (isinstance(nested, dict) and nested.get("isError", False))
+
+
+def default_snapshot_path(project_dir: str = ".") -> str:
+    """The project's snapshot file: an existing one, else .zst when zstandard is installed, else .gz."""
+    base = os.path.join(project_dir, ".swarmdev", "memory_snapshot.jsonl")
+    for path in (base + ".zst", base + ".gz", base):
+        if os.path.exists(path):
+            return path
+    try:
+        _zstandard()
+        return base + ".zst"
+    except ImportError:
+        return base + ".gz"
+
+
+def compression_suffix(path: str) -> str:
+    """The ending that selects the compression of path: ".zst", ".gz" or "" for plain JSON Lines."""
+    for suffix in (".zst", ".gz"):
+        if path.endswith(suffix):
+            return suffix
+    return ""
+
+
+def _open_text(path: str, mode: str):
+    if path.endswith(".zst"):
+        zstandard = _zstandard()
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_snapshot(path: str, entities: List[Dict], relations: List[Dict], project_id: str,
+                   project_dir: Optional[str] = None) -> Dict:
+    """Write entities and relations to path atomically. Returns the header."""
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "project_id": project_id,
+        "project_dir": os.path.abspath(project_dir) if project_dir else None,
+        "created_at": datetime.now().isoformat(),
+        "entities": len(entities),
+        "relations": len(relations),
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # The temporary name keeps the extension, so it is compressed the same way
+    tmp_path = os.path.join(directory, f".tmp-{os.getpid()}-{os.path.basename(path)}")
+    try:
+        with _open_text(tmp_path, "w") as f:
+            f.write(json.dumps(header) + "\n")
+            for entity in entities:
+                f.write(json.dumps({
+                    "kind": "entity",
+                    "name": entity["name"],
+                    "entityType": entity.get("entityType", ""),
+                    "observations": entity.get("observations", []),
+                }) + "\n")
+            for relation in relations:
+                f.write(json.dumps({
+                    "kind": "relation",
+                    "from": relation["from"],
+                    "to": relation["to"],
+                    "relationType": relation["relationType"],
+                }) + "\n")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return header
+
+
+def read_snapshot(path: str) -> Tuple[Dict, List[Dict], List[Dict]]:
+    """Read a snapshot file. Returns (header, entities, relations); raises ValueError if it is not one."""
+    entities, relations = [], []
+    with _open_text(path, "r") as f:
+        lines: Iterator[str] = iter(f)
+        try:
+            header = json.loads(next(lines))
+        except (StopIteration, json.JSONDecodeError):
+            raise ValueError(f"{path} is not a memory snapshot")
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a memory snapshot")
+        if header.get("version", 0) > SNAPSHOT_VERSION:
+            raise ValueError(f"{path} has snapshot version {header['version']}; this SwarmDev reads up to {SNAPSHOT_VERSION}")
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop("kind", None)
+            if kind == "entity":
+                entities.append(record)
+            elif kind == "relation":
+                relations.append(record)
+    return header, entities, relations
+
+
+def project_subgraph(graph: Dict, project_id: str) -> Tuple[List[Dict], List[Dict]]:
+    """The entities whose names carry project_id, and the relations between them."""
+    entities = [e for e in graph.get("entities", []) if project_id in e.get("name", "")]
+    names = {e["name"] for e in entities}
+    relations = [r for r in graph.get("relations", []) if r.get("from") in names and r.get("to") in names]
+    return entities, relations
+
+
+def rekey_subgraph(entities: List[Dict], relations: List[Dict], source_project_id: str,
+                   project_id: str) -> Tuple[List[Dict], List[Dict], Dict[str, str]]:
+    """
+    Move durable entities from source_project_id to project_id.
+
+    Returns the re-keyed entities and relations, and the {old_name: new_name}
+    mapping of the entities that were renamed.
+    """
+    if not source_project_id or source_project_id == project_id:
+        return entities, relations, {}
+    renamed: Dict[str, str] = {}
+    rekeyed_entities = []
+    for entity in entities:
+        name = entity["name"]
+        if entity.get("entityType") in DURABLE_ENTITY_TYPES:
+            new_name = name.replace(source_project_id, project_id)
+            renamed[name] = new_name
+            entity = dict(
+                entity,
+                name=new_name,
+                observations=[o.replace(source_project_id, project_id) for o in entity.get("observations", [])],
+            )
+        rekeyed_entities.append(entity)
+    rekeyed_relations = [
+        dict(r, **{"from": renamed.get(r["from"], r["from"]), "to": renamed.get(r["to"], r["to"])})
+        for r in relations
+    ]
+    return rekeyed_entities, rekeyed_relations, renamed
+
+
+def export_snapshot(backend, project_id: str, path: str, project_dir: Optional[str] = None,
+                    logger: Optional[logging.Logger] = None) -> Dict:
+    """
+    Write project_id's subgraph from a MemoryBackend to path.
+
+    Returns the snapshot header, or {"error": ...}.
+    """
+    logger = logger or logging.getLogger(__name__)
+    graph = backend.call_tool("read_graph", {})
+    if _call_failed(graph) or not isinstance(graph.get("result"), dict):
+        return {"error": f"Failed to read memory graph: {graph.get('error', graph)}"}
+    entities, relations = project_subgraph(graph["result"], project_id)
+    try:
+        header = write_snapshot(path, entities, relations, project_id, project_dir)
+    except (OSError, ImportError) as e:
+        return {"error": f"Failed to write memory snapshot {path}: {e}"}
+    logger.info(f"MEMORY: Exported {len(entities)} entities and {len(relations)} relations of {project_id} to {path}")
+    return header
+
+
+def import_snapshot(backend, path: str, project_id: str, delete_source: bool = False,
+                    logger: Optional[logging.Logger] = None) -> Dict:
+    """
+    Load a snapshot into a MemoryBackend in bulk, re-keyed onto project_id.
+
+    Existing entities are left untouched, and so are the source project's
+    copies of re-keyed entities: a shared store (the memory MCP server, or a
+    SQLite database used by several checkouts) may hold another build's
+    history under those names. With delete_source the copies are deleted
+    afterwards, so a store owned by this project keeps one copy of the
+    history however many builds import it. Returns a report with the
+    imported entities, relations, renamed-entity mapping and whether the
+    source copies were deleted, or {"error": ...}.
+    """
+    logger = logger or logging.getLogger(__name__)
+    try:
+        header, entities, relations = read_snapshot(path)
+    except (OSError, ValueError, ImportError) as e:
+        return {"error": f"Failed to read memory snapshot {path}: {e}"}
+    entities, relations, renamed = rekey_subgraph(entities, relations, header.get("project_id"), project_id)
+
+    for tool_name, argument, items in (("create_entities", "entities", entities),
+                                       ("create_relations", "relations", relations)):
+        for start in range(0, len(items), IMPORT_BATCH_SIZE):
+            result = backend.call_tool(tool_name, {argument: items[start:start + IMPORT_BATCH_SIZE]})
+            if _call_failed(result):
+                return {"error": f"Failed to import memory snapshot {path}: {result.get('error', result)}"}
+
+    deleted = False
+    if delete_source and renamed:
+        old_names = list(renamed)
+        deleted = True
+        for start in range(0, len(old_names), IMPORT_BATCH_SIZE):
+            result = backend.call_tool("delete_entities", {"entityNames": old_names[start:start + IMPORT_BATCH_SIZE]})
+            if _call_failed(result):
+                # The import itself succeeded; the store just keeps a redundant copy
+                logger.warning(f"MEMORY: Could not delete re-keyed entities of {header.get('project_id')}: {result.get('error', result)}")
+                break
+
+    logger.info(
+        f"MEMORY: Imported {len(entities)} entities and {len(relations)} relations "
+        f"from {header.get('project_id')} ({path}) into {project_id}"
+    )
+    return {
+        "source_project_id": header.get("project_id"),
+        "created_at": header.get("created_at"),
+        "entities": entities,
+        "relations": relations,
+        "renamed": renamed,
+        "source_deleted": deleted,
+    }
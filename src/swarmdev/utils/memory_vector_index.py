@@ -0,0 +1,348 @@
+"""
+Local embedding index over knowledge graph observations.
+
+Observations are embedded with the LLM provider's generate_embeddings in
+batches, cached by content hash, and kept as rows of a normalized float32
+NumPy matrix that grows by appending. search() ranks entities by cosine
+similarity to the query (best-matching observation per entity). The index
+is saved under .swarmdev/memory_index and memory-mapped when loaded.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .llm_provider import LLMProviderWrapper
+
+# texts -> one embedding vector per text
+Embedder = Callable[[List[str]], List[List[float]]]
+
+
+class MemoryVectorIndex:
+    """Append-only cosine-similarity index of (entity, observation) rows."""
+
+    def __init__(self, embedder: Embedder, index_dir: Optional[str] = None, model: str = "",
+                 batch_size: int = 64, logger: Optional[logging.Logger] = None):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("The memory vector index requires numpy. Install it with: pip install numpy")
+        self._np = np
+
+        self.embedder = embedder
+        self.index_dir = index_dir
+        self.model = model
+        self.batch_size = max(1, int(batch_size))
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Row i of the matrix belongs to self._entries[i]: [entity_name, entity_type, text_hash, observation]
+        self._entries: List[List[str]] = []
+        self._row_keys = set()  # (entity_name, text_hash)
+        self._vectors_by_hash: Dict[str, int] = {}  # text_hash -> a row holding its embedding
+        self._matrix = None
+        self._size = 0
+        self._pending: Dict[Tuple[str, str], Tuple[str, str, str]] = {}  # (entity, hash) -> (entity_type, text, observation)
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if index_dir:
+            self._load()
+
+    def __len__(self) -> int:
+        return self._size + len(self._pending)
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def add(self, entity_name: str, entity_type: str, observations: List[str]):
+        """Queue observations for embedding. Embeddings are computed on the next search or build()."""
+        with self._lock:
+            for observation in observations:
+                text = f"{entity_type} {entity_name}: {observation}"
+                key = (entity_name, self._hash(text))
+                if key not in self._row_keys:
+                    self._pending[key] = (entity_type, text, observation)
+
+    def build(self) -> bool:
+        """Embed everything queued, in batches. Returns False if the embedder failed."""
+        with self._lock:
+            return self._embed_pending()
+
+    def _embed_pending(self) -> bool:
+        """Caller holds the lock."""
+        np = self._np
+        while self._pending:
+            batch = list(self._pending.items())[:self.batch_size]
+            # Reuse cached embeddings of identical text and embed each new text once
+            missing = list(dict.fromkeys(text_hash for (_, text_hash), _ in batch if text_hash not in self._vectors_by_hash))
+            texts = {text_hash: text for (_, text_hash), (_, text, _) in batch}
+            if missing:
+                try:
+                    vectors = self.embedder([texts[text_hash] for text_hash in missing])
+                except Exception as e:
+                    self.logger.warning(f"MEMORY: Embedding {len(missing)} observations failed: {e}")
+                    return False
+                new_rows = np.asarray(vectors, dtype=np.float32)
+                if self._matrix is not None and new_rows.shape[1:] != self._matrix.shape[1:]:
+                    self._requeue_all(new_rows.shape[-1])
+                    return False
+            else:
+                new_rows = None
+
+            rows = []
+            fresh = {text_hash: i for i, text_hash in enumerate(missing)}
+            for (_, text_hash), _ in batch:
+                if text_hash in fresh:
+                    rows.append(new_rows[fresh[text_hash]])
+                else:
+                    rows.append(self._matrix[self._vectors_by_hash[text_hash]])
+            self._append(np.stack(rows), [
+                (entity_name, entity_type, text_hash, observation)
+                for (entity_name, text_hash), (entity_type, _, observation) in batch
+            ])
+            for key, _ in batch:
+                del self._pending[key]
+        return True
+
+    def _requeue_all(self, dimension: int):
+        """
+        Drop every embedded row and queue its observation again. Caller holds the lock.
+
+        Used when the embedder's dimension changes (e.g. a provider falling back
+        to a local model): vectors of different models cannot be compared, so
+        the index is rebuilt with whatever the embedder returns next.
+        """
+        self.logger.warning(
+            f"MEMORY: Embedding dimension changed from {self._matrix.shape[1]} to {dimension}; "
+            f"re-embedding {self._size} indexed observations"
+        )
+        for entity_name, entity_type, text_hash, observation in self._entries:
+            text = f"{entity_type} {entity_name}: {observation}"
+            self._pending.setdefault((entity_name, text_hash), (entity_type, text, observation))
+        self._entries = []
+        self._row_keys = set()
+        self._vectors_by_hash = {}
+        self._matrix = None
+        self._size = 0
+        self._dirty = True
+
+    def _append(self, vectors, entries: List[Tuple[str, str, str, str]]):
+        """Normalize and append rows, growing the matrix geometrically."""
+        np = self._np
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        needed = self._size + len(vectors)
+        if self._matrix is None or needed > self._matrix.shape[0] or not self._matrix.flags.writeable:
+            if self._matrix is not None and self._matrix.shape[1] != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension changed from {self._matrix.shape[1]} to {vectors.shape[1]}")
+            capacity = max(needed, 2 * (self._matrix.shape[0] if self._matrix is not None else 0), 256)
+            grown = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            if self._matrix is not None:
+                grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size:needed] = vectors
+        for offset, (entity_name, entity_type, text_hash, observation) in enumerate(entries):
+            self._entries.append([entity_name, entity_type, text_hash, observation])
+            self._row_keys.add((entity_name, text_hash))
+            self._vectors_by_hash.setdefault(text_hash, self._size + offset)
+        self._size = needed
+        self._dirty = True
+
+    def remove(self, entity_names: Iterable[str] = (), observations: Optional[Dict[str, List[str]]] = None):
+        """Drop the rows of deleted entities and of deleted observations ({entity_name: [observation]})."""
+        np = self._np
+        dropped_entities = set(entity_names)
+        dropped_observations = {(name, o) for name, items in (observations or {}).items() for o in items}
+        with self._lock:
+            self._pending = {
+                key: value for key, value in self._pending.items()
+                if key[0] not in dropped_entities and (key[0], value[2]) not in dropped_observations
+            }
+            keep = [
+                row for row, (entity_name, _, _, observation) in enumerate(self._entries)
+                if entity_name not in dropped_entities and (entity_name, observation) not in dropped_observations
+            ]
+            if len(keep) == self._size:
+                return
+            self._matrix = np.array(self._matrix[:self._size][keep], dtype=np.float32) if keep else None
+            self._entries = [self._entries[row] for row in keep]
+            self._size = len(keep)
+            self._row_keys = set()
+            self._vectors_by_hash = {}
+            for row, (entity_name, _, text_hash, _) in enumerate(self._entries):
+                self._row_keys.add((entity_name, text_hash))
+                self._vectors_by_hash.setdefault(text_hash, row)
+            self._dirty = True
+
+    def rekey(self, renamed: Dict[str, str], source_project_id: str, project_id: str, keep_source: bool = False):
+        """
+        Move rows to new entity names ({old_name: new_name}) after a snapshot
+        import, keeping their embeddings. source_project_id is replaced by
+        project_id in the observations of renamed entities, as on import.
+        With keep_source the old rows stay and the new names get copies.
+        """
+        if not renamed:
+            return
+        with self._lock:
+            pending = {}
+            for (entity_name, text_hash), (entity_type, text, observation) in self._pending.items():
+                if entity_name in renamed:
+                    if keep_source:
+                        pending[(entity_name, text_hash)] = (entity_type, text, observation)
+                    entity_name = renamed[entity_name]
+                    observation = observation.replace(source_project_id, project_id)
+                    text = f"{entity_type} {entity_name}: {observation}"
+                    text_hash = self._hash(text)
+                pending[(entity_name, text_hash)] = (entity_type, text, observation)
+            self._pending = pending
+
+            if keep_source:
+                rows, entries = [], []
+                for row, (entity_name, entity_type, _, observation) in enumerate(self._entries):
+                    if entity_name in renamed:
+                        new_name = renamed[entity_name]
+                        observation = observation.replace(source_project_id, project_id)
+                        text_hash = self._hash(f"{entity_type} {new_name}: {observation}")
+                        if (new_name, text_hash) not in self._row_keys:
+                            rows.append(row)
+                            entries.append((new_name, entity_type, text_hash, observation))
+                if rows:
+                    self._append(self._np.array(self._matrix[rows], dtype=self._np.float32), entries)
+                return
+
+            self._row_keys = set()
+            for row, entry in enumerate(self._entries):
+                entity_name, entity_type, _, observation = entry
+                if entity_name in renamed:
+                    entry[0] = renamed[entity_name]
+                    entry[3] = observation.replace(source_project_id, project_id)
+                    entry[2] = self._hash(f"{entity_type} {entry[0]}: {entry[3]}")
+                    self._vectors_by_hash.setdefault(entry[2], row)
+                    self._dirty = True
+                self._row_keys.add((entry[0], entry[2]))
+
+    def search(self, query: str, limit: int = 10) -> Optional[List[Dict]]:
+        """
+        Entities ranked by cosine similarity of their best observation to the query.
+
+        Returns None if embeddings could not be computed, so callers can fall back.
+        """
+        np = self._np
+        with self._lock:
+            if not self._embed_pending():
+                return None
+            if self._size == 0:
+                return []
+            try:
+                query_vector = np.asarray(self.embedder([query])[0], dtype=np.float32)
+            except Exception as e:
+                self.logger.warning(f"MEMORY: Embedding search query failed: {e}")
+                return None
+            if query_vector.shape != self._matrix.shape[1:]:
+                self._requeue_all(query_vector.shape[-1])
+                return None
+            query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+            scores = self._matrix[:self._size] @ query_vector
+
+            # Over-fetch rows so that entities with several matching observations still yield `limit` entities
+            k = min(self._size, limit * 4)
+            top_rows = np.argpartition(-scores, k - 1)[:k]
+            top_rows = top_rows[np.argsort(-scores[top_rows])]
+
+            results: Dict[str, Dict] = {}
+            for row in top_rows:
+                entity_name, entity_type, _, observation = self._entries[row]
+                item = results.get(entity_name)
+                if item is None:
+                    if len(results) >= limit:
+                        continue
+                    item = results[entity_name] = {
+                        "entity_name": entity_name,
+                        "entity_type": entity_type,
+                        "matches": [],
+                        "relevance_score": float(scores[row]),
+                    }
+                item["matches"].append(observation)
+            return list(results.values())
+
+    def _paths(self) -> Tuple[str, str]:
+        return os.path.join(self.index_dir, "vectors.npy"), os.path.join(self.index_dir, "index.json")
+
+    def _load(self):
+        vectors_path, meta_path = self._paths()
+        if not (os.path.exists(vectors_path) and os.path.exists(meta_path)):
+            return
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model:
+                self.logger.info(f"MEMORY: Embedding model changed ({meta.get('model')} -> {self.model}); rebuilding vector index")
+                return
+            entries = meta.get("entries", [])
+            if not entries:
+                return
+            matrix = self._np.load(vectors_path, mmap_mode="r")
+            if matrix.shape[0] != len(entries):
+                raise ValueError(f"{matrix.shape[0]} vectors for {len(entries)} entries")
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"MEMORY: Ignoring unreadable vector index in {self.index_dir}: {e}")
+            return
+        self._matrix = matrix  # Read-only memory map until the first append
+        self._size = len(entries)
+        self._entries = entries
+        for row, (entity_name, _, text_hash, _) in enumerate(entries):
+            self._row_keys.add((entity_name, text_hash))
+            self._vectors_by_hash.setdefault(text_hash, row)
+        self.logger.info(f"MEMORY: Loaded vector index with {self._size} observations from {self.index_dir}")
+
+    def save(self):
+        """Write embedded rows to index_dir (no-op if nothing changed)."""
+        if not self.index_dir:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.index_dir, exist_ok=True)
+            vectors_path, meta_path = self._paths()
+            # Write to temporary files first so a crash never leaves vectors and entries out of step
+            matrix = self._matrix[:self._size] if self._matrix is not None else self._np.zeros((0, 0), dtype=self._np.float32)
+            self._np.save(vectors_path + ".tmp.npy", matrix)
+            with open(meta_path + ".tmp", "w") as f:
+                json.dump({"model": self.model, "entries": self._entries}, f)
+            os.replace(vectors_path + ".tmp.npy", vectors_path)
+            os.replace(meta_path + ".tmp", meta_path)
+            self._dirty = False
+
+
+def create_vector_index(config: Optional[Dict], llm_provider, project_dir: str = ".",
+                        logger: Optional[logging.Logger] = None) -> Optional[MemoryVectorIndex]:
+    """
+    Build the vector index for search_relevant_context, or None when it is
+    disabled, there is no LLM provider, or numpy is missing.
+    """
+    config = config or {}
+    logger = logger or logging.getLogger(__name__)
+    if not config.get("vector_index", True) or llm_provider is None:
+        return None
+
+    # Without an explicit embedding_model each provider uses its own default
+    model = config.get("embedding_model")
+    kwargs = {"embedding_model": model} if model else {}
+    kwargs["as_numpy"] = True  # One float32 block per batch instead of nested lists
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        return llm_provider.generate_embeddings(texts, **kwargs)
+
+    # Label the index by the concrete provider, not by caching or other wrappers around it
+    base_provider = llm_provider.unwrap() if isinstance(llm_provider, LLMProviderWrapper) else llm_provider
+    index_dir = config.get("vector_index_path") or os.path.join(project_dir, ".swarmdev", "memory_index")
+    try:
+        return MemoryVectorIndex(embed, index_dir=index_dir, model=model or f"{type(base_provider).__name__}:default",
+                                 batch_size=config.get("embedding_batch_size", 64), logger=logger)
+    except ImportError as e:
+        logger.warning(f"MEMORY: Vector index disabled: {e}")
+        return None
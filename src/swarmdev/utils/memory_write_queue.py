@@ -0,0 +1,163 @@
+"""
+Write-behind queue for knowledge graph writes.
+
+MemoryContextManager records entities, observations and relations here
+instead of calling the memory MCP server for each one. A background thread
+coalesces them into batched create_entities / create_relations /
+add_observations calls, flushed when the batch is full or the oldest
+pending write is older than the flush interval. Callers that need their
+writes to be visible (iteration boundaries, reads) call flush().
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Writes a batch: (memory tool name, tool arguments) -> success
+BatchWriter = Callable[[str, Dict], bool]
+
+
+class MemoryWriteQueue:
+    """Coalescing write-behind buffer flushed on a background thread."""
+
+    def __init__(self, writer: BatchWriter, batch_size: int = 50, flush_interval: float = 1.0,
+                 logger: Optional[logging.Logger] = None):
+        self.writer = writer
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Pending writes, in insertion order
+        self._entities: Dict[str, Dict] = {}
+        self._relations: Dict[Tuple[str, str, str], Dict] = {}
+        self._observations: Dict[str, List[str]] = {}
+        self._oldest_pending: Optional[float] = None
+
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # Keeps batches in enqueue order
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.stats = {
+            "entities_written": 0,
+            "relations_written": 0,
+            "observations_written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+        }
+
+    def add_entity(self, name: str, entity_type: str, observations: List[str]):
+        """Queue an entity. Entities queued twice under one name are merged."""
+        with self._cond:
+            pending = self._entities.get(name)
+            if pending is None:
+                self._entities[name] = {"name": name, "entityType": entity_type, "observations": list(observations)}
+            else:
+                pending["observations"].extend(o for o in observations if o not in pending["observations"])
+            self._enqueued()
+
+    def add_relation(self, from_entity: str, to_entity: str, relation_type: str):
+        """Queue a relation. Duplicates of a pending relation are dropped."""
+        key = (from_entity, to_entity, relation_type)
+        with self._cond:
+            if key not in self._relations:
+                self._relations[key] = {"from": from_entity, "to": to_entity, "relationType": relation_type}
+            self._enqueued()
+
+    def add_observations(self, entity_name: str, contents: List[str]):
+        """Queue observations for an existing (or already queued) entity."""
+        with self._cond:
+            pending = self._observations.setdefault(entity_name, [])
+            pending.extend(c for c in contents if c not in pending)
+            self._enqueued()
+
+    def pending(self) -> int:
+        """Number of queued entities, relations and observation groups."""
+        with self._cond:
+            return self._pending_locked()
+
+    def _pending_locked(self) -> int:
+        return len(self._entities) + len(self._relations) + len(self._observations)
+
+    def _enqueued(self):
+        """Caller holds self._cond."""
+        first_pending = self._oldest_pending is None
+        if first_pending:
+            self._oldest_pending = time.monotonic()
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+            self._thread.start()
+        # An idle worker waits without a timeout: wake it to start the flush interval
+        if first_pending or self._pending_locked() >= self.batch_size:
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    pending = self._pending_locked()
+                    if pending >= self.batch_size:
+                        break
+                    if pending and time.monotonic() - self._oldest_pending >= self.flush_interval:
+                        break
+                    timeout = None
+                    if pending:
+                        timeout = self.flush_interval - (time.monotonic() - self._oldest_pending)
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Write everything queued so far, in the calling thread.
+
+        Returns False if any batch failed. Failed writes are logged and dropped.
+        """
+        with self._flush_lock:
+            with self._cond:
+                entities = list(self._entities.values())
+                relations = list(self._relations.values())
+                observations = [
+                    {"entityName": name, "contents": contents}
+                    for name, contents in self._observations.items()
+                ]
+                self._entities = {}
+                self._relations = {}
+                self._observations = {}
+                self._oldest_pending = None
+
+            # Entities first so that relations and observations can refer to them
+            ok = self._write_batches("create_entities", "entities", entities, "entities_written")
+            ok = self._write_batches("create_relations", "relations", relations, "relations_written") and ok
+            ok = self._write_batches("add_observations", "observations", observations, "observations_written") and ok
+            return ok
+
+    def _write_batches(self, tool_name: str, argument: str, items: List[Dict], counter: str) -> bool:
+        ok = True
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            self.stats["batches"] += 1
+            try:
+                written = self.writer(tool_name, {argument: batch})
+            except Exception as e:
+                self.logger.error(f"MEMORY: Write-behind {tool_name} batch raised: {e}")
+                written = False
+            if written:
+                self.stats[counter] += len(batch)
+            else:
+                self.stats["failed_batches"] += 1
+                self.logger.warning(f"MEMORY: Write-behind {tool_name} batch of {len(batch)} failed; dropping it")
+                ok = False
+        return ok
+
+    def close(self):
+        """Stop the background thread and flush what is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self.flush()
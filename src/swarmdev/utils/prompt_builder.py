@@ -0,0 +1,263 @@
+"""
+Token-budgeted prompt assembly for agent prompts.
+
+PromptBuilder renders each section of a prompt (goal, plan, prior results,
+tool catalog, ...) and fits it into a per-section token budget, counted
+with the provider's tokenizer where one is available. Budget a section
+does not use is lent to over-budget sections in declaration order. An
+over-budget section is compacted deterministically, so the same inputs
+always give the same prompt (and stay cacheable):
+
+1. A shorter rendering supplied by the caller (e.g. the tool catalog
+   with method names only) is used if it fits.
+2. Structured values are re-rendered more tightly: long strings are
+   shortened, long lists and dicts keep their first items, deep nesting
+   is elided.
+3. If that is still too long, the rendered text is cut to its head and
+   tail with a marker saying how much was dropped.
+
+Each build logs the size of every section per call site.
+"""
+
+import functools
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .llm_provider import CHARS_PER_TOKEN, LLMProviderWrapper
+
+# Token budget per section when the llm "prompt" config does not set one
+DEFAULT_BUDGETS = {
+    "goal": 1000,
+    "plan": 3000,
+    "prior_results": 4000,
+    "tool_catalog": 2000,
+}
+
+# Characters per token of providers without a local tokenizer
+CHARS_PER_TOKEN_BY_PROVIDER = {
+    "AnthropicProvider": 3.5,
+    "GoogleProvider": 4.0,
+}
+
+# Successively tighter (max string chars, max items, max depth) renderings of structured sections
+COMPACTION_LEVELS = [
+    (2000, 20, 6),
+    (600, 10, 4),
+    (200, 5, 3),
+    (80, 3, 2),
+]
+
+
+@functools.lru_cache(maxsize=8)
+def _tiktoken_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def get_token_counter(provider=None) -> Callable[[str], int]:
+    """
+    Token counting function for a provider's model: tiktoken for OpenAI when
+    it is installed, otherwise a characters-per-token estimate.
+    """
+    if isinstance(provider, LLMProviderWrapper):
+        provider = provider.unwrap()
+    provider_name = type(provider).__name__ if provider is not None else ""
+    if provider_name == "OpenAIProvider":
+        encoding = _tiktoken_encoding(getattr(provider, "model", "") or "")
+        if encoding is not None:
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+    chars_per_token = CHARS_PER_TOKEN_BY_PROVIDER.get(provider_name, CHARS_PER_TOKEN)
+    return lambda text: int(len(text) / chars_per_token + 0.999) if text else 0
+
+
+def render_value(value: Any, max_string: Optional[int] = None, max_items: Optional[int] = None,
+                 max_depth: Optional[int] = None, omit: Tuple[str, ...] = (), _depth: int = 0) -> str:
+    """
+    Render a value as indented text, optionally shortened.
+
+    Strings longer than max_string keep their start, lists and dicts keep
+    their first max_items entries, and values nested deeper than max_depth
+    are summarized by their size. Dict keys in omit are left out.
+    """
+    indent = "  " * _depth
+    if isinstance(value, str):
+        if max_string is not None and len(value) > max_string:
+            return f"{value[:max_string]}... [{len(value) - max_string} more chars]"
+        return value
+    if isinstance(value, dict):
+        items = [(k, v) for k, v in value.items() if k not in omit]
+        if not items:
+            return "{}"
+        if max_depth is not None and _depth >= max_depth:
+            return f"{{{len(items)} keys: {', '.join(str(k) for k, _ in items[:8])}{', ...' if len(items) > 8 else ''}}}"
+        shown = items if max_items is None else items[:max_items]
+        lines = []
+        for key, item in shown:
+            rendered = render_value(item, max_string, max_items, max_depth, omit, _depth + 1)
+            if isinstance(item, (dict, list, tuple)) and item and rendered.startswith(indent + "  "):
+                # Nested entries go on their own indented lines, even a single one
+                lines.append(f"{indent}{key}:\n{rendered}")
+            else:
+                lines.append(f"{indent}{key}: {rendered}")
+        if len(items) > len(shown):
+            lines.append(f"{indent}... ({len(items) - len(shown)} more keys)")
+        return "\n".join(lines)
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "[]"
+        if max_depth is not None and _depth >= max_depth:
+            return f"[{len(value)} items]"
+        shown = value if max_items is None else value[:max_items]
+        lines = []
+        for item in shown:
+            rendered = render_value(item, max_string, max_items, max_depth, omit, _depth + 1)
+            lines.append(f"{indent}- {rendered.strip()}" if "\n" not in rendered else f"{indent}-\n{rendered}")
+        if len(value) > len(shown):
+            lines.append(f"{indent}... ({len(value) - len(shown)} more items)")
+        return "\n".join(lines)
+    try:
+        return json.dumps(value) if isinstance(value, (bool, type(None))) else str(value)
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+class PromptBuilder:
+    """Fits prompt sections into token budgets and reports the size of each."""
+
+    def __init__(self, provider=None, config: Optional[Dict] = None, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the builder.
+
+        Args:
+            provider: LLM provider whose tokenizer counts tokens
+            config: The llm "prompt" config: budgets per section and omit_keys
+            logger: Logger instance
+        """
+        config = config or {}
+        self.budgets = dict(DEFAULT_BUDGETS, **config.get("budgets", {}))
+        self.omit_keys = tuple(config.get("omit_keys", ["config"]))
+        self.count_tokens = get_token_counter(provider)
+        self.logger = logger or logging.getLogger(__name__)
+
+    def build(self, template: str, sections: Dict[str, Any], call_site: str,
+              fallbacks: Optional[Dict[str, List[str]]] = None, **fixed: str) -> str:
+        """
+        Render sections into template within their budgets.
+
+        Args:
+            template: str.format template with a field per section and per fixed value
+            sections: Budgeted section contents by name, in priority order for spare budget
+            call_site: Name of the calling method, for the size log
+            fallbacks: Shorter renderings per section, tried in order when it is over budget
+            **fixed: Values inserted as-is (e.g. the task description)
+
+        Returns:
+            str: The prompt
+        """
+        rendered = {name: self._render(value) for name, value in sections.items()}
+        sizes = {name: self.count_tokens(text) for name, text in rendered.items()}
+        budgets = self._allocate(sizes)
+
+        compacted = []
+        for name, value in sections.items():
+            if sizes[name] > budgets[name]:
+                rendered[name] = self._compact(value, rendered[name], budgets[name], (fallbacks or {}).get(name, []))
+                compacted.append(f"{name} {sizes[name]}->{self.count_tokens(rendered[name])}")
+
+        prompt = template.format(**{name: text or "None" for name, text in rendered.items()}, **fixed)
+        breakdown = ", ".join(f"{name}={self.count_tokens(text)}" for name, text in rendered.items())
+        self.logger.info(
+            f"PROMPT {call_site}: {self.count_tokens(prompt)} tokens ({breakdown})"
+            + (f"; compacted {', '.join(compacted)}" if compacted else "")
+        )
+        return prompt
+
+    def _render(self, value: Any) -> str:
+        if value is None:
+            return ""
+        return render_value(value, omit=self.omit_keys).strip()
+
+    def _allocate(self, sizes: Dict[str, int]) -> Dict[str, int]:
+        """Budget per section: its own, plus spare budget of smaller sections for over-budget ones in order."""
+        budgets = {name: self.budgets.get(name, self.budgets.get("prior_results", 0)) for name in sizes}
+        spare = sum(max(0, budgets[name] - size) for name, size in sizes.items())
+        for name, size in sizes.items():
+            if size > budgets[name] and spare > 0:
+                extra = min(spare, size - budgets[name])
+                budgets[name] += extra
+                spare -= extra
+        return budgets
+
+    def _compact(self, value: Any, rendered: str, budget: int, fallbacks: List[str]) -> str:
+        for fallback in fallbacks:
+            rendered = fallback.strip()
+            if self.count_tokens(rendered) <= budget:
+                return rendered
+        if isinstance(value, (dict, list, tuple)):
+            for max_string, max_items, max_depth in COMPACTION_LEVELS:
+                rendered = render_value(value, max_string, max_items, max_depth, self.omit_keys).strip()
+                if self.count_tokens(rendered) <= budget:
+                    return rendered
+        return self._truncate(rendered, budget)
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Keep the head and tail of text (two thirds head) within budget tokens."""
+        total = self.count_tokens(text)
+        if total <= budget:
+            return text
+        low, high = 0, len(text)
+        best = ""
+        # Longest character length whose head/tail cut fits: token counts grow with length
+        while low <= high:
+            keep = (low + high) // 2
+            candidate = self._cut(text, keep, total)
+            if self.count_tokens(candidate) <= budget:
+                best, low = candidate, keep + 1
+            else:
+                high = keep - 1
+        return best
+
+    def _cut(self, text: str, keep: int, total_tokens: int) -> str:
+        head = keep * 2 // 3
+        tail = keep - head
+        omitted = total_tokens - self.count_tokens(text[:head]) - (self.count_tokens(text[-tail:]) if tail else 0)
+        return f"{text[:head]}\n[... {max(0, omitted)} tokens omitted ...]\n{text[-tail:] if tail else ''}"
+
+
+def split_context_sections(context: Dict, goal_keys: Tuple[str, ...] = ("goal",)) -> Dict[str, Any]:
+    """
+    Split an agent task context into goal, plan and prior_results sections.
+
+    Keys in goal_keys form the goal, keys mentioning "plan" the plan, and
+    everything else the prior results. Nested copies of the goal text are
+    replaced with a reference, since the goal section already carries it.
+    """
+    if not isinstance(context, dict):
+        return {"goal": None, "plan": None, "prior_results": context}
+    goal = {k: v for k, v in context.items() if k in goal_keys}
+    plan = {k: v for k, v in context.items() if k not in goal_keys and "plan" in str(k).lower()}
+    prior = {k: v for k, v in context.items() if k not in goal and k not in plan}
+    goal_texts = {v for v in goal.values() if isinstance(v, str) and v}
+
+    def dedupe(value):
+        if isinstance(value, str):
+            return "(see GOAL)" if value in goal_texts else value
+        if isinstance(value, dict):
+            return {k: dedupe(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [dedupe(v) for v in value]
+        return value
+
+    goal_value: Any = next(iter(goal.values())) if len(goal) == 1 else goal
+    return {
+        "goal": goal_value or None,
+        "plan": dedupe(plan) or None,
+        "prior_results": dedupe(prior) or None,
+    }
@@ -0,0 +1,62 @@
+"""Tests for the incremental FILE_PATH / ACTION / CONTENT response parser."""
+
+from typing import Dict, Optional
+
+import pytest
+
+from swarmdev.swarm_builder.agents.specialized_agents import FileResponseParser
+
+
+def parse_whole_response(response: str) -> Optional[Dict]:
+    """The header parsing of the former DevelopmentAgent._parse_file_response, for reference."""
+    lines = response.strip().split('\n')
+    file_path = None
+    action = "create"
+    content_start = -1
+    for i, line in enumerate(lines):
+        if line.startswith("FILE_PATH:"):
+            file_path = line.replace("FILE_PATH:", "").strip()
+        elif line.startswith("ACTION:"):
+            action = line.replace("ACTION:", "").strip()
+        elif line.startswith("CONTENT:"):
+            content_start = i + 1
+            break
+    if not file_path or content_start == -1:
+        return None
+    return {"file_path": file_path, "action": action, "content": '\n'.join(lines[content_start:]).strip()}
+
+
+def parse_in_chunks(response: str, size: int) -> Optional[Dict]:
+    parser = FileResponseParser()
+    for start in range(0, len(response), size):
+        parser.feed(response[start:start + size])
+    return parser.close()
+
+
+RESPONSES = [
+    "FILE_PATH: src/app.py\nACTION: modify\nCONTENT:\nprint('hi')\n",
+    "\n\n  FILE_PATH: app.py\nCONTENT:\n\n  def main():\n      pass\n\n",
+    "Here is the file.\nFILE_PATH: app.py\r\nACTION: create\r\nCONTENT:\r\nline one\r\nline two",
+    "FILE_PATH: app.py\nCONTENT: ignored on the header line\nbody\nFILE_PATH: not a header any more\n",
+    "FILE_PATH: empty.py\nCONTENT:",
+    "FILE_PATH: app.py\nACTION: create\nno content marker\n",
+    "ACTION: create\nCONTENT:\nno file path\n",
+    "   \n",
+    "",
+]
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 10 ** 6])
+def test_matches_whole_response_parsing(response, size):
+    assert parse_in_chunks(response, size) == parse_whole_response(response)
+
+
+def test_header_is_known_before_the_body_arrives():
+    parser = FileResponseParser()
+    assert not parser.feed("FILE_PATH: src/app.py\nACTION: modify\n")
+    assert parser.feed("CONTENT:\nimport os")
+    assert (parser.file_path, parser.action, parser.header_complete) == ("src/app.py", "modify", True)
+
+    assert not parser.feed("\nprint(os.getcwd())\n")
+    assert parser.close()["content"] == "import os\nprint(os.getcwd())"
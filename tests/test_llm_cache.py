@@ -0,0 +1,110 @@
+"""Tests for the disk-backed LLM response cache."""
+
+import asyncio
+
+import pytest
+
+from swarmdev.utils.llm_cache import CachingLLMProvider
+from swarmdev.utils.llm_provider import LLMProviderInterface
+
+
+class CountingProvider(LLMProviderInterface):
+    """Answers with the prompt and a call counter, recording usage like a real provider."""
+
+    def __init__(self):
+        super().__init__()
+        self.model = "test-model"
+        self.calls = 0
+
+    def generate_text(self, prompt, **kwargs):
+        self.calls += 1
+        self._update_usage_metrics(10, 5)
+        return f"{prompt} #{self.calls}"
+
+    def generate_chat(self, messages, **kwargs):
+        return self.generate_text(messages[-1]["content"], **kwargs)
+
+    def generate_embeddings(self, texts, **kwargs):
+        return [[0.0] for _ in texts]
+
+    def get_capabilities(self):
+        return {}
+
+
+@pytest.fixture
+def cached(tmp_path):
+    provider = CachingLLMProvider(CountingProvider(), str(tmp_path / "llm_cache.db"))
+    yield provider
+    provider.close()
+
+
+def test_low_temperature_calls_are_served_from_cache(cached):
+    assert cached.generate_text("plan", temperature=0) == "plan #1"
+    assert cached.generate_text("plan", temperature=0) == "plan #1"
+    assert cached.wrapped.calls == 1
+
+    cache = cached.get_usage_metrics()["cache"]
+    assert (cache["hits"], cache["misses"], cache["entries"]) == (1, 1, 1)
+    assert (cache["saved_input_tokens"], cache["saved_output_tokens"]) == (10, 5)
+
+
+def test_high_temperature_and_opt_out_skip_the_cache(cached):
+    cached.generate_text("idea")  # Default temperature 0.7
+    cached.generate_text("idea")
+    cached.generate_text("plan", temperature=0, cache=False)
+    cached.generate_text("plan", temperature=0, cache=False)
+    assert cached.wrapped.calls == 4
+
+    cached.generate_text("idea", cache=True)
+    assert cached.generate_text("idea", cache=True) == "idea #5"
+
+
+def test_generation_parameters_are_part_of_the_key(cached):
+    cached.generate_text("plan", temperature=0, max_tokens=100)
+    cached.generate_text("plan", temperature=0, max_tokens=200)
+    cached.generate_text("plan", temperature=0, model="other-model")
+    assert cached.wrapped.calls == 3
+
+
+def test_streamed_misses_are_stored_and_hits_replayed(cached):
+    assert "".join(cached.generate_text_stream("plan", temperature=0)) == "plan #1"
+    assert list(cached.generate_text_stream("plan", temperature=0)) == ["plan #1"]
+    assert cached.generate_text("plan", temperature=0) == "plan #1"
+    assert cached.wrapped.calls == 1
+
+
+def test_async_calls_share_entries(cached):
+    cached.generate_chat([{"role": "user", "content": "hi"}], temperature=0)
+    response = asyncio.run(cached.agenerate_chat([{"role": "user", "content": "hi"}], temperature=0))
+    assert response == "hi #1"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cached = CachingLLMProvider(CountingProvider(), str(tmp_path / "llm_cache.db"), max_entries=2)
+    try:
+        for prompt in ("a", "b"):
+            cached.generate_text(prompt, temperature=0)
+        cached.generate_text("a", temperature=0)  # Refreshes "a"
+        cached.generate_text("c", temperature=0)  # Evicts "b"
+
+        calls = cached.wrapped.calls
+        cached.generate_text("a", temperature=0)
+        assert cached.wrapped.calls == calls
+        cached.generate_text("b", temperature=0)
+        assert cached.wrapped.calls == calls + 1
+    finally:
+        cached.close()
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    first = CachingLLMProvider(CountingProvider(), path)
+    first.generate_text("plan", temperature=0)
+    first.close()
+
+    second = CachingLLMProvider(CountingProvider(), path)
+    try:
+        assert second.generate_text("plan", temperature=0) == "plan #1"
+        assert second.wrapped.calls == 0
+    finally:
+        second.close()
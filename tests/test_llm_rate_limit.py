@@ -0,0 +1,146 @@
+"""Tests for client-side LLM rate limiting and retries."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from swarmdev.utils.llm_provider import LLMProviderInterface
+from swarmdev.utils.llm_rate_limit import (
+    RateLimitedLLMProvider, RateLimitScheduler, TokenBucket, _retry_after, classify_error
+)
+
+
+class APIError(Exception):
+    def __init__(self, status_code=None, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class ScriptedProvider(LLMProviderInterface):
+    """Raises the scripted errors in turn, then answers."""
+
+    def __init__(self, errors=()):
+        super().__init__()
+        self.model = "test-model"
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate_text(self, prompt, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+    def generate_chat(self, messages, **kwargs):
+        return self.generate_text(str(messages), **kwargs)
+
+    def generate_embeddings(self, texts, **kwargs):
+        return [[0.0] for _ in texts]
+
+    def get_capabilities(self):
+        return {}
+
+
+def limited(provider, **kwargs):
+    options = dict(requests_per_minute=0, tokens_per_minute=0, backoff_base=0.001, backoff_max=0.01)
+    options.update(kwargs)
+    return RateLimitedLLMProvider(provider, **options)
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(60)  # One unit per second
+    now = time.monotonic()
+    assert bucket.wait_time(60, now) == 0
+    bucket.take(60, now)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 0.5) == pytest.approx(0.5)
+    # A request larger than the bucket waits for a full one, not forever
+    assert bucket.wait_time(120, now) == pytest.approx(60.0)
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(0)
+    bucket.take(10 ** 9, time.monotonic())
+    assert bucket.wait_time(10 ** 9, time.monotonic()) == 0
+
+
+def test_retry_after_headers():
+    assert _retry_after(APIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert _retry_after(APIError(429, {"retry-after": "2"})) == 2.0
+    assert _retry_after(APIError(429, {"retry-after": "soon"})) is None
+    assert _retry_after(APIError(429)) is None
+
+
+def test_classify_error():
+    assert classify_error(APIError(429)) == "rate_limited"
+    assert classify_error(APIError(503)) == "server_errors"
+    assert classify_error(APIConnectionError()) == "connection_errors"
+    assert classify_error(APIError(400)) is None
+    assert classify_error(ValueError("bad prompt")) is None
+
+
+def test_transient_errors_are_retried():
+    provider = ScriptedProvider([APIError(503), APIConnectionError()])
+    assert limited(provider, max_retries=2).generate_text("hi", model="retry-model") == "ok"
+    assert provider.calls == 3
+
+
+def test_retries_stop_after_max_retries():
+    provider = ScriptedProvider([APIError(503)] * 3)
+    with pytest.raises(APIError):
+        limited(provider, max_retries=1).generate_text("hi", model="exhausted-model")
+    assert provider.calls == 2
+
+
+def test_client_errors_are_not_retried():
+    provider = ScriptedProvider([APIError(400)])
+    with pytest.raises(APIError):
+        limited(provider, max_retries=3).generate_text("hi", model="client-error-model")
+    assert provider.calls == 1
+
+
+def test_retry_after_pauses_the_scheduler():
+    provider = ScriptedProvider([APIError(429, {"retry-after-ms": "50"})])
+    wrapper = limited(provider, max_retries=1)
+    start = time.monotonic()
+    assert wrapper.generate_text("hi", model="paused-model") == "ok"
+    assert time.monotonic() - start >= 0.05
+    stats = wrapper._scheduler({"model": "paused-model"}).snapshot()
+    assert stats["rate_limited"] == 1 and stats["retries"] == 1
+
+
+def test_interrupted_waiter_releases_its_ticket():
+    scheduler = RateLimitScheduler("test/interrupt", requests_per_minute=60)
+    scheduler._requests.take(60, time.monotonic())  # The next call must wait
+
+    class Interrupt(BaseException):
+        pass
+
+    original_wait = scheduler._cond.wait
+
+    def interrupted_wait(timeout=None):
+        raise Interrupt()
+
+    scheduler._cond.wait = interrupted_wait
+    with pytest.raises(Interrupt):
+        scheduler.acquire(1, caller="interrupted")
+    scheduler._cond.wait = original_wait
+
+    assert scheduler.snapshot()["waiting"] == 0
+    assert scheduler._head() is None
+
+
+
+@pytest.mark.parametrize("module, provider_class", [("openai", "OpenAIProvider"), ("anthropic", "AnthropicProvider")])
+def test_sdk_retries_can_be_disabled(module, provider_class):
+    pytest.importorskip(module)
+    from swarmdev.utils import llm_provider
+
+    provider = getattr(llm_provider, provider_class)(api_key="test-key", sdk_max_retries=0)
+    assert provider.client.max_retries == 0
@@ -0,0 +1,161 @@
+"""Tests for hedged requests and failover across LLM routes."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from swarmdev.utils.llm_provider import LLMProviderInterface
+from swarmdev.utils.llm_routing import HedgedLLMProvider, LLMRoute, create_hedged_provider
+
+
+class APIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers={})
+
+
+class ScriptedProvider(LLMProviderInterface):
+    """Answers with its name after delay seconds, or raises error."""
+
+    def __init__(self, name, delay=0.0, error=None):
+        super().__init__()
+        self.name = name
+        self.model = f"{name}-model"
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    def generate_text(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+    def generate_chat(self, messages, **kwargs):
+        return self.generate_text(str(messages), **kwargs)
+
+    async def agenerate_text(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+    def generate_embeddings(self, texts, **kwargs):
+        return [[0.0] for _ in texts]
+
+    def get_capabilities(self):
+        return {}
+
+
+class BackupProvider(ScriptedProvider):
+    pass
+
+
+def hedged(*providers, **options):
+    routes = [LLMRoute(p.name, p, failure_threshold=2, cooldown=60) for p in providers]
+    options.setdefault("initial_hedge_delay", 5.0)
+    return HedgedLLMProvider(routes, **options)
+
+
+def test_transient_errors_fail_over_to_the_next_route():
+    primary, backup = ScriptedProvider("primary", error=APIError(503)), ScriptedProvider("backup")
+    provider = hedged(primary, backup)
+
+    assert provider.generate_text("hi") == "backup"
+    assert provider.routing_stats["failovers"] == 1
+
+
+def test_other_errors_are_raised_without_failover():
+    primary, backup = ScriptedProvider("primary", error=APIError(400)), ScriptedProvider("backup")
+    provider = hedged(primary, backup)
+
+    with pytest.raises(APIError):
+        provider.generate_text("hi")
+    assert backup.calls == []
+
+
+def test_last_transient_error_is_raised_when_every_route_fails():
+    provider = hedged(ScriptedProvider("primary", error=APIError(503)), ScriptedProvider("backup", error=APIError(429)))
+    with pytest.raises(APIError) as error:
+        provider.generate_text("hi")
+    assert error.value.status_code == 429
+
+
+def test_slow_route_is_hedged_and_the_faster_answer_wins():
+    primary, backup = ScriptedProvider("primary", delay=0.5), ScriptedProvider("backup")
+    provider = hedged(primary, backup, initial_hedge_delay=0.05)
+
+    start = time.monotonic()
+    assert provider.generate_text("hi") == "backup"
+    assert time.monotonic() - start < 0.4
+    assert (provider.routing_stats["hedges"], provider.routing_stats["hedge_wins"]) == (1, 1)
+
+
+def test_async_hedge_cancels_the_losing_request():
+    primary, backup = ScriptedProvider("primary", delay=5), ScriptedProvider("backup")
+    provider = hedged(primary, backup, initial_hedge_delay=0.05)
+
+    start = time.monotonic()
+    assert asyncio.run(provider.agenerate_text("hi")) == "backup"
+    assert time.monotonic() - start < 1
+    assert provider.get_usage_metrics()["routing"]["routes"]["primary"]["cancelled"] == 1
+
+
+def test_async_failover():
+    primary, backup = ScriptedProvider("primary", error=APIError(502)), ScriptedProvider("backup")
+    assert asyncio.run(hedged(primary, backup).agenerate_text("hi")) == "backup"
+
+
+def test_failing_route_is_ranked_last_during_its_cooldown():
+    primary, backup = ScriptedProvider("primary", error=APIError(503)), ScriptedProvider("backup")
+    provider = hedged(primary, backup)
+    provider.generate_text("hi")
+    provider.generate_text("hi")
+    calls = len(primary.calls)
+
+    assert provider.generate_text("hi") == "backup"
+    assert len(primary.calls) == calls
+
+
+def test_caller_model_is_kept_for_the_primary_only():
+    primary, backup = ScriptedProvider("primary", error=APIError(503)), ScriptedProvider("backup", error=APIError(503))
+    pinned = ScriptedProvider("pinned")
+    provider = HedgedLLMProvider([
+        LLMRoute("primary", primary), LLMRoute("backup", backup), LLMRoute("pinned", pinned, model="small"),
+    ])
+
+    provider.generate_text("hi", model="primary-large")
+    assert primary.calls[0]["model"] == "primary-large"
+    assert "model" not in backup.calls[0]
+    assert pinned.calls[0]["model"] == "small"
+
+
+def test_create_hedged_provider_wraps_routes_and_skips_unavailable_ones():
+    primary = ScriptedProvider("primary")
+    wrapped = []
+
+    def wrap(provider):
+        wrapped.append(provider)
+        return provider
+
+    def factory(name, model):
+        if name == "google":
+            raise ValueError("GOOGLE_API_KEY environment variable not set")
+        return BackupProvider(name)
+
+    assert create_hedged_provider(primary, {"enabled": False}, factory, wrap) is primary
+    provider = create_hedged_provider(
+        primary, {"enabled": True, "routes": [{"provider": "google"}, {"provider": "anthropic", "model": "m"}]},
+        factory, wrap
+    )
+    assert isinstance(provider, HedgedLLMProvider)
+    assert [route.model for route in provider.routes] == [None, "m"]
+    assert len(wrapped) == 3
+
+    only_primary = create_hedged_provider(primary, {"enabled": True, "routes": [{"provider": "google"}]}, factory, wrap)
+    assert only_primary is primary
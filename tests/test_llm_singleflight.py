@@ -0,0 +1,134 @@
+"""Tests for coalescing identical in-flight LLM requests."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from swarmdev.utils.llm_provider import LLMProviderInterface
+from swarmdev.utils.llm_singleflight import CoalescingLLMProvider
+
+
+class GatedProvider(LLMProviderInterface):
+    """Holds every call until release() so that callers overlap."""
+
+    def __init__(self, error=None):
+        super().__init__()
+        self.model = "test-model"
+        self.error = error
+        self.calls = 0
+        self.gate = threading.Event()
+        self.async_gate = None
+
+    def generate_text(self, prompt, **kwargs):
+        self.calls += 1
+        self.gate.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return f"{prompt} #{self.calls}"
+
+    def generate_chat(self, messages, **kwargs):
+        return self.generate_text(messages[-1]["content"], **kwargs)
+
+    async def agenerate_text(self, prompt, **kwargs):
+        self.calls += 1
+        await self.async_gate.wait()
+        if self.error is not None:
+            raise self.error
+        return f"{prompt} #{self.calls}"
+
+    def generate_embeddings(self, texts, **kwargs):
+        return [[0.0] for _ in texts]
+
+    def get_capabilities(self):
+        return {}
+
+
+def run_concurrently(provider, prompts, **kwargs):
+    """Call generate_text from one thread per prompt; returns {index: result or exception}."""
+    outcomes = {}
+
+    def call(index, prompt):
+        try:
+            outcomes[index] = provider.generate_text(prompt, **kwargs)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(i, p)) for i, p in enumerate(prompts)]
+    for thread in threads:
+        thread.start()
+    # Let every caller reach the provider or join the call in flight
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and provider.get_usage_metrics()["coalescing"]["coalesced"] + provider.wrapped.calls < len(prompts):
+        time.sleep(0.01)
+    provider.wrapped.gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes
+
+
+def test_identical_calls_share_one_upstream_call():
+    provider = CoalescingLLMProvider(GatedProvider())
+    outcomes = run_concurrently(provider, ["plan"] * 5, temperature=0)
+
+    assert provider.wrapped.calls == 1
+    assert list(outcomes.values()) == ["plan #1"] * 5
+    stats = provider.get_usage_metrics()["coalescing"]
+    assert (stats["upstream"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_different_parameters_are_not_coalesced():
+    provider = CoalescingLLMProvider(GatedProvider())
+    provider.wrapped.gate.set()
+    provider.generate_text("plan", temperature=0)
+    provider.generate_text("plan", temperature=1)
+    assert provider.wrapped.calls == 2
+
+
+def test_errors_reach_every_waiter():
+    provider = CoalescingLLMProvider(GatedProvider(error=RuntimeError("upstream failed")))
+    outcomes = run_concurrently(provider, ["plan"] * 3)
+
+    assert provider.wrapped.calls == 1
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes.values())
+
+
+def test_later_calls_are_not_served_a_finished_result():
+    provider = CoalescingLLMProvider(GatedProvider())
+    provider.wrapped.gate.set()
+    assert provider.generate_text("plan") == "plan #1"
+    assert provider.generate_text("plan") == "plan #2"
+
+
+def test_async_calls_share_one_upstream_call():
+    provider = CoalescingLLMProvider(GatedProvider())
+
+    async def scenario():
+        provider.wrapped.async_gate = asyncio.Event()
+        tasks = [asyncio.ensure_future(provider.agenerate_text("plan")) for _ in range(3)]
+        await asyncio.sleep(0)
+        provider.wrapped.async_gate.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == ["plan #1"] * 3
+    assert provider.wrapped.calls == 1
+
+
+def test_async_waiters_take_over_when_the_leader_is_cancelled():
+    provider = CoalescingLLMProvider(GatedProvider())
+
+    async def scenario():
+        provider.wrapped.async_gate = asyncio.Event()
+        leader = asyncio.ensure_future(provider.agenerate_text("plan"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(provider.agenerate_text("plan"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        provider.wrapped.async_gate.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "plan #2"
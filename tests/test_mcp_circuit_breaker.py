@@ -0,0 +1,110 @@
+"""Tests for per-server MCP circuit breakers."""
+
+import time
+
+from swarmdev.utils.mcp_circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerPolicy
+)
+from swarmdev.utils.mcp_metrics import MCPToolHealth
+
+
+class Server:
+    """Keeps an MCPToolHealth the way the metrics collector does."""
+
+    def __init__(self):
+        self.health = MCPToolHealth(tool_id="server")
+
+    def call(self, breaker, status):
+        self.health.total_calls += 1
+        if status == "success":
+            self.health.successful_calls += 1
+            self.health.consecutive_failures = 0
+        elif status == "error":
+            self.health.error_calls += 1
+            self.health.consecutive_failures = 0
+        else:
+            self.health.failed_calls += 1
+            self.health.consecutive_failures += 1
+        return breaker.record_result(status, self.health)
+
+
+def breaker(**policy):
+    options = dict(failure_threshold=3, min_calls=5, min_health_score=0.3, open_seconds=0.05, max_open_seconds=0.2)
+    options.update(policy)
+    return CircuitBreaker("server", CircuitBreakerPolicy(**options))
+
+
+def test_consecutive_failures_open_the_circuit():
+    circuit, server = breaker(), Server()
+    assert not server.call(circuit, "timeout")
+    assert not server.call(circuit, "timeout")
+    assert server.call(circuit, "timeout")
+
+    assert circuit.state == OPEN
+    assert not circuit.allow_request()
+    assert circuit.snapshot()["rejected_calls"] == 1
+    assert 0 < circuit.retry_after() <= 0.05
+
+
+def test_error_replies_count_as_responsive():
+    circuit, server = breaker(), Server()
+    for _ in range(10):
+        assert not server.call(circuit, "error")
+    assert circuit.state == CLOSED
+
+
+def test_low_health_score_opens_the_circuit():
+    circuit, server = breaker(failure_threshold=10), Server()
+    for status in ("success", "timeout", "success", "timeout", "timeout"):
+        opened = server.call(circuit, status)
+    assert opened and circuit.state == OPEN
+    assert "health score" in circuit.last_reason
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    circuit, server = breaker(), Server()
+    for _ in range(3):
+        server.call(circuit, "timeout")
+
+    time.sleep(0.06)
+    assert circuit.allow_request()
+    assert circuit.state == HALF_OPEN
+    assert not circuit.allow_request()  # Only one probe at a time
+
+    server.call(circuit, "success")
+    assert circuit.state == CLOSED
+    assert circuit.allow_request()
+
+
+def test_failed_probe_reopens_with_a_longer_cool_down():
+    circuit, server = breaker(), Server()
+    for _ in range(3):
+        server.call(circuit, "timeout")
+
+    time.sleep(0.06)
+    assert circuit.allow_request()
+    assert server.call(circuit, "timeout")
+    assert circuit.state == OPEN
+    assert circuit.open_seconds == 0.1
+    assert circuit.times_opened == 2
+
+
+def test_health_window_restarts_after_recovery():
+    circuit, server = breaker(failure_threshold=10), Server()
+    for status in ("success", "timeout", "success", "timeout", "timeout"):
+        server.call(circuit, status)
+    time.sleep(0.06)
+    circuit.allow_request()
+    server.call(circuit, "success")
+    assert circuit.state == CLOSED
+
+    # Failures from before the recovery no longer drag the score down
+    for status in ("success", "success", "timeout", "success", "success"):
+        assert not server.call(circuit, status)
+    assert circuit.state == CLOSED
+
+
+def test_policy_from_camel_case_config():
+    policy = CircuitBreakerPolicy.from_config({"failureThreshold": 7, "openSeconds": 2, "enabled": False})
+    assert (policy.failure_threshold, policy.open_seconds, policy.enabled) == (7, 2.0, False)
+    assert policy.min_calls == CircuitBreakerPolicy().min_calls
@@ -0,0 +1,103 @@
+"""Tests for the MCP tool response cache and its invalidation rules."""
+
+from swarmdev.utils.mcp_response_cache import MCPResponseCache, extract_tool_paths, normalize_tool_path
+
+
+def read(path, tool="read_file"):
+    return {"name": tool, "arguments": {"path": path}}
+
+
+def response(text):
+    return {"result": {"content": [{"type": "text", "text": text}]}}
+
+
+def test_hit_returns_a_fresh_copy():
+    cache = MCPResponseCache()
+    cache.put("filesystem", read("src/app.py"), response("v1"))
+
+    first = cache.get("filesystem", read("src/app.py"))
+    first["result"]["content"][0]["text"] = "mutated"
+
+    assert cache.get("filesystem", read("src/app.py")) == response("v1")
+    assert cache.get_stats()["hits"] == 2
+
+
+def test_uncached_tools_and_errors_are_not_stored():
+    cache = MCPResponseCache()
+    cache.put("filesystem", {"name": "write_file", "arguments": {"path": "a"}}, response("ok"))
+    cache.put("filesystem", read("missing.py"), {"error": "not found"})
+    cache.put("filesystem", read("denied.py"), {"result": {"isError": True}})
+
+    assert cache.get("filesystem", {"name": "write_file", "arguments": {"path": "a"}}) is None
+    assert cache.get("filesystem", read("missing.py")) is None
+    assert cache.get("filesystem", read("denied.py")) is None
+
+
+def test_paths_are_normalized():
+    assert normalize_tool_path("/workspace/src/app.py") == "src/app.py"
+    assert normalize_tool_path("./src/../src/app.py") == "src/app.py"
+    assert normalize_tool_path("/workspace") == ""
+    assert extract_tool_paths({"source": "a.py", "destination": "/workspace/b.py"}) == ["a.py", "b.py"]
+
+
+def test_write_invalidates_overlapping_reads_only():
+    cache = MCPResponseCache()
+    cache.put("filesystem", read("src/app.py"), response("app"))
+    cache.put("filesystem", read("src", "list_directory"), response("listing"))
+    cache.put("filesystem", read("docs/index.md"), response("docs"))
+
+    cache.observe_call("filesystem", {"name": "write_file", "arguments": {"path": "/workspace/src/app.py"}})
+
+    assert cache.get("filesystem", read("src/app.py")) is None
+    assert cache.get("filesystem", read("src", "list_directory")) is None
+    assert cache.get("filesystem", read("docs/index.md")) == response("docs")
+
+
+def test_move_invalidates_source_and_destination():
+    cache = MCPResponseCache()
+    cache.put("filesystem", read("old.py"), response("old"))
+    cache.put("filesystem", read("new.py"), response("stale"))
+
+    cache.observe_call("filesystem", {"name": "move_file", "arguments": {"source": "old.py", "destination": "new.py"}})
+
+    assert cache.get("filesystem", read("old.py")) is None
+    assert cache.get("filesystem", read("new.py")) is None
+
+
+def test_opaque_servers_drop_every_path_scoped_entry():
+    cache = MCPResponseCache()
+    docs = {"name": "get-library-docs", "arguments": {"libraryID": "/numpy"}}
+    cache.put("filesystem", read("src/app.py"), response("app"))
+    cache.put("context7", docs, response("docs"))
+
+    cache.observe_call("shell", {"name": "run_command", "arguments": {"command": "git checkout main"}})
+
+    assert cache.get("filesystem", read("src/app.py")) is None
+    assert cache.get("context7", docs) == response("docs")
+
+
+def test_read_in_flight_during_a_write_is_not_stored():
+    cache = MCPResponseCache()
+    generation = cache.generation
+    cache.observe_call("filesystem", {"name": "edit_file", "arguments": {"path": "src/app.py"}})
+
+    cache.put("filesystem", read("src/app.py"), response("stale"), generation=generation)
+
+    assert cache.get("filesystem", read("src/app.py")) is None
+
+
+def test_entries_beyond_the_policy_are_evicted_oldest_first():
+    cache = MCPResponseCache({"policies": {"read_file": {"maxEntries": 2}}})
+    for name in ("a.py", "b.py", "c.py"):
+        cache.put("filesystem", read(name), response(name))
+
+    assert cache.get("filesystem", read("a.py")) is None
+    assert cache.get("filesystem", read("c.py")) == response("c.py")
+    assert cache.get_stats()["tools"]["read_file"]["evictions"] == 1
+
+
+def test_policies_can_be_disabled():
+    cache = MCPResponseCache({"policies": {"read_file": False}})
+    cache.put("filesystem", read("a.py"), response("a"))
+    assert not cache.is_cacheable("filesystem", read("a.py"))
+    assert cache.get("filesystem", read("a.py")) is None
@@ -0,0 +1,87 @@
+"""Tests for newline-delimited JSON-RPC framing over stdio pipes."""
+
+import os
+
+import pytest
+
+from swarmdev.utils.mcp_transport import FrameTooLargeError, JSONRPCFrameReader
+
+
+@pytest.fixture
+def pipe():
+    read_fd, write_fd = os.pipe()
+    reader_stream = os.fdopen(read_fd, "rb", buffering=0)
+    writer = {"fd": write_fd}
+
+    def write(data: bytes):
+        os.write(writer["fd"], data)
+
+    def close():
+        if writer["fd"] is not None:
+            os.close(writer["fd"])
+            writer["fd"] = None
+
+    yield reader_stream, write, close
+    close()
+    reader_stream.close()
+
+
+def test_frames_split_across_reads_and_blank_lines(pipe):
+    stream, write, _ = pipe
+    reader = JSONRPCFrameReader(stream, read_size=4)
+    write(b'{"id": 1}\n\n  \n{"id"')
+    write(b': 2}\n')
+
+    assert reader.read_frame(timeout=1) == b'{"id": 1}'
+    assert reader.read_frame(timeout=1) == b'{"id": 2}'
+
+
+def test_timeout_returns_none_and_keeps_partial_frame(pipe):
+    stream, write, _ = pipe
+    reader = JSONRPCFrameReader(stream)
+    write(b'{"id": 1')
+
+    assert reader.read_frame(timeout=0.05) is None
+    write(b'}\n')
+    assert reader.read_frame(timeout=1) == b'{"id": 1}'
+
+
+def test_closed_stream_raises_eof(pipe):
+    stream, _, close = pipe
+    reader = JSONRPCFrameReader(stream)
+    close()
+    with pytest.raises(EOFError):
+        reader.read_frame(timeout=1)
+
+
+def test_oversized_frame_in_one_read_is_skipped(pipe):
+    stream, write, _ = pipe
+    reader = JSONRPCFrameReader(stream, max_message_bytes=16)
+    write(b'{"data": "' + b"x" * 64 + b'"}\n{"id": 2}\n')
+
+    with pytest.raises(FrameTooLargeError) as error:
+        reader.read_frame(timeout=1)
+    assert error.value.limit == 16
+    assert reader.read_frame(timeout=1) == b'{"id": 2}'
+
+
+def test_oversized_frame_is_discarded_without_buffering_it(pipe):
+    stream, write, _ = pipe
+    reader = JSONRPCFrameReader(stream, max_message_bytes=16, read_size=8)
+    write(b"x" * 40)
+
+    with pytest.raises(FrameTooLargeError):
+        reader.read_frame(timeout=1)
+    assert len(reader._buffer) == 0
+
+    # The rest of the oversized message is dropped as it arrives
+    write(b"y" * 40 + b'\n{"id": 3}\n')
+    assert reader.read_frame(timeout=1) == b'{"id": 3}'
+    assert len(reader._buffer) <= 16
+
+
+def test_frame_at_the_limit_is_accepted(pipe):
+    stream, write, _ = pipe
+    reader = JSONRPCFrameReader(stream, max_message_bytes=9)
+    write(b'{"id": 1}\n')
+    assert reader.read_frame(timeout=1) == b'{"id": 1}'
@@ -0,0 +1,112 @@
+"""Tests for the embedded SQLite knowledge graph backend."""
+
+import pytest
+
+from swarmdev.utils.memory_backend import SQLiteMemoryBackend, create_memory_backend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    store = SQLiteMemoryBackend(str(tmp_path / "memory.db"))
+    yield store
+    store.close()
+
+
+def names(result):
+    return [e["name"] for e in result["result"]["entities"]]
+
+
+def test_existing_entities_are_left_untouched(backend):
+    backend.create_entities([{"name": "app.py", "entityType": "FileArtifact", "observations": ["v1"]}])
+    result = backend.create_entities([
+        {"name": "app.py", "entityType": "Other", "observations": ["v2"]},
+        {"name": "cli.py", "entityType": "FileArtifact", "observations": []},
+    ])
+
+    assert [e["name"] for e in result["result"]] == ["cli.py"]
+    graph = backend.open_nodes(["app.py"])["result"]
+    assert graph["entities"] == [{"name": "app.py", "entityType": "FileArtifact", "observations": ["v1"]}]
+
+
+def test_add_observations_rolls_back_on_unknown_entity(backend):
+    backend.create_entities([{"name": "app.py", "entityType": "FileArtifact", "observations": []}])
+    result = backend.add_observations([
+        {"entityName": "app.py", "contents": ["edited"]},
+        {"entityName": "missing.py", "contents": ["edited"]},
+    ])
+
+    assert "error" in result
+    assert backend.open_nodes(["app.py"])["result"]["entities"][0]["observations"] == []
+
+
+def test_duplicate_observations_are_not_added_twice(backend):
+    backend.create_entities([{"name": "app.py", "entityType": "FileArtifact", "observations": ["created"]}])
+    result = backend.add_observations([{"entityName": "app.py", "contents": ["created", "edited"]}])
+    assert result["result"] == [{"entityName": "app.py", "addedObservations": ["edited"]}]
+
+
+def test_search_is_case_insensitive_substring_match(backend):
+    backend.create_entities([
+        {"name": "app.py", "entityType": "FileArtifact", "observations": ["Implements the CLI parser"]},
+        {"name": "db.py", "entityType": "FileArtifact", "observations": ["SQLite storage"]},
+    ])
+
+    assert names(backend.search_nodes("cli pars")) == ["app.py"]
+    assert names(backend.search_nodes("sqlite")) == ["db.py"]
+    assert names(backend.search_nodes("db")) == ["db.py"]  # Shorter than a trigram
+
+
+def test_open_nodes_returns_relations_between_the_nodes(backend):
+    backend.create_entities([
+        {"name": n, "entityType": "FileArtifact", "observations": []} for n in ("a", "b", "c")
+    ])
+    backend.create_relations([
+        {"from": "a", "to": "b", "relationType": "imports"},
+        {"from": "a", "to": "c", "relationType": "imports"},
+    ])
+
+    graph = backend.open_nodes(["b", "a"])["result"]
+    assert [e["name"] for e in graph["entities"]] == ["b", "a"]
+    assert graph["relations"] == [{"from": "a", "to": "b", "relationType": "imports"}]
+
+
+def test_delete_entities_removes_observations_relations_and_search_hits(backend):
+    backend.create_entities([
+        {"name": "a", "entityType": "FileArtifact", "observations": ["unique marker"]},
+        {"name": "b", "entityType": "FileArtifact", "observations": []},
+    ])
+    backend.create_relations([{"from": "a", "to": "b", "relationType": "imports"}])
+
+    backend.delete_entities(["a"])
+
+    graph = backend.read_graph()["result"]
+    assert [e["name"] for e in graph["entities"]] == ["b"]
+    assert graph["relations"] == []
+    assert names(backend.search_nodes("unique marker")) == []
+
+
+def test_graph_persists_across_connections(tmp_path):
+    path = str(tmp_path / "memory.db")
+    first = SQLiteMemoryBackend(path)
+    first.create_entities([{"name": "app.py", "entityType": "FileArtifact", "observations": ["kept"]}])
+    first.close()
+
+    second = SQLiteMemoryBackend(path)
+    try:
+        assert second.open_nodes(["app.py"])["result"]["entities"][0]["observations"] == ["kept"]
+    finally:
+        second.close()
+
+
+def test_call_tool_rejects_unknown_tools_and_arguments(backend):
+    assert "error" in backend.call_tool("drop_everything", {})
+    assert "error" in backend.call_tool("_graph", {"names": None})
+    assert "error" in backend.call_tool("create_entities", {"items": []})
+
+
+def test_auto_backend_without_mcp_uses_sqlite(tmp_path):
+    store = create_memory_backend({"db_path": str(tmp_path / "auto.db")})
+    try:
+        assert isinstance(store, SQLiteMemoryBackend)
+    finally:
+        store.close()
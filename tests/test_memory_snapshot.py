@@ -0,0 +1,124 @@
+"""Tests for memory snapshots: file round trips, re-keying and bulk import."""
+
+import gzip
+
+import pytest
+
+from swarmdev.utils.memory_backend import SQLiteMemoryBackend
+from swarmdev.utils.memory_snapshot import (
+    compression_suffix, export_snapshot, import_snapshot, read_snapshot, rekey_subgraph, write_snapshot
+)
+
+OLD = "project_20240101_000000"
+NEW = "project_20240202_000000"
+
+ENTITIES = [
+    {"name": f"file_{OLD}_main.py", "entityType": "FileHistory", "observations": [f"Created in {OLD}"]},
+    {"name": f"iteration_{OLD}_1", "entityType": "Iteration", "observations": ["Iteration 1"]},
+    {"name": f"project_node_{OLD}", "entityType": "Project", "observations": [f"Project ID: {OLD}"]},
+]
+RELATIONS = [
+    {"from": f"project_node_{OLD}", "to": f"file_{OLD}_main.py", "relationType": "contains"},
+    {"from": f"iteration_{OLD}_1", "to": f"file_{OLD}_main.py", "relationType": "modified"},
+]
+
+
+@pytest.fixture
+def backend():
+    store = SQLiteMemoryBackend(":memory:")
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("name", ["snapshot.jsonl", "snapshot.jsonl.gz"])
+def test_write_and_read_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    header = write_snapshot(path, ENTITIES, RELATIONS, OLD, str(tmp_path))
+
+    read_header, entities, relations = read_snapshot(path)
+
+    assert read_header == header
+    assert entities == ENTITIES
+    assert relations == RELATIONS
+
+
+def test_gz_snapshot_is_compressed(tmp_path):
+    path = str(tmp_path / "snapshot.jsonl.gz")
+    write_snapshot(path, ENTITIES, RELATIONS, OLD)
+    with gzip.open(path, "rt") as f:
+        assert "swarmdev-memory-snapshot" in f.readline()
+
+
+def test_read_rejects_other_files(tmp_path):
+    path = tmp_path / "notes.jsonl"
+    path.write_text('{"hello": "world"}\n')
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
+
+
+def test_compression_suffix_uses_the_file_ending():
+    assert compression_suffix("backup.zst") == ".zst"
+    assert compression_suffix("memory_snapshot.jsonl.gz") == ".gz"
+    assert compression_suffix("memory_snapshot.jsonl") == ""
+    assert compression_suffix("backup.jsonl.bak") == ""
+
+
+def test_rekey_moves_only_durable_entities():
+    entities, relations, renamed = rekey_subgraph(ENTITIES, RELATIONS, OLD, NEW)
+
+    assert renamed == {f"file_{OLD}_main.py": f"file_{NEW}_main.py", f"project_node_{OLD}": f"project_node_{NEW}"}
+    names = [e["name"] for e in entities]
+    assert names == [f"file_{NEW}_main.py", f"iteration_{OLD}_1", f"project_node_{NEW}"]
+    assert entities[0]["observations"] == [f"Created in {NEW}"]
+    assert relations == [
+        {"from": f"project_node_{NEW}", "to": f"file_{NEW}_main.py", "relationType": "contains"},
+        {"from": f"iteration_{OLD}_1", "to": f"file_{NEW}_main.py", "relationType": "modified"},
+    ]
+
+
+def test_rekey_onto_the_same_project_is_a_no_op():
+    assert rekey_subgraph(ENTITIES, RELATIONS, OLD, OLD) == (ENTITIES, RELATIONS, {})
+
+
+def test_export_writes_only_the_project_subgraph(tmp_path, backend):
+    backend.create_entities(ENTITIES + [{"name": "unrelated", "entityType": "Note", "observations": []}])
+    backend.create_relations(RELATIONS)
+    path = str(tmp_path / "snapshot.jsonl")
+
+    header = export_snapshot(backend, OLD, path)
+
+    assert header["entities"] == 3 and header["relations"] == 2
+    _, entities, _ = read_snapshot(path)
+    assert "unrelated" not in {e["name"] for e in entities}
+
+
+def test_import_leaves_source_copies_by_default(tmp_path, backend):
+    path = str(tmp_path / "snapshot.jsonl")
+    write_snapshot(path, ENTITIES, RELATIONS, OLD)
+    backend.create_entities(ENTITIES)
+
+    report = import_snapshot(backend, path, NEW)
+
+    assert report["source_deleted"] is False
+    names = {e["name"] for e in backend.read_graph()["result"]["entities"]}
+    assert {f"file_{OLD}_main.py", f"file_{NEW}_main.py", f"project_node_{OLD}", f"project_node_{NEW}"} <= names
+
+
+def test_import_deletes_source_copies_when_asked(tmp_path, backend):
+    path = str(tmp_path / "snapshot.jsonl")
+    write_snapshot(path, ENTITIES, RELATIONS, OLD)
+    backend.create_entities(ENTITIES)
+
+    report = import_snapshot(backend, path, NEW, delete_source=True)
+
+    assert report["source_deleted"] is True
+    graph = backend.read_graph()["result"]
+    names = {e["name"] for e in graph["entities"]}
+    assert f"file_{OLD}_main.py" not in names and f"project_node_{OLD}" not in names
+    assert {f"file_{NEW}_main.py", f"project_node_{NEW}", f"iteration_{OLD}_1"} <= names
+    assert {"from": f"project_node_{NEW}", "to": f"file_{NEW}_main.py", "relationType": "contains"} in graph["relations"]
+
+
+def test_import_reports_unreadable_files(tmp_path, backend):
+    report = import_snapshot(backend, str(tmp_path / "missing.jsonl"), NEW)
+    assert "error" in report
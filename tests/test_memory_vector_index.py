@@ -0,0 +1,92 @@
+"""Tests for the local embedding index over knowledge graph observations."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from swarmdev.utils.memory_vector_index import MemoryVectorIndex
+
+
+class SwitchableEmbedder:
+    """Embeds text by keyword counts; `dimension` can change between calls, like a provider fallback."""
+
+    KEYWORDS = ["cache", "parser", "network", "storage"]
+
+    def __init__(self, dimension=3):
+        self.dimension = dimension
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return [
+            [float(text.count(word)) + 0.01 for word in self.KEYWORDS[:self.dimension]]
+            for text in texts
+        ]
+
+
+def test_search_ranks_entities_by_similarity():
+    index = MemoryVectorIndex(SwitchableEmbedder())
+    index.add("cache_module", "Module", ["cache cache eviction"])
+    index.add("parser_module", "Module", ["parser for tokens"])
+
+    results = index.search("parser", limit=2)
+
+    assert [item["entity_name"] for item in results] == ["parser_module", "cache_module"]
+    assert results[0]["matches"] == ["parser for tokens"]
+
+
+def test_dimension_change_in_new_rows_falls_back_and_rebuilds():
+    embedder = SwitchableEmbedder(dimension=3)
+    index = MemoryVectorIndex(embedder)
+    index.add("cache_module", "Module", ["cache eviction"])
+    assert index.search("cache") is not None
+
+    embedder.dimension = 2
+    index.add("parser_module", "Module", ["parser for tokens"])
+    assert index.search("parser") is None
+
+    # The next search re-embeds everything with the current embedder
+    results = index.search("parser")
+    assert results is not None
+    assert {item["entity_name"] for item in results} == {"cache_module", "parser_module"}
+    assert len(index) == 2
+
+
+def test_dimension_change_in_query_falls_back_and_rebuilds():
+    embedder = SwitchableEmbedder(dimension=3)
+    index = MemoryVectorIndex(embedder)
+    index.add("cache_module", "Module", ["cache eviction"])
+    assert index.search("cache") is not None
+
+    embedder.dimension = 2
+    assert index.search("cache") is None
+
+    results = index.search("cache")
+    assert [item["entity_name"] for item in results] == ["cache_module"]
+
+
+def test_failed_embedding_returns_none_and_keeps_rows_pending():
+    def failing(texts):
+        raise RuntimeError("rate limited")
+
+    index = MemoryVectorIndex(failing)
+    index.add("cache_module", "Module", ["cache eviction"])
+
+    assert index.search("cache") is None
+    assert len(index) == 1
+
+
+def test_rekey_with_keep_source_copies_rows_without_embedding():
+    embedder = SwitchableEmbedder()
+    index = MemoryVectorIndex(embedder)
+    index.add("file_old_cache.py", "FileHistory", ["cache in old"])
+    index.build()
+    calls = embedder.calls
+
+    index.rekey({"file_old_cache.py": "file_new_cache.py"}, "old", "new", keep_source=True)
+
+    results = index.search("cache", limit=5)
+    assert {item["entity_name"] for item in results} == {"file_old_cache.py", "file_new_cache.py"}
+    copy = next(item for item in results if item["entity_name"] == "file_new_cache.py")
+    assert copy["matches"] == ["cache in new"]
+    assert embedder.calls == calls + 1  # Only the query was embedded
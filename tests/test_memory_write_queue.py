@@ -0,0 +1,83 @@
+"""Tests for the knowledge graph write-behind queue."""
+
+import threading
+import time
+
+from swarmdev.utils.memory_write_queue import MemoryWriteQueue
+
+
+class RecordingWriter:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.calls = []
+        self.written = threading.Event()
+
+    def __call__(self, tool_name, arguments):
+        self.calls.append((tool_name, arguments))
+        self.written.set()
+        return self.ok
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_interval_flush_repeats_after_first_flush():
+    writer = RecordingWriter()
+    queue = MemoryWriteQueue(writer, batch_size=50, flush_interval=0.1)
+    try:
+        queue.add_entity("a", "Thing", ["first"])
+        assert wait_until(lambda: queue.pending() == 0)
+
+        # The worker is idle now; a single small write must still go out on time
+        queue.add_entity("b", "Thing", ["second"])
+        assert wait_until(lambda: queue.pending() == 0, timeout=1.0)
+        names = [e["name"] for tool, args in writer.calls if tool == "create_entities" for e in args["entities"]]
+        assert names == ["a", "b"]
+    finally:
+        queue.close()
+
+
+def test_full_batch_flushes_before_interval():
+    writer = RecordingWriter()
+    queue = MemoryWriteQueue(writer, batch_size=3, flush_interval=60)
+    try:
+        for name in "xyz":
+            queue.add_entity(name, "Thing", [])
+        assert wait_until(lambda: queue.pending() == 0)
+    finally:
+        queue.close()
+
+
+def test_entities_merge_and_duplicates_are_dropped():
+    writer = RecordingWriter()
+    queue = MemoryWriteQueue(writer, batch_size=50, flush_interval=60)
+    queue.add_entity("a", "Thing", ["one"])
+    queue.add_entity("a", "Thing", ["one", "two"])
+    queue.add_relation("a", "b", "LINKS")
+    queue.add_relation("a", "b", "LINKS")
+    queue.add_observations("a", ["three", "three"])
+    assert queue.pending() == 3
+    assert queue.flush()
+    queue.close()
+
+    by_tool = {tool: args for tool, args in writer.calls}
+    assert by_tool["create_entities"]["entities"] == [{"name": "a", "entityType": "Thing", "observations": ["one", "two"]}]
+    assert by_tool["create_relations"]["relations"] == [{"from": "a", "to": "b", "relationType": "LINKS"}]
+    assert by_tool["add_observations"]["observations"] == [{"entityName": "a", "contents": ["three"]}]
+    # Entities are written before what refers to them
+    assert [tool for tool, _ in writer.calls] == ["create_entities", "create_relations", "add_observations"]
+
+
+def test_failed_batches_are_reported_and_dropped():
+    queue = MemoryWriteQueue(RecordingWriter(ok=False), batch_size=50, flush_interval=60)
+    queue.add_entity("a", "Thing", [])
+    assert queue.flush() is False
+    assert queue.pending() == 0
+    assert queue.stats["failed_batches"] == 1
+    queue.close()
@@ -0,0 +1,91 @@
+"""Tests for token-budgeted prompt assembly."""
+
+from swarmdev.utils.prompt_builder import PromptBuilder, get_token_counter, render_value, split_context_sections
+
+TEMPLATE = "GOAL:\n{goal}\n\nPLAN:\n{plan}\n\nPRIOR:\n{prior_results}\n\nTASK: {task}"
+
+
+def builder(**budgets):
+    return PromptBuilder(config={"budgets": budgets})
+
+
+def section(prompt, name, following):
+    return prompt.split(f"{name}:\n", 1)[1].split(f"\n\n{following}", 1)[0]
+
+
+def test_sections_within_budget_are_rendered_unchanged():
+    prompt = builder().build(TEMPLATE, {"goal": "Build a CLI", "plan": ["parse args", "run"], "prior_results": None},
+                             "test", task="implement")
+
+    assert prompt == "GOAL:\nBuild a CLI\n\nPLAN:\n- parse args\n- run\n\nPRIOR:\nNone\n\nTASK: implement"
+
+
+def test_over_budget_structures_are_compacted_within_budget():
+    prior = {f"step_{i}": {"output": "x" * 500, "files": [f"file_{j}.py" for j in range(30)]} for i in range(40)}
+    pb = builder(goal=10, plan=10, prior_results=300)
+
+    prompt = pb.build(TEMPLATE, {"goal": "g", "plan": "p", "prior_results": prior}, "test", task="t")
+
+    prior_text = section(prompt, "PRIOR", "TASK")
+    assert pb.count_tokens(prior_text) <= 300 + 18  # Plus the budget the other sections did not use
+    assert "more keys" in prior_text or "tokens omitted" in prior_text
+
+
+def test_compaction_is_deterministic():
+    prior = {f"step_{i}": ["result " * 50] * 10 for i in range(30)}
+    sections = {"goal": "g", "plan": None, "prior_results": prior}
+    first = builder(prior_results=200).build(TEMPLATE, sections, "test", task="t")
+    second = builder(prior_results=200).build(TEMPLATE, sections, "test", task="t")
+    assert first == second
+
+
+def test_fallback_rendering_is_used_when_it_fits():
+    catalog = "\n".join(f"server_{i}: tool_a(path: str, recursive: bool) - does a thing" for i in range(200))
+    pb = PromptBuilder(config={"budgets": {"tool_catalog": 50}})
+    prompt = pb.build("{tool_catalog}", {"tool_catalog": catalog}, "test",
+                      fallbacks={"tool_catalog": ["servers: server_0 ... server_199"]})
+    assert prompt == "servers: server_0 ... server_199"
+
+
+def test_long_text_keeps_head_and_tail():
+    text = "HEAD " + "middle " * 2000 + "TAIL"
+    pb = PromptBuilder(config={"budgets": {"goal": 100}})
+
+    prompt = pb.build("{goal}", {"goal": text}, "test")
+
+    assert prompt.startswith("HEAD") and prompt.endswith("TAIL")
+    assert "tokens omitted" in prompt
+    assert pb.count_tokens(prompt) <= 100
+
+
+def test_spare_budget_goes_to_over_budget_sections():
+    pb = builder(goal=100, plan=10, prior_results=10)
+    plan = "p" * 200  # About 50 tokens: fits with the goal's spare budget
+    prompt = pb.build(TEMPLATE, {"goal": "g", "plan": plan, "prior_results": None}, "test", task="t")
+    assert section(prompt, "PLAN", "PRIOR") == plan
+
+
+def test_render_value_shortens_and_omits():
+    value = {"config": {"secret": 1}, "items": list(range(10)), "text": "a" * 50, "deep": {"a": {"b": {"c": 1}}}}
+    rendered = render_value(value, max_string=10, max_items=3, max_depth=2, omit=("config",))
+
+    assert "config" not in rendered
+    assert "... (7 more items)" in rendered
+    assert "aaaaaaaaaa... [40 more chars]" in rendered
+    assert "deep:\n  a: {1 keys: b}" in rendered
+
+
+def test_token_counter_estimates_without_a_tokenizer():
+    count = get_token_counter(None)
+    assert count("") == 0
+    assert count("abcd") == 1
+    assert count("abcde") == 2
+
+
+def test_split_context_sections_replaces_goal_copies():
+    context = {"goal": "Build a CLI", "planning_result": {"goal": "Build a CLI", "steps": ["a"]}, "analysis": "ok"}
+    sections = split_context_sections(context)
+
+    assert sections["goal"] == "Build a CLI"
+    assert sections["plan"] == {"planning_result": {"goal": "(see GOAL)", "steps": ["a"]}}
+    assert sections["prior_results"] == {"analysis": "ok"}